@@ -62,8 +62,39 @@ class OptimizationAlgorithm(object):
             self.hist_file = self.primal_factory._memory.open_file(
                 self.hist_file)
 
+    def _get_krylov_solver(self, default, capability,
+                           keys=('rsnk', 'krylov_solver')):
+        """
+        Look up the Krylov solver class selected by the ``krylov_solver``
+        option, and check that it can fill the role the algorithm needs.
+
+        Parameters
+        ----------
+        default : str
+            Name of the solver used if the option is not set.
+        capability : str
+            Role of the solver in the algorithm; see
+            :func:`~kona.linalg.solvers.krylov.register_krylov_solver`.
+        keys : tuple of str, optional
+            Hierarchy of option keys that select the solver.
+
+        Returns
+        -------
+        type
+            The registered ``KrylovSolver`` subclass.
+        """
+        name = get_opt(self.optns, default, *keys)
+        try:
+            return get_krylov_solver(name, capability)
+        except ValueError:
+            raise BadKonaOption(self.optns, *keys)
+
     def solve(self):
         """
         Triggers the optimization run.
         """
         raise NotImplementedError # pragma: no cover
+
+# imports here to prevent circular errors
+from kona.options import BadKonaOption
+from kona.linalg.solvers.krylov import get_krylov_solver
@@ -66,12 +66,25 @@ class CompositeStepRSNK(OptimizationAlgorithm):
                 'Can only use \'trust\' or \'linesearch\'. ' +
                 'If you want to skip globalization, set to None.')
 
-        # initialize the KKT matrix definition
-        normal_optns = get_opt(optns, {}, 'composite-step', 'normal-step')
+        # initialize the KKT matrix definition, with the Krylov solvers
+        # selected by the krylov_solver option of each step
+        normal_optns = dict(
+            get_opt(optns, {}, 'composite-step', 'normal-step'))
+        if get_opt(normal_optns, True, 'use_gcrot'):
+            default = 'gcrot'
+        else:
+            default = 'fgmres'
+        normal_optns['krylov_solver'] = self._get_krylov_solver(
+            default, 'linear',
+            keys=('composite-step', 'normal-step', 'krylov_solver'))
         self.normal_KKT = AugmentedKKTMatrix(
             [self.primal_factory, self.state_factory, self.dual_factory],
             normal_optns)
-        tangent_optns = get_opt(optns, {}, 'composite-step', 'tangent-step')
+        tangent_optns = dict(
+            get_opt(optns, {}, 'composite-step', 'tangent-step'))
+        tangent_optns['krylov_solver'] = self._get_krylov_solver(
+            'stcg', 'projected_trust_region',
+            keys=('composite-step', 'tangent-step', 'krylov_solver'))
         self.tangent_KKT = LagrangianHessian(
             [self.primal_factory, self.state_factory, self.dual_factory],
             tangent_optns)
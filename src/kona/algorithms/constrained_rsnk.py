@@ -107,8 +107,9 @@ class ConstrainedRSNK(OptimizationAlgorithm):
             'subspace_size':get_opt(self.optns, 10, 'rsnk', 'subspace_size'),
             'check_res':get_opt(self.optns, True, 'rsnk', 'check_res'),
             'rel_tol':get_opt(self.optns, 1e-2, 'rsnk', 'rel_tol'),
+            'max_recycle':get_opt(self.optns, 0, 'rsnk', 'max_recycle'),
         }
-        self.krylov = FLECS(
+        self.krylov = self._get_krylov_solver('flecs', 'kkt_trust_region')(
             [self.primal_factory, self.eq_factory],
             krylov_optns)
 
@@ -566,6 +567,5 @@ from kona.linalg.vectors.composite import ReducedKKTVector
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.linalg.matrices.hessian import ReducedKKTMatrix
 from kona.linalg.matrices.preconds import ReducedSchurPreconditioner
-from kona.linalg.solvers.krylov import FLECS
 from kona.linalg.solvers.util import EPS
 from kona.algorithms.util.filter import SimpleFilter
@@ -71,8 +71,11 @@ class PredictorCorrector(OptimizationAlgorithm):
             'subspace_size' : get_opt(self.optns, 10, 'rsnk', 'subspace_size'),
             'check_res'     : get_opt(self.optns, True, 'rsnk', 'check_res'),
             'rel_tol'       : get_opt(self.optns, 1e-2, 'rsnk', 'rel_tol'),
+            'max_outer'     : get_opt(self.optns, 1, 'rsnk', 'max_outer'),
+            'deflation'     : get_opt(self.optns, 0, 'rsnk', 'deflation'),
         }
-        self.krylov = FGMRES(self.primal_factory, krylov_optns)
+        self.krylov = self._get_krylov_solver('fgmres', 'linear')(
+            self.primal_factory, krylov_optns)
 
         # homotopy options
         ############################################################
@@ -406,4 +409,3 @@ from kona.options import BadKonaOption, get_opt
 from kona.linalg.common import current_solution, factor_linear_system, objective_value
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.linalg.matrices.hessian import ReducedHessian
-from kona.linalg.solvers.krylov import FGMRES
\ No newline at end of file
@@ -81,9 +81,12 @@ class PredictorCorrectorCnstr(OptimizationAlgorithm):
             'subspace_size' : get_opt(self.optns, 10, 'rsnk', 'subspace_size'),
             'check_res'     : get_opt(self.optns, True, 'rsnk', 'check_res'),
             'rel_tol'       : get_opt(self.optns, 1e-2, 'rsnk', 'rel_tol'),
+            'max_outer'     : get_opt(self.optns, 1, 'rsnk', 'max_outer'),
+            'deflation'     : get_opt(self.optns, 0, 'rsnk', 'deflation'),
         }
-        self.krylov = FGMRES(self.primal_factory, krylov_optns,
-                             eq_factory=self.eq_factory, ineq_factory=None)
+        self.krylov = self._get_krylov_solver('fgmres', 'linear')(
+            self.primal_factory, krylov_optns,
+            eq_factory=self.eq_factory, ineq_factory=None)
 
         # homotopy options
         ############################################################
@@ -262,8 +265,14 @@ class PredictorCorrectorCnstr(OptimizationAlgorithm):
         if self.factor_matrices:
             factor_linear_system(x.primal, state)
 
+        # solve the objective and constraint adjoints together
+        state_work.equals_objective_adjoint_rhs(x.primal, state)
+        state_save.equals_constraint_adjoint_rhs(
+            x.primal, state, x.dual, adj)
+        dRdU(x.primal, state).T.solve_multi(
+            [state_work, state_save], [adj_save, adj], rel_tol=1e-6)
+
         # compute scaling factors
-        adj_save.equals_objective_adjoint(x.primal, state, state_work)
         primal_work.equals_total_gradient(x.primal, state, adj_save)
         obj_norm0 = primal_work.norm2
         obj_fac = 1./obj_norm0
@@ -271,9 +280,8 @@ class PredictorCorrectorCnstr(OptimizationAlgorithm):
         # cnstr_norm0 = dual_work.norm2
         cnstr_fac = 1.
 
-        # compute the lagrangian adjoint
-        adj.equals_lagrangian_adjoint(
-            x, state, state_work, obj_scale=obj_fac, cnstr_scale=cnstr_fac)
+        # the lagrangian adjoint is a linear combination of the two adjoints
+        adj.equals_ax_p_by(obj_fac, adj_save, cnstr_fac, adj)
 
         # compute initial KKT conditions
         dJdX.equals_KKT_conditions(
@@ -667,7 +675,6 @@ import numpy as np
 from kona.options import BadKonaOption, get_opt
 from kona.linalg.common import current_solution, factor_linear_system, objective_value
 from kona.linalg.vectors.composite import ReducedKKTVector
-from kona.linalg.matrices.common import IdentityMatrix
+from kona.linalg.matrices.common import IdentityMatrix, dRdU
 from kona.linalg.matrices.hessian import ReducedKKTMatrix
 from kona.linalg.matrices.preconds import ReducedSchurPreconditioner
-from kona.linalg.solvers.krylov import FGMRES
\ No newline at end of file
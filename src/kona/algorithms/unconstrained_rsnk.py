@@ -32,6 +32,8 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
         Matrix object defining the approximation to the Hessian inverse.
     krylov : :class:`~kona.linalg.solvers.krylov.FGMRES` or :class:`~kona.linalg.solvers.krylov.STCG`
         A krylov solver object used to solve the system defined by the Hessian.
+        The ``krylov_solver`` option of ``rsnk`` selects a registered
+        alternative, e.g. ``'gltr'`` for trust-region steps.
     globalization : string
         Flag to determine which type of globalization to use.
     radius, max_radius : float
@@ -40,6 +42,10 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
         Back-tracking line search tool.
     merit_func : :class:`~kona.algorithms.util.merit.ObjectiveMerit`
         Simple objective as merit function.
+    curvature : :class:`~kona.linalg.matrices.hessian.CurvatureStore`
+        Hessian-vector products kept across iterations, if the
+        ``curvature_store`` options of ``rsnk`` are given. Without
+        globalization, they provide the initial guess of the Newton step.
 
     """
 
@@ -63,6 +69,7 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
             'subspace_size':get_opt(self.optns, 10, 'rsnk', 'subspace_size'),
             'check_res':get_opt(self.optns, True, 'rsnk', 'check_res'),
             'rel_tol':get_opt(self.optns, 1e-2, 'rsnk', 'rel_tol'),
+            'pipelined':get_opt(self.optns, False, 'rsnk', 'pipelined'),
         }
 
         # determine if the underlying PDE is matrix-explicit
@@ -73,9 +80,12 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
         if self.globalization is None:
             self.info_file.write(
                 ">> WARNING: Globalization is turned off! <<\n")
-            self.krylov = FGMRES(self.primal_factory, krylov_optns)
+            self.krylov = self._get_krylov_solver('fgmres', 'linear')(
+                self.primal_factory, krylov_optns)
         elif self.globalization == 'linesearch':
-            self.krylov = LineSearchCG(self.primal_factory, krylov_optns)
+            krylov_solver = self._get_krylov_solver(
+                'linesearch_cg', 'line_search')
+            self.krylov = krylov_solver(self.primal_factory, krylov_optns)
             line_search_opt = get_opt(self.optns, {}, 'linesearch')
             self.line_search = BackTracking(
                 line_search_opt, out_file=self.info_file)
@@ -84,7 +94,8 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
                 {}, self.info_file)
             self.last_alpha = 1.0
         elif self.globalization == 'trust':
-            self.krylov = STCG(self.primal_factory, krylov_optns)
+            self.krylov = self._get_krylov_solver('stcg', 'trust_region')(
+                self.primal_factory, krylov_optns)
             self.radius = get_opt(self.optns, 1.0, 'trust', 'init_radius')
             self.max_radius = get_opt(self.optns, 1.0, 'trust', 'max_radius')
             self.krylov.radius = self.radius
@@ -115,6 +126,13 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
             self.eye = IdentityMatrix()
             self.precond = self.eye.product
 
+        # keep the Hessian-vector products across iterations, if requested
+        self.curvature = None
+        store_optns = get_opt(self.optns, None, 'rsnk', 'curvature_store')
+        if store_optns is not None:
+            self.curvature = CurvatureStore(self.primal_factory, store_optns)
+            self.hessian.set_curvature_store(self.curvature)
+
     def _write_header(self, obj_scale):
         if self.globalization == 'trust':
             glob_text = 'radius    '
@@ -222,6 +240,8 @@ class UnconstrainedRSNK(OptimizationAlgorithm):
             p.equals(0.0)
             dJdX.times(-1.0)
             self.hessian.linearize(x, state, adjoint, scale=obj_scale)
+            if self.curvature is not None and self.globalization is None:
+                self.curvature.initial_guess(dJdX, p)
             pred, active = self.krylov.solve(
                 self.hessian.product, dJdX, p, self.precond)
             dJdX.times(-1.0)
@@ -308,6 +328,6 @@ from kona.options import BadKonaOption, get_opt
 from kona.linalg.common import current_solution, objective_value, factor_linear_system
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.linalg.matrices.hessian import LimitedMemoryBFGS, ReducedHessian
-from kona.linalg.solvers.krylov import STCG, LineSearchCG, FGMRES
+from kona.linalg.matrices.hessian import CurvatureStore
 from kona.algorithms.util.linesearch import BackTracking
 from kona.algorithms.util.merit import ObjectiveMerit
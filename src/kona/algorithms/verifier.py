@@ -48,6 +48,7 @@ class Verifier(OptimizationAlgorithm):
             'pde_jac'      : get_opt(optns, True, 'verify', 'pde_jac'),
             'cnstr_jac_eq' : get_opt(optns, False, 'verify', 'cnstr_jac_eq'),
             'cnstr_jac_in' : get_opt(optns, False, 'verify', 'cnstr_jac_in'),
+            'block_jac'    : get_opt(optns, True, 'verify', 'block_jac'),
             'red_grad'     : get_opt(optns, True, 'verify', 'red_grad'),
             'lin_solve'    : get_opt(optns, True, 'verify', 'lin_solve'),
         }
@@ -97,11 +98,18 @@ class Verifier(OptimizationAlgorithm):
         if self.optns['lin_solve']:
             num_primal = max(num_primal, 1)
             num_state = max(num_state, 5)
+        if self.optns['block_jac']:
+            num_primal = max(num_primal, 6)
+            num_state = max(num_state, 6)
+            if self.eq_factory is not None:
+                num_dual_eq = max(num_dual_eq, 5)
+            if self.ineq_factory is not None:
+                num_dual_in = max(num_dual_in, 5)
         self.primal_factory.request_num_vectors(num_primal)
         self.state_factory.request_num_vectors(num_state)
-        if self.optns['dual_vec_eq']:
+        if num_dual_eq > 0:
             self.eq_factory.request_num_vectors(num_dual_eq)
-        if self.optns['dual_vec_in']:
+        if num_dual_in > 0:
             self.ineq_factory.request_num_vectors(num_dual_in)
 
         # set a dictionary that will keep track of failures
@@ -178,6 +186,21 @@ class Verifier(OptimizationAlgorithm):
                 'multiply_dCINdX_T'     : None,
                 'multiply_dCINdU_T'     : None,
             },
+            # optional UserSolver block jacobian operations
+            'block_jac' : {
+                'multiply_dRdX_block'       : None,
+                'multiply_dRdU_block'       : None,
+                'multiply_dRdX_T_block'     : None,
+                'multiply_dRdU_T_block'     : None,
+                'multiply_dCEQdX_block'     : None,
+                'multiply_dCEQdU_block'     : None,
+                'multiply_dCEQdX_T_block'   : None,
+                'multiply_dCEQdU_T_block'   : None,
+                'multiply_dCINdX_block'     : None,
+                'multiply_dCINdU_block'     : None,
+                'multiply_dCINdX_T_block'   : None,
+                'multiply_dCINdU_T_block'   : None,
+            },
             # UserSolver forward and reverse linear solves
             'lin_solve' : {
                 'solve_linear'          : None,
@@ -192,7 +215,7 @@ class Verifier(OptimizationAlgorithm):
             ['primal_vec', 'state_vec', 'dual_vec_eq', 'dual_vec_in']
         self.non_critical = \
             ['gradients', 'pde_jac', 'cnstr_jac_eq', 'cnstr_jac_in',
-             'lin_solve', 'red_grad']
+             'block_jac', 'lin_solve', 'red_grad']
         self.all_tests = self.critical + self.non_critical
 
     def solve(self):
@@ -243,7 +266,7 @@ class Verifier(OptimizationAlgorithm):
                     else:
                         result = 'Passed'
                 self.out_stream.write(
-                    ('%s'%function).ljust(20).replace(' ', '.') +
+                    ('%s'%function).ljust(24).replace(' ', '.') +
                     '...%s\n'%result
                 )
 
@@ -1060,6 +1083,86 @@ class Verifier(OptimizationAlgorithm):
                     'check this test again!\n'
                 )
 
+    def _verify_block_jac(self):
+        if not self.optns['block_jac']:
+            return
+
+        # only the block products overridden by the user are tested
+        for function in self.failures['block_jac']:
+            self.failures['block_jac'][function] = None
+
+        u_p = self.primal_factory.generate()
+        u_s = self.state_factory.generate()
+        u_p.equals_init_design()
+        u_s.equals_primal_solution(u_p)
+        if self.factor_matrices:
+            factor_linear_system(u_p, u_s)
+
+        def make_vecs(factory, at_vec=None):
+            in_vecs = [factory.generate() for i in xrange(2)]
+            out_vecs = [factory.generate() for i in xrange(2)]
+            in_vecs[0].equals(1.0)
+            if at_vec is not None:
+                in_vecs[1].equals(at_vec)
+            else:
+                in_vecs[1].equals(-2.0)
+            return in_vecs, out_vecs, factory.generate()
+
+        primal = make_vecs(self.primal_factory, u_p)
+        state = make_vecs(self.state_factory, u_s)
+        tests = [
+            ('multiply_dRdX_block', dRdX(u_p, u_s), primal, state),
+            ('multiply_dRdU_block', dRdU(u_p, u_s), state, state),
+            ('multiply_dRdX_T_block', dRdX(u_p, u_s).T, state, primal),
+            ('multiply_dRdU_T_block', dRdU(u_p, u_s).T, state, state),
+        ]
+        if self.eq_factory is not None:
+            dual = make_vecs(self.eq_factory)
+            tests += [
+                ('multiply_dCEQdX_block', dCEQdX(u_p, u_s), primal, dual),
+                ('multiply_dCEQdU_block', dCEQdU(u_p, u_s), state, dual),
+                ('multiply_dCEQdX_T_block', dCEQdX(u_p, u_s).T, dual, primal),
+                ('multiply_dCEQdU_T_block', dCEQdU(u_p, u_s).T, dual, state),
+            ]
+        if self.ineq_factory is not None:
+            dual = make_vecs(self.ineq_factory)
+            tests += [
+                ('multiply_dCINdX_block', dCINdX(u_p, u_s), primal, dual),
+                ('multiply_dCINdU_block', dCINdU(u_p, u_s), state, dual),
+                ('multiply_dCINdX_T_block', dCINdX(u_p, u_s).T, dual, primal),
+                ('multiply_dCINdU_T_block', dCINdU(u_p, u_s).T, dual, state),
+            ]
+
+        for function, matrix, in_space, out_space in tests:
+            hook = getattr(type(self.solver), function, None)
+            if hook is None or \
+                    hook.__func__ is getattr(UserSolver, function).__func__:
+                continue
+            in_vecs = in_space[0]
+            out_vecs, work = out_space[1], out_space[2]
+            self.failures['block_jac'][function] = False
+
+            # compare the block product against individual products
+            matrix.product_block(in_vecs, out_vecs)
+            rel_error = 0.0
+            for in_vec, out_vec in zip(in_vecs, out_vecs):
+                matrix.product(in_vec, work)
+                prod_norm = work.norm2
+                work.minus(out_vec)
+                rel_error = max(rel_error, work.norm2/max(prod_norm, EPS))
+
+            self.out_stream.write(
+                '============================================================\n' +
+                'Block jacobian-vector product test: %s\n'%function +
+                '   max relative error   : %e\n'%rel_error
+            )
+            if rel_error > sqrt(EPS):
+                self.failures['block_jac'][function] = True
+                self.out_stream.write(
+                    'WARNING: %s() does not match '%function +
+                    'the individual products!\n'
+                )
+
     def _verify_red_grad(self):
         if not self.optns['red_grad']:
             return
@@ -1218,4 +1321,5 @@ from kona.linalg.common import objective_value, lagrangian_value, factor_linear_
 from kona.linalg.solvers.util import calc_epsilon
 from kona.linalg.vectors.composite import ReducedKKTVector
 from kona.linalg.matrices.common import dRdX, dRdU
-from kona.linalg.matrices.common import dCEQdX, dCEQdU, dCINdX, dCINdU
\ No newline at end of file
+from kona.linalg.matrices.common import dCEQdX, dCEQdU, dCINdX, dCINdU
+from kona.user import UserSolver
\ No newline at end of file
@@ -97,19 +97,24 @@ def objective_value(at_primal, at_state):
     assert isinstance(at_state, StateVector), \
         "Invalid state vector type: must be StateVector!"
 
-    solver = at_design._memory.solver
+    memory = at_design._memory
+    key, value = memory.get_eval('eval_obj', at_design, at_state)
+    if value is not None:
+        return value
 
-    result = solver.eval_obj(at_design.base.data, at_state.base)
+    result = memory.solver.eval_obj(at_design.base.data, at_state.base)
 
     if isinstance(result, tuple):
-        at_design._memory.cost += result[1]
-        return result[0]
+        memory.cost += result[1]
+        value = result[0]
     elif isinstance(result, float):
-        return result
+        value = result
     else:
         raise TypeError(
             'objective_value() >> solver.eval_obj() ' +
             'expected 2-tuple or float but was given %s'%type(result))
+    memory.store_eval(key, value)
+    return value
 
 def lagrangian_value(at_kkt, at_state, barrier=None):
     """
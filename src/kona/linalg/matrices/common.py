@@ -19,10 +19,13 @@ class KonaMatrix(object):
         State vector point for linearization
     _transposed : boolean
         Flag to determine if the matrix is transposed
+    _T : KonaMatrix or None
+        Cached transposed twin of this matrix.
     """
     def __init__(self, primal=None, state=None, transposed=False):
         self._memory = None
         self._solver = None
+        self._T = None
         if primal is None or state is None:
             self._linearized = False
         else:
@@ -52,6 +55,25 @@ class KonaMatrix(object):
             self._solver = self._memory.solver
         self._linearized = True
 
+    @property
+    def lin_key(self):
+        """
+        Identifier of the linearization point. It changes whenever the stored
+        design or state vector is modified.
+
+        Returns
+        -------
+        tuple
+        """
+        assert self._linearized
+        return (id(self._design), self._design.version,
+                id(self._state), self._state.version)
+
+    def _activate(self):
+        # let the solver know which point the next solver calls are made at
+        assert self._linearized
+        self._memory.activate_linearization(self._design, self._state)
+
     def product(self, in_vec, out_vec):
         """
         Performs a matrix-vector product at the internally stored linearization.
@@ -67,6 +89,25 @@ class KonaMatrix(object):
         """
         raise NotImplementedError
 
+    def product_block(self, in_vecs, out_vecs):
+        """
+        Performs matrix-vector products for a block of vectors at the
+        internally stored linearization. The product of ``in_vecs[k]`` is
+        stored in ``out_vecs[k]``.
+
+        Matrices backed by a block-capable user solver override this to make
+        a single solver call; the default loops over ``product()``.
+
+        Parameters
+        ----------
+        in_vecs : list of KonaVector
+        out_vecs : list of KonaVector
+        """
+        assert len(in_vecs) == len(out_vecs), \
+            "Number of input and output vectors do not match!"
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.product(in_vec, out_vec)
+
     @property
     def T(self):
         """
@@ -76,14 +117,33 @@ class KonaMatrix(object):
         -------
         KonaMatrix-like : Transposed version of the matrix.
         """
-        return self.__class__(self._design, self._state, True)
+        if self._T is None:
+            self._T = self.__class__(transposed=True)
+        self._T.linearize(self._design, self._state)
+        return self._T
+
+def _get_design(vec, name):
+    # strip the design component out of a primal vector
+    if isinstance(vec, CompositePrimalVector):
+        return vec.design
+    elif isinstance(vec, DesignVector):
+        return vec
+    else:
+        raise AssertionError(
+            "Invalid %s vector: " % name +
+            "must be DesignVector or CompositePrimalVector!")
+
+def _check_types(vecs, vec_type, name):
+    for vec in vecs:
+        assert isinstance(vec, vec_type), \
+            "Invalid %s vector: must be %s!" % (name, vec_type.__name__)
 
 class dRdX(KonaMatrix):
     """
     Partial jacobian of the system residual with respect to primal variables.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             if isinstance(in_vec, CompositePrimalVector):
                 in_design = in_vec.design
@@ -98,6 +158,7 @@ class dRdX(KonaMatrix):
             self._solver.multiply_dRdX(
                 self._design.base.data, self._state.base,
                 in_design.base.data, out_vec.base)
+            out_vec.touch()
         else:
             assert isinstance(in_vec, StateVector), \
                 "Invalid multiplying vector: must be StateVector!"
@@ -109,16 +170,41 @@ class dRdX(KonaMatrix):
                 raise TypeError(
                     "Invalid output vector: " +
                     "must be DesignVector or CompositePrimalVector!")
-            out_design.base.data = self._solver.multiply_dRdX_T(
+            out_design.base.data[:] = self._solver.multiply_dRdX_T(
                 self._design.base.data, self._state.base,
                 in_vec.base)
+            out_design.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        if not self._transposed:
+            in_data = [
+                _get_design(in_vec, 'multiplying').base.data
+                for in_vec in in_vecs]
+            _check_types(out_vecs, StateVector, 'output')
+            self._solver.multiply_dRdX_block(
+                self._design.base.data, self._state.base,
+                in_data, [out_vec.base for out_vec in out_vecs])
+            for out_vec in out_vecs:
+                out_vec.touch()
+        else:
+            _check_types(in_vecs, StateVector, 'multiplying')
+            out_designs = [
+                _get_design(out_vec, 'output') for out_vec in out_vecs]
+            results = self._solver.multiply_dRdX_T_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base for in_vec in in_vecs])
+            for out_design, result in zip(out_designs, results):
+                out_design.base.data[:] = result
+                out_design.touch()
 
 class dRdU(KonaMatrix):
     """
     Partial jacobian of the system residual with respect to state variables.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         assert isinstance(in_vec, StateVector), \
             "Invalid multiplying vector: must be StateVector!"
         assert isinstance(out_vec, StateVector), \
@@ -127,10 +213,30 @@ class dRdU(KonaMatrix):
             self._solver.multiply_dRdU(
                 self._design.base.data, self._state.base,
                 in_vec.base, out_vec.base)
+            out_vec.touch()
         else:
             self._solver.multiply_dRdU_T(
                 self._design.base.data, self._state.base,
                 in_vec.base, out_vec.base)
+            out_vec.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        _check_types(in_vecs, StateVector, 'multiplying')
+        _check_types(out_vecs, StateVector, 'output')
+        in_bases = [in_vec.base for in_vec in in_vecs]
+        out_bases = [out_vec.base for out_vec in out_vecs]
+        if not self._transposed:
+            self._solver.multiply_dRdU_block(
+                self._design.base.data, self._state.base,
+                in_bases, out_bases)
+        else:
+            self._solver.multiply_dRdU_T_block(
+                self._design.base.data, self._state.base,
+                in_bases, out_bases)
+        for out_vec in out_vecs:
+            out_vec.touch()
 
     def solve(self, rhs_vec, solution, rel_tol=1e-8):
         """
@@ -153,7 +259,7 @@ class dRdU(KonaMatrix):
         bool
             Convergence flag.
         """
-        assert self._linearized
+        self._activate()
         assert isinstance(solution, StateVector), \
             "Invalid solution vector: must be StateVector!"
         assert isinstance(rhs_vec, StateVector), \
@@ -168,12 +274,58 @@ class dRdU(KonaMatrix):
             cost = self._solver.solve_adjoint(
                 self._design.base.data, self._state.base,
                 rhs_vec.base, rel_tol, solution.base)
+        solution.touch()
         self._memory.cost += abs(cost)
         if cost >= 0:
             converged = True
         return converged
 
+    def solve_multi(self, rhs_vecs, solutions, rel_tol=1e-8):
+        """
+        Performs linear solutions for several right hand sides at once. The
+        solution for ``rhs_vecs[k]`` is stored in ``solutions[k]``.
+
+        If the transposed matrix object is used, this function performs
+        adjoint solutions.
+
+        Parameters
+        ----------
+        rhs_vecs : list of StateVector
+            Right hand side vectors for the solutions.
+        solutions : list of StateVector
+            Vectors where the results should be stored.
+        rel_tol : float
+            Solution tolerance.
+
+        Returns
+        -------
+        bool
+            Convergence flag; ``True`` only if all solutions converged.
+        """
+        self._activate()
+        assert len(rhs_vecs) == len(solutions), \
+            "Number of RHS and solution vectors do not match!"
+        _check_types(solutions, StateVector, 'solution')
+        _check_types(rhs_vecs, StateVector, 'RHS')
+        for solution in solutions:
+            solution.equals(0.0)
+        rhs_bases = [rhs_vec.base for rhs_vec in rhs_vecs]
+        sol_bases = [solution.base for solution in solutions]
+        if not self._transposed:
+            cost = self._solver.solve_linear_multi(
+                self._design.base.data, self._state.base,
+                rhs_bases, rel_tol, sol_bases)
+        else:
+            cost = self._solver.solve_adjoint_multi(
+                self._design.base.data, self._state.base,
+                rhs_bases, rel_tol, sol_bases)
+        for solution in solutions:
+            solution.touch()
+        self._memory.cost += abs(cost)
+        return cost >= 0
+
     def precond(self, in_vec, out_vec):
+        self._activate()
         assert isinstance(in_vec, StateVector), \
             "Invalid multiplying vector: must be StateVector!"
         assert isinstance(out_vec, StateVector), \
@@ -182,10 +334,12 @@ class dRdU(KonaMatrix):
             self._solver.apply_precond(
                 self._design.base.data, self._state.base,
                 in_vec.base, out_vec.base)
+            out_vec.touch()
         else:
             self._solver.apply_precond_T(
                 self._design.base.data, self._state.base,
                 in_vec.base, out_vec.base)
+            out_vec.touch()
         self._memory.cost += 1
 
 class dCEQdX(KonaMatrix):
@@ -193,7 +347,7 @@ class dCEQdX(KonaMatrix):
     Partial jacobian of the equality constraints with respect to design vars.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             if isinstance(in_vec, CompositePrimalVector):
                 in_design = in_vec.design
@@ -208,6 +362,7 @@ class dCEQdX(KonaMatrix):
             out_vec.base.data[:] = self._solver.multiply_dCEQdX(
                 self._design.base.data, self._state.base,
                 in_design.base.data)
+            out_vec.touch()
         else:
             assert isinstance(in_vec, DualVectorEQ), \
                 "Invalid multiplying vector: must be DualVectorEQ!"
@@ -222,13 +377,38 @@ class dCEQdX(KonaMatrix):
             out_design.base.data[:] = self._solver.multiply_dCEQdX_T(
                 self._design.base.data, self._state.base,
                 in_vec.base.data)
+            out_design.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        if not self._transposed:
+            in_data = [
+                _get_design(in_vec, 'multiplying').base.data
+                for in_vec in in_vecs]
+            _check_types(out_vecs, DualVectorEQ, 'output')
+            results = self._solver.multiply_dCEQdX_block(
+                self._design.base.data, self._state.base, in_data)
+            for out_vec, result in zip(out_vecs, results):
+                out_vec.base.data[:] = result
+                out_vec.touch()
+        else:
+            _check_types(in_vecs, DualVectorEQ, 'multiplying')
+            out_designs = [
+                _get_design(out_vec, 'output') for out_vec in out_vecs]
+            results = self._solver.multiply_dCEQdX_T_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base.data for in_vec in in_vecs])
+            for out_design, result in zip(out_designs, results):
+                out_design.base.data[:] = result
+                out_design.touch()
 
 class dCEQdU(KonaMatrix):
     """
     Partial jacobian of the equality constraints with respect to state vars.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             assert isinstance(in_vec, StateVector), \
                 "Invalid multiplying vector: must be StateVector!"
@@ -237,6 +417,7 @@ class dCEQdU(KonaMatrix):
             out_vec.base.data[:] = self._solver.multiply_dCEQdU(
                 self._design.base.data, self._state.base,
                 in_vec.base)
+            out_vec.touch()
         else:
             assert isinstance(in_vec, DualVectorEQ), \
                 "Invalid multiplying vector: must be DualVectorEQ!"
@@ -245,13 +426,36 @@ class dCEQdU(KonaMatrix):
             self._solver.multiply_dCEQdU_T(
                 self._design.base.data, self._state.base,
                 in_vec.base.data, out_vec.base)
+            out_vec.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        if not self._transposed:
+            _check_types(in_vecs, StateVector, 'multiplying')
+            _check_types(out_vecs, DualVectorEQ, 'output')
+            results = self._solver.multiply_dCEQdU_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base for in_vec in in_vecs])
+            for out_vec, result in zip(out_vecs, results):
+                out_vec.base.data[:] = result
+                out_vec.touch()
+        else:
+            _check_types(in_vecs, DualVectorEQ, 'multiplying')
+            _check_types(out_vecs, StateVector, 'output')
+            self._solver.multiply_dCEQdU_T_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base.data for in_vec in in_vecs],
+                [out_vec.base for out_vec in out_vecs])
+            for out_vec in out_vecs:
+                out_vec.touch()
 
 class dCINdX(KonaMatrix):
     """
     Partial jacobian of the inequality constraints with respect to design vars.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             if isinstance(in_vec, CompositePrimalVector):
                 in_design = in_vec.design
@@ -266,6 +470,7 @@ class dCINdX(KonaMatrix):
             out_vec.base.data[:] = self._solver.multiply_dCINdX(
                 self._design.base.data, self._state.base,
                 in_design.base.data,)
+            out_vec.touch()
         else:
             assert isinstance(in_vec, DualVectorINEQ), \
                 "Invalid multiplying vector: must be DualVectorINEQ!"
@@ -280,13 +485,38 @@ class dCINdX(KonaMatrix):
             out_design.base.data[:] = self._solver.multiply_dCINdX_T(
                 self._design.base.data, self._state.base,
                 in_vec.base.data)
+            out_design.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        if not self._transposed:
+            in_data = [
+                _get_design(in_vec, 'multiplying').base.data
+                for in_vec in in_vecs]
+            _check_types(out_vecs, DualVectorINEQ, 'output')
+            results = self._solver.multiply_dCINdX_block(
+                self._design.base.data, self._state.base, in_data)
+            for out_vec, result in zip(out_vecs, results):
+                out_vec.base.data[:] = result
+                out_vec.touch()
+        else:
+            _check_types(in_vecs, DualVectorINEQ, 'multiplying')
+            out_designs = [
+                _get_design(out_vec, 'output') for out_vec in out_vecs]
+            results = self._solver.multiply_dCINdX_T_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base.data for in_vec in in_vecs])
+            for out_design, result in zip(out_designs, results):
+                out_design.base.data[:] = result
+                out_design.touch()
 
 class dCINdU(KonaMatrix):
     """
     Partial jacobian of the inequality constraints with respect to state vars.
     """
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             assert isinstance(in_vec, StateVector), \
                 "Invalid multiplying vector: must be StateVector!"
@@ -295,6 +525,7 @@ class dCINdU(KonaMatrix):
             out_vec.base.data[:] = self._solver.multiply_dCINdU(
                 self._design.base.data, self._state.base,
                 in_vec.base)
+            out_vec.touch()
         else:
             assert isinstance(in_vec, DualVectorINEQ), \
                 "Invalid multiplying vector: must be DualVectorINEQ!"
@@ -303,26 +534,55 @@ class dCINdU(KonaMatrix):
             self._solver.multiply_dCINdU_T(
                 self._design.base.data, self._state.base,
                 in_vec.base.data, out_vec.base)
+            out_vec.touch()
+
+    def product_block(self, in_vecs, out_vecs):
+        self._activate()
+        assert len(in_vecs) == len(out_vecs)
+        if not self._transposed:
+            _check_types(in_vecs, StateVector, 'multiplying')
+            _check_types(out_vecs, DualVectorINEQ, 'output')
+            results = self._solver.multiply_dCINdU_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base for in_vec in in_vecs])
+            for out_vec, result in zip(out_vecs, results):
+                out_vec.base.data[:] = result
+                out_vec.touch()
+        else:
+            _check_types(in_vecs, DualVectorINEQ, 'multiplying')
+            _check_types(out_vecs, StateVector, 'output')
+            self._solver.multiply_dCINdU_T_block(
+                self._design.base.data, self._state.base,
+                [in_vec.base.data for in_vec in in_vecs],
+                [out_vec.base for out_vec in out_vecs])
+            for out_vec in out_vecs:
+                out_vec.touch()
 
 class dCdX(KonaMatrix):
     """
     Combined partial constraint jacobian matrix that can do both equality and
     inequality products depending on what input vectors are provided.
     """
+    def __init__(self, primal=None, state=None, transposed=False):
+        self._eq_mat = dCEQdX(transposed=transposed)
+        self._ineq_mat = dCINdX(transposed=transposed)
+        super(dCdX, self).__init__(primal, state, transposed)
+
+    def linearize(self, primal, state):
+        super(dCdX, self).linearize(primal, state)
+        self._eq_mat.linearize(self._design, self._state)
+        self._ineq_mat.linearize(self._design, self._state)
+
     def product(self, in_vec, out_vec):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             if isinstance(out_vec, CompositeDualVector):
-                dCEQdX(self._design, self._state).product(
-                    in_vec, out_vec.eq)
-                dCINdX(self._design, self._state).product(
-                    in_vec, out_vec.ineq)
+                self._eq_mat.product(in_vec, out_vec.eq)
+                self._ineq_mat.product(in_vec, out_vec.ineq)
             elif isinstance(out_vec, DualVectorEQ):
-                dCEQdX(self._design, self._state).product(
-                    in_vec, out_vec)
+                self._eq_mat.product(in_vec, out_vec)
             elif isinstance(out_vec, DualVectorINEQ):
-                dCINdX(self._design, self._state).product(
-                    in_vec, out_vec)
+                self._ineq_mat.product(in_vec, out_vec)
             else:
                 raise AssertionError(
                     "Invalid output vector: " +
@@ -344,12 +604,11 @@ class dCdX(KonaMatrix):
                 out_design.base.data[:] += self._solver.multiply_dCINdX_T(
                     self._design.base.data, self._state.base,
                     in_vec.ineq.base.data)
+                out_design.touch()
             elif isinstance(in_vec, DualVectorEQ):
-                dCEQdX(self._design, self._state).T.product(
-                    in_vec, out_vec)
+                self._eq_mat.product(in_vec, out_vec)
             elif isinstance(in_vec, DualVectorINEQ):
-                dCINdX(self._design, self._state).T.product(
-                    in_vec, out_vec)
+                self._ineq_mat.product(in_vec, out_vec)
             else:
                 raise AssertionError(
                     "Invalid multiplying vector: " +
@@ -362,20 +621,26 @@ class dCdU(KonaMatrix):
     Combined partial constraint jacobian matrix that can do both equality and
     inequality products depending on what input vectors are provided.
     """
+    def __init__(self, primal=None, state=None, transposed=False):
+        self._eq_mat = dCEQdU(transposed=transposed)
+        self._ineq_mat = dCINdU(transposed=transposed)
+        super(dCdU, self).__init__(primal, state, transposed)
+
+    def linearize(self, primal, state):
+        super(dCdU, self).linearize(primal, state)
+        self._eq_mat.linearize(self._design, self._state)
+        self._ineq_mat.linearize(self._design, self._state)
+
     def product(self, in_vec, out_vec, state_work=None):
-        assert self._linearized
+        self._activate()
         if not self._transposed:
             if isinstance(out_vec, CompositeDualVector):
-                dCEQdU(self._design, self._state).product(
-                    in_vec, out_vec.eq)
-                dCINdU(self._design, self._state).product(
-                    in_vec, out_vec.ineq)
+                self._eq_mat.product(in_vec, out_vec.eq)
+                self._ineq_mat.product(in_vec, out_vec.ineq)
             elif isinstance(out_vec, DualVectorEQ):
-                dCEQdU(self._design, self._state).product(
-                    in_vec, out_vec)
+                self._eq_mat.product(in_vec, out_vec)
             elif isinstance(out_vec, DualVectorINEQ):
-                dCINdU(self._design, self._state).product(
-                    in_vec, out_vec)
+                self._ineq_mat.product(in_vec, out_vec)
             else:
                 raise AssertionError(
                     "Invalid output vector: " +
@@ -386,17 +651,13 @@ class dCdU(KonaMatrix):
             if isinstance(in_vec, CompositeDualVector):
                 assert isinstance(state_work, StateVector), \
                     "Invalid work vector: must be StateVector!"
-                dCEQdU(self._design, self._state).T.product(
-                    in_vec.eq, out_vec)
-                dCINdU(self._design, self._state).T.product(
-                    in_vec.ineq, state_work)
+                self._eq_mat.product(in_vec.eq, out_vec)
+                self._ineq_mat.product(in_vec.ineq, state_work)
                 out_vec.plus(state_work)
             elif isinstance(in_vec, DualVectorEQ):
-                dCEQdU(self._design, self._state).T.product(
-                    in_vec, out_vec)
+                self._eq_mat.product(in_vec, out_vec)
             elif isinstance(in_vec, DualVectorINEQ):
-                dCINdU(self._design, self._state).T.product(
-                    in_vec, out_vec)
+                self._ineq_mat.product(in_vec, out_vec)
             else:
                 raise AssertionError(
                     "Invalid input vector: " +
@@ -2,6 +2,7 @@ import basic
 
 from lbfgs import LimitedMemoryBFGS
 from lsr1 import LimitedMemorySR1
+from curvature_store import CurvatureStore
 
 from reduced_hessian import ReducedHessian
 from reduced_kkt import ReducedKKTMatrix
@@ -16,15 +16,26 @@ class AugmentedKKTMatrix(BaseHessian):
         \\end{bmatrix}
 
     This matrix is used to solve the normal-step in a composite-step algorithm.
+    The system is solved with GCROT by default, or FGMRES if ``use_gcrot`` is
+    False. The ``krylov_solver`` option selects another ``'linear'`` Krylov
+    solver, by class or by registered name.
     """
     def __init__(self, vector_factories, optns=None):
         super(AugmentedKKTMatrix, self).__init__(vector_factories, optns)
 
         # decide which krylov solver we use
         self.use_gcrot = get_opt(self.optns, True, 'use_gcrot')
+        if self.use_gcrot:
+            krylov_solver = get_opt(self.optns, GCROT, 'krylov_solver')
+        else:
+            krylov_solver = get_opt(self.optns, FGMRES, 'krylov_solver')
+        if isinstance(krylov_solver, str):
+            krylov_solver = get_krylov_solver(krylov_solver, 'linear')
+        self.use_gcrot = issubclass(krylov_solver, GCROT)
 
         # initialize the constraint jacobian
-        self.A = TotalConstraintJacobian(vector_factories)
+        self.A = TotalConstraintJacobian(
+            vector_factories, {'explicit' : self.explicit})
 
         # get preconditioner options
         self.precond = get_opt(self.optns, None, 'precond')
@@ -49,7 +60,7 @@ class AugmentedKKTMatrix(BaseHessian):
                 'rel_tol' : get_opt(self.optns, 1e-3, 'rel_tol'),
                 'abs_tol' : get_opt(self.optns, 1e-5, 'abs_tol')
             }
-            self.krylov = GCROT(
+            self.krylov = krylov_solver(
                 self.primal_factory,
                 optns=krylov_optns,
                 eq_factory=self.eq_factory,
@@ -63,7 +74,7 @@ class AugmentedKKTMatrix(BaseHessian):
                 'rel_tol' : get_opt(self.optns, 1e-3, 'rel_tol'),
                 'abs_tol' : get_opt(self.optns, 1e-5, 'abs_tol')
             }
-            self.krylov = FGMRES(
+            self.krylov = krylov_solver(
                 self.primal_factory,
                 optns=krylov_optns,
                 eq_factory=self.eq_factory,
@@ -156,4 +167,4 @@ from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.linalg.matrices.hessian import TotalConstraintJacobian
-from kona.linalg.solvers.krylov import GCROT, FGMRES
\ No newline at end of file
+from kona.linalg.solvers.krylov import GCROT, FGMRES, get_krylov_solver
\ No newline at end of file
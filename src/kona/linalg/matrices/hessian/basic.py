@@ -1,4 +1,28 @@
 
+def _flatten(vec):
+    # gather the data of a (possibly composite) vector into one array
+    if hasattr(vec, '_vectors'):
+        return numpy.concatenate([_flatten(v) for v in vec._vectors])
+    return numpy.array(vec.base.data, dtype=float)
+
+def _unflatten(data, vec):
+    # scatter an array produced by _flatten() back into the vector
+    if hasattr(vec, '_vectors'):
+        start = 0
+        for v in vec._vectors:
+            size = _size(v)
+            _unflatten(data[start:start + size], v)
+            start += size
+    else:
+        vec.base.data[:] = data
+        vec.touch()
+
+def _size(vec):
+    # number of entries gathered by _flatten()
+    if hasattr(vec, '_vectors'):
+        return sum(_size(v) for v in vec._vectors)
+    return vec.base.data.size
+
 class BaseHessian(object):
     """
     Abstract matrix object that defines the Hessian of an optimization problem.
@@ -15,6 +39,30 @@ class BaseHessian(object):
         Generator for arbitrary KonaVector types.
     out_file : file
         File stream for data output.
+    dynamic_tol : boolean
+        If True, the linear solves inside the products are relaxed to the
+        accuracy requested by the Krylov solver through ``set_product_tol()``.
+    nu : float
+        Safety factor applied to the requested product accuracy.
+    explicit : boolean or str
+        If True, the dense matrix is assembled with one matrix-free product
+        per column (or row) at every linearization, and the products become
+        dense matrix-vector multiplications. If 'auto', the matrix is
+        assembled only when that takes fewer products than were requested
+        during the previous linearization. Dense products count towards that
+        demand, so the assembly is kept for as long as it pays off.
+    dense : numpy.ndarray or None
+        Dense matrix at the current linearization, if it was assembled.
+    num_products : int
+        Exact products requested since the last linearization, whether they
+        were matrix-free or dense.
+    curvature : CurvatureStore or None
+        Store that records the exact Hessian-vector products, if attached.
+    fd_scheme : str
+        Finite-difference scheme of the 2nd order adjoint products:
+        ``'forward'`` or ``'central'``. The perturbations are scaled to the
+        linearization point by ``calc_epsilon()``. Central differences are
+        second-order accurate, and cost twice the gradient evaluations.
     """
     def __init__(self, vector_factory, optns=None):
         # get options dict
@@ -33,6 +81,24 @@ class BaseHessian(object):
                 _memory = vector_factory[0]._memory
             self.out_file = _memory.open_file(self.out_file)
 
+        # get inexact product options
+        self.dynamic_tol = get_opt(self.optns, False, 'dynamic_tol')
+        self.nu = get_opt(self.optns, 0.95, 'nu')
+        self.krylov_tol = None
+
+        # get explicit assembly options
+        self.explicit = get_opt(self.optns, False, 'explicit')
+        if self.explicit not in [True, False, 'auto']:
+            raise ValueError("explicit must be True, False or 'auto'")
+        self.dense = None
+        self.num_products = 0
+        self.curvature = None
+
+        # get finite-difference options
+        self.fd_scheme = get_opt(self.optns, 'forward', 'fd_scheme')
+        if self.fd_scheme not in ['forward', 'central']:
+            raise ValueError("fd_scheme must be 'forward' or 'central'")
+
         # get references to individual factories
         self.vec_fac = vector_factory
         self.primal_factory = None
@@ -53,6 +119,137 @@ class BaseHessian(object):
                     else:
                         raise TypeError('Invalid vector factory!')
 
+    def set_product_tol(self, tol):
+        """
+        Sets the relative accuracy that the Krylov solver needs from the next
+        products. The request is ignored unless ``dynamic_tol`` is True.
+
+        Parameters
+        ----------
+        tol : float or None
+            Relative product tolerance. ``None`` restores the fixed
+            tolerances.
+        """
+        if self.dynamic_tol:
+            self.krylov_tol = tol
+
+    def _solve_tol(self, rel_tol):
+        """
+        Relaxes the relative tolerance of a linear solve inside a product to
+        the accuracy requested through ``set_product_tol()``, if any.
+
+        Parameters
+        ----------
+        rel_tol : float
+            Fixed relative tolerance of the solve.
+
+        Returns
+        -------
+        float
+            Relative tolerance to be used for the solve.
+        """
+        if self.krylov_tol is None:
+            return rel_tol
+        return max(rel_tol, self.nu*self.krylov_tol)
+
+    def set_curvature_store(self, store):
+        """
+        Attaches a store that keeps the Hessian-vector products of this
+        matrix across linearizations.
+
+        Parameters
+        ----------
+        store : CurvatureStore
+        """
+        if isinstance(store, CurvatureStore):
+            self.curvature = store
+        else:
+            raise TypeError('Object is not a valid CurvatureStore')
+
+    def _fd_epsilon(self, eval_at_norm, mult_by_norm):
+        # perturbation size for the finite-difference scheme
+        return calc_epsilon(eval_at_norm, mult_by_norm, self.fd_scheme)
+
+    def _fd_derivative(self, evaluate, epsilon, base, out_vec, work):
+        """
+        Computes a directional derivative with the finite-difference scheme.
+
+        Parameters
+        ----------
+        evaluate : function
+            ``evaluate(step, result)`` stores in ``result`` the function at
+            the linearization point perturbed by ``step`` along the direction.
+        epsilon : float
+            Perturbation size.
+        base : KonaVector
+            Function at the linearization point; used by forward differences.
+        out_vec : KonaVector
+            Vector that stores the derivative.
+        work : KonaVector
+            Work vector; used by central differences.
+        """
+        evaluate(epsilon, out_vec)
+        if self.fd_scheme == 'central':
+            evaluate(-epsilon, work)
+            out_vec.equals_ax_p_by(0.5/epsilon, out_vec, -0.5/epsilon, work)
+        else:
+            out_vec.equals_ax_p_by(1./epsilon, out_vec, -1./epsilon, base)
+
+    def _use_explicit(self, assembly_cost):
+        """
+        Decides whether the dense matrix is assembled at the current
+        linearization, and resets the product counter.
+
+        Parameters
+        ----------
+        assembly_cost : int
+            Number of matrix-free products needed to assemble the matrix.
+
+        Returns
+        -------
+        boolean
+            True if the matrix should be assembled.
+        """
+        if self.explicit == 'auto':
+            use = assembly_cost < self.num_products
+        else:
+            use = self.explicit
+        self.num_products = 0
+        return use
+
+    def _assemble_dense(self, product, in_vec, out_vec):
+        """
+        Assembles a dense matrix column by column, by applying a matrix-free
+        product to the unit vectors.
+
+        Parameters
+        ----------
+        product : function
+            Matrix-free product.
+        in_vec : KonaVector
+            Work vector in the domain of the product.
+        out_vec : KonaVector
+            Work vector in the range of the product.
+
+        Returns
+        -------
+        numpy.ndarray
+            The dense matrix.
+        """
+        unit = numpy.zeros(_size(in_vec))
+        dense = numpy.zeros((_size(out_vec), unit.size))
+        for j in xrange(unit.size):
+            unit[j] = 1.0
+            _unflatten(unit, in_vec)
+            product(in_vec, out_vec)
+            dense[:, j] = _flatten(out_vec)
+            unit[j] = 0.0
+        return dense
+
+    def _dense_product(self, dense, in_vec, out_vec):
+        # multiply with an assembled matrix
+        _unflatten(dense.dot(_flatten(in_vec)), out_vec)
+
     def product(self, in_vec, out_vec):
         """
         Applies the Hessian itself to the input vector.
@@ -84,6 +281,11 @@ class BaseHessian(object):
 class QuasiNewtonApprox(BaseHessian):
     """ Base class for quasi-Newton approximations of the Hessian
 
+    The corrections are stored in a ring buffer of vectors that is allocated
+    at the first correction, and the inner products among them are updated
+    incrementally, so that the compact representations of the derived
+    classes need no vector allocations and no repeated reductions.
+
     Attributes
     ----------
     max_stored : int
@@ -96,18 +298,47 @@ class QuasiNewtonApprox(BaseHessian):
         Difference between subsequent solutions: :math:`s_k = x_{k+1} - x_k`
     y_list : list of KonaVector
         Difference between subsequent gradients: :math:`y_k = g_{k+1} - g_k`
+    num_stored : int
+        Number of corrections currently stored.
+    StY : numpy.ndarray
+        Inner products :math:`s_i^Ty_j` of the stored corrections, indexed by
+        their slot in the ring buffer.
+    StS : numpy.ndarray
+        Inner products :math:`s_i^Ts_j`, indexed like ``StY``.
+    YtY : numpy.ndarray
+        Inner products :math:`y_i^Ty_j`, indexed like ``StY``.
     """
 
     def __init__(self, vector_factory, optns={}):
         assert isinstance(vector_factory, VectorFactory), \
             "LimitedMemoryBFGS() >> Invalid vector factory!"
         super(QuasiNewtonApprox, self).__init__(vector_factory, optns)
-        self.max_stored = get_opt(optns, 10, 'max_stored')
+        self.max_stored = get_opt(self.optns, 10, 'max_stored')
 
         self.norm_init = 1.0
+        self.init_hessian = None
         self.s_list = []
         self.y_list = []
 
+        # ring buffer of corrections; slot _first holds the oldest one
+        self.num_stored = 0
+        self._first = 0
+        self._S = []
+        self._Y = []
+        m = self.max_stored
+        self.StY = numpy.zeros((m, m))
+        self.StS = numpy.zeros((m, m))
+        self.YtY = numpy.zeros((m, m))
+
+        # work vectors for a diagonal initial Hessian, and cached products
+        self._work = None
+        self._init_inv = None
+        self._inv_version = None
+        self._num_updates = 0
+        self._gram_cache = {}
+
+        vector_factory.request_num_vectors(2*self.max_stored + 2)
+
     def add_correction(self, s_new, y_new):
         """
         Adds a new correction to the Hessian approximation.
@@ -121,9 +352,124 @@ class QuasiNewtonApprox(BaseHessian):
         """
         raise NotImplementedError # pragma: no cover
 
+    def _order(self):
+        # ring-buffer slots of the stored corrections, oldest first
+        return [(self._first + k) % self.max_stored
+                for k in xrange(self.num_stored)]
+
+    def _correction_inners(self, s_in, y_in):
+        """
+        Computes the inner products of a new correction with the stored
+        corrections and with itself, using two fused reductions.
+
+        Returns
+        -------
+        s_prods : numpy.ndarray
+            :math:`s^Ts_i`, then :math:`s^Ty_i`, then :math:`s^Ts, s^Ty`.
+        y_prods : numpy.ndarray
+            :math:`y^Ts_i`, then :math:`y^Ty_i`, then :math:`y^Ty`.
+        """
+        stored = self.s_list + self.y_list
+        s_prods = s_in.multi_inner(stored + [s_in, y_in])
+        y_prods = y_in.multi_inner(stored + [y_in])
+        return s_prods, y_prods
+
+    def _store_correction(self, s_in, y_in, s_prods, y_prods):
+        """
+        Copies a correction into the ring buffer, overwriting the oldest one
+        if the buffer is full, and updates the inner products with the
+        results of ``_correction_inners()``.
+        """
+        # allocate the ring buffer at the first correction
+        if len(self._S) == 0:
+            self._S = [self.vec_fac.generate() for k in xrange(self.max_stored)]
+            self._Y = [self.vec_fac.generate() for k in xrange(self.max_stored)]
+
+        n = self.num_stored
+        idx = self._order()
+        if n < self.max_stored:
+            slot = (self._first + n) % self.max_stored
+            self.num_stored += 1
+        else:
+            slot = self._first
+            self._first = (self._first + 1) % self.max_stored
+        self._S[slot].equals(s_in)
+        self._Y[slot].equals(y_in)
+
+        # if the oldest correction was dropped, its entries are overwritten
+        # by the products of the new correction with itself
+        self.StS[slot, idx] = self.StS[idx, slot] = s_prods[:n]
+        self.StY[slot, idx] = s_prods[n:2*n]
+        self.StY[idx, slot] = y_prods[:n]
+        self.YtY[slot, idx] = self.YtY[idx, slot] = y_prods[n:2*n]
+        self.StS[slot, slot] = s_prods[2*n]
+        self.StY[slot, slot] = s_prods[2*n + 1]
+        self.YtY[slot, slot] = y_prods[2*n]
+
+        idx = self._order()
+        self.s_list = [self._S[k] for k in idx]
+        self.y_list = [self._Y[k] for k in idx]
+        self._num_updates += 1
+
+    def _gram(self, gram):
+        # stored inner products in chronological order
+        idx = self._order()
+        return gram[numpy.ix_(idx, idx)]
+
+    def _init_scale(self):
+        # scalar initial Hessian
+        return self.norm_init
+
+    def _allocate_work(self):
+        if self.init_hessian is not None and self._work is None:
+            self._work = self.vec_fac.generate()
+            self._init_inv = self.vec_fac.generate()
+
+    def _apply_init(self, vec, inverse=False):
+        # multiply vec in place with the initial Hessian, or its inverse
+        if self.init_hessian is None:
+            if inverse:
+                vec.divide_by(self._init_scale())
+            else:
+                vec.times(self._init_scale())
+        elif inverse:
+            if self._inv_version != self.init_hessian.version:
+                self._init_inv.equals(self.init_hessian)
+                self._init_inv.pow(-1.)
+                self._inv_version = self.init_hessian.version
+            vec.times(self._init_inv)
+        else:
+            vec.times(self.init_hessian)
+
+    def _weighted_gram(self, inverse):
+        """
+        Inner products :math:`S^TB_0S`, or :math:`Y^TH_0Y` if inverse is
+        True, with the initial Hessian :math:`B_0 = H_0^{-1}`.
+
+        For a diagonal ``init_hessian``, they are cached until the
+        corrections or the diagonal change.
+        """
+        if self.init_hessian is None:
+            if inverse:
+                return self._gram(self.YtY)/self._init_scale()
+            return self._gram(self.StS)*self._init_scale()
+        key = (inverse, self._num_updates, self.init_hessian.version)
+        if key not in self._gram_cache:
+            vectors = self.y_list if inverse else self.s_list
+            gram = numpy.zeros((self.num_stored, self.num_stored))
+            for k in xrange(self.num_stored):
+                self._work.equals(vectors[k])
+                self._apply_init(self._work, inverse)
+                gram[k, :] = self._work.multi_inner(vectors)
+            self._gram_cache = {key : 0.5*(gram + gram.T)}
+        return self._gram_cache[key]
+
 # imports at the bottom to prevent circular import errors
 import sys
+import numpy
 from kona.options import get_opt
 from kona.linalg.memory import VectorFactory
+from kona.linalg.solvers.util import calc_epsilon
+from kona.linalg.matrices.hessian.curvature_store import CurvatureStore
 from kona.linalg.vectors.common import DesignVector, StateVector
 from kona.linalg.vectors.common import DualVectorEQ, DualVectorINEQ
\ No newline at end of file
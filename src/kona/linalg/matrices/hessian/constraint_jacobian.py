@@ -8,6 +8,12 @@ class TotalConstraintJacobian(BaseHessian):
     for the off-diagonal total contraint jacobian blocks,
     :math:`\mathsf{A} = \\nabla_x C`.
 
+    With the ``explicit`` option, the dense Jacobian is assembled at every
+    linearization, using forward solves column by column when there are
+    fewer design variables than constraints, and adjoint solves row by row
+    otherwise. The products are then dense matrix-vector multiplications,
+    including the approximate ones.
+
     Parameters
     ----------
     T : TotalConstraintJacobian
@@ -15,8 +21,8 @@ class TotalConstraintJacobian(BaseHessian):
     approx : TotalConstraintJacobian
         Approximate/inexact matrix.
     """
-    def __init__(self, vector_factories):
-        super(TotalConstraintJacobian, self).__init__(vector_factories, None)
+    def __init__(self, vector_factories, optns=None):
+        super(TotalConstraintJacobian, self).__init__(vector_factories, optns)
 
         # request vector allocation
         self.primal_factory.request_num_vectors(1)
@@ -25,6 +31,12 @@ class TotalConstraintJacobian(BaseHessian):
             self.eq_factory.request_num_vectors(1)
         if self.ineq_factory is not None:
             self.ineq_factory.request_num_vectors(1)
+        if self.explicit:
+            self.primal_factory.request_num_vectors(1)
+            if self.eq_factory is not None:
+                self.eq_factory.request_num_vectors(1)
+            if self.ineq_factory is not None:
+                self.ineq_factory.request_num_vectors(1)
 
         # set misc flags
         self._approx = False
@@ -55,63 +67,95 @@ class TotalConstraintJacobian(BaseHessian):
             self.design_work = self.primal_factory.generate()
             self.state_work = self.state_factory.generate()
             self.adjoint_work = self.state_factory.generate()
-            self.dual_work = None
-            if self.eq_factory is not None and self.ineq_factory is not None:
-                self.dual_work = CompositeDualVector(
-                    self.eq_factory.generate(), self.ineq_factory.generate())
-            elif self.eq_factory is not None:
-                self.dual_work = self.eq_factory.generate()
-            elif self.ineq_factory is not None:
-                self.dual_work = self.ineq_factory.generate()
-            else:
-                raise RuntimeError(
-                    "TotalConstraintJacobian >> " +
-                    "Must have at least one type of dual vector factory!")
+            self.dual_work = self._generate_dual()
+            if self.explicit:
+                self.design_unit = self.primal_factory.generate()
+                self.dual_unit = self._generate_dual()
             self._allocated = True
 
+        # assemble the dense Jacobian with the cheaper of forward and adjoint
+        # solves, if it costs fewer products than the last linearization used
+        num_design = self.primal_factory._memory.ndv
+        num_dual = _size(self.dual_work)
+        self.dense = None
+        if self._use_explicit(min(num_design, num_dual)):
+            if num_design <= num_dual:
+                self.dense = self._assemble_dense(
+                    self._forward_product, self.design_unit, self.dual_unit)
+            else:
+                self.dense = self._assemble_dense(
+                    self._reverse_product, self.dual_unit, self.design_unit).T
+
+    def _generate_dual(self):
+        if self.eq_factory is not None and self.ineq_factory is not None:
+            return CompositeDualVector(
+                self.eq_factory.generate(), self.ineq_factory.generate())
+        elif self.eq_factory is not None:
+            return self.eq_factory.generate()
+        elif self.ineq_factory is not None:
+            return self.ineq_factory.generate()
+        else:
+            raise RuntimeError(
+                "TotalConstraintJacobian >> " +
+                "Must have at least one type of dual vector factory!")
+
+    def _forward_product(self, in_vec, out_vec):
+        # assemble the RHS for the linear system
+        dRdX(self.at_design, self.at_state).product(
+            in_vec, self.state_work)
+        self.state_work.times(-1.)
+        # approximately solve the linear system
+        if self._approx:
+            dRdU(self.at_design, self.at_state).precond(
+                self.state_work, self.adjoint_work)
+        else:
+            rel_tol = self.product_tol/max(self.state_work.norm2, EPS)
+            dRdU(self.at_design, self.at_state).solve(
+                self.state_work, self.adjoint_work, rel_tol=rel_tol)
+        # assemble the product
+        dCdX(self.at_design, self.at_state).product(
+            in_vec, out_vec)
+        out_vec.times(self.scale)
+        dCdU(self.at_design, self.at_state).product(
+            self.adjoint_work, self.dual_work)
+        self.dual_work.times(self.scale)
+        out_vec.plus(self.dual_work)
+
+    def _reverse_product(self, in_vec, out_vec):
+        # assemble the RHS for the adjoint system
+        dCdU(self.at_design, self.at_state).T.product(
+            in_vec, self.state_work)
+        self.state_work.times(self.scale)
+        self.state_work.times(-1.)
+        # approximately solve the linear system
+        if self._approx:
+            dRdU(self.at_design, self.at_state).T.precond(
+                self.state_work, self.adjoint_work)
+        else:
+            rel_tol = self.product_tol/max(self.state_work.norm2, EPS)
+            dRdU(self.at_design, self.at_state).T.solve(
+                self.state_work, self.adjoint_work, rel_tol=rel_tol)
+        # assemble the final product
+        dCdX(self.at_design, self.at_state).T.product(
+            in_vec, out_vec)
+        out_vec.times(self.scale)
+        dRdX(self.at_design, self.at_state).T.product(
+            self.adjoint_work, self.design_work)
+        out_vec.plus(self.design_work)
+
     def product(self, in_vec, out_vec):
-        if not self._transposed:
-            # assemble the RHS for the linear system
-            dRdX(self.at_design, self.at_state).product(
-                in_vec, self.state_work)
-            self.state_work.times(-1.)
-            # approximately solve the linear system
-            if self._approx:
-                dRdU(self.at_design, self.at_state).precond(
-                    self.state_work, self.adjoint_work)
+        if not self._approx:
+            self.num_products += 1
+        if self.dense is not None:
+            if not self._transposed:
+                self._dense_product(self.dense, in_vec, out_vec)
             else:
-                rel_tol = self.product_tol/max(self.state_work.norm2, EPS)
-                dRdU(self.at_design, self.at_state).solve(
-                    self.state_work, self.adjoint_work, rel_tol=rel_tol)
-            # assemble the product
-            dCdX(self.at_design, self.at_state).product(
-                in_vec, out_vec)
-            out_vec.times(self.scale)
-            dCdU(self.at_design, self.at_state).product(
-                self.adjoint_work, self.dual_work)
-            self.dual_work.times(self.scale)
-            out_vec.plus(self.dual_work)
+                self._dense_product(self.dense.T, in_vec, out_vec)
         else:
-            # assemble the RHS for the adjoint system
-            dCdU(self.at_design, self.at_state).T.product(
-                in_vec, self.state_work)
-            self.state_work.times(self.scale)
-            self.state_work.times(-1.)
-            # approximately solve the linear system
-            if self._approx:
-                dRdU(self.at_design, self.at_state).T.precond(
-                    self.state_work, self.adjoint_work)
+            if not self._transposed:
+                self._forward_product(in_vec, out_vec)
             else:
-                rel_tol = self.product_tol/max(self.state_work.norm2, EPS)
-                dRdU(self.at_design, self.at_state).T.solve(
-                    self.state_work, self.adjoint_work, rel_tol=rel_tol)
-            # assemble the final product
-            dCdX(self.at_design, self.at_state).T.product(
-                in_vec, out_vec)
-            out_vec.times(self.scale)
-            dRdX(self.at_design, self.at_state).T.product(
-                self.adjoint_work, self.design_work)
-            out_vec.plus(self.design_work)
+                self._reverse_product(in_vec, out_vec)
 
         # reset the approx and transpose flags at the end
         self._approx = False
@@ -119,6 +163,7 @@ class TotalConstraintJacobian(BaseHessian):
 
 # imports here to prevent circular errors
 from kona.options import get_opt
+from kona.linalg.matrices.hessian.basic import _size
 from kona.linalg.vectors.common import DesignVector, StateVector
 from kona.linalg.vectors.common import DualVectorEQ, DualVectorINEQ
 from kona.linalg.vectors.composite import CompositeDualVector
@@ -0,0 +1,193 @@
+class CurvatureStore(object):
+    """
+    Persistent store of the Hessian-vector products computed by the reduced
+    matrices, kept across linearizations so that the curvature information
+    they contain is not thrown away at the next Newton iteration.
+
+    Matrices with a store attached (see ``set_curvature_store()``) record
+    the design part of their exact products, and move the store to every new
+    linearization point with ``set_point()``. The distance of each pair from
+    the current point is bounded by the length of the path travelled since
+    the pair was recorded; pairs farther than ``max_distance``, relative to
+    the norm of the current point, are dropped. Matrices whose Hessian also
+    depends on the Lagrange multipliers add the multiplier step to the path.
+    Their products are recorded for the design direction alone, without the
+    coupling with the dual part of the input.
+
+    The stored pairs can seed a quasi-Newton approximation, or provide an
+    initial guess for the next Krylov solve.
+
+    Parameters
+    ----------
+    vector_factory : VectorFactory
+        Factory for DesignVector objects.
+    optns : dict, optional
+        Options dictionary.
+
+    Attributes
+    ----------
+    max_stored : int
+        Maximum number of pairs stored; the oldest ones are overwritten.
+    max_distance : float
+        Relative distance beyond which pairs are stale.
+    num_stored : int
+        Number of pairs currently stored.
+    distance : numpy.ndarray
+        Distance bounds of the stored pairs, indexed by ring-buffer slot.
+    """
+    def __init__(self, vector_factory, optns=None):
+        if optns is None:
+            self.optns = {}
+        else:
+            assert type(optns) is dict, "Invalid options! Must be a dictionary."
+            self.optns = optns
+
+        self.max_stored = get_opt(self.optns, 10, 'max_stored')
+        self.max_distance = get_opt(self.optns, 0.1, 'max_distance')
+        if self.max_stored < 1:
+            raise ValueError('max_stored must be greater than zero')
+
+        # ring buffer of pairs; slot _first holds the oldest one
+        self.vec_fac = vector_factory
+        self.num_stored = 0
+        self._first = 0
+        self._in = []
+        self._out = []
+        self.distance = numpy.zeros(self.max_stored)
+        self._out_gram = numpy.zeros((self.max_stored, self.max_stored))
+
+        # current linearization point and a work vector
+        self._point = None
+        self._work = None
+
+        self.vec_fac.request_num_vectors(2*self.max_stored + 2)
+
+    def _order(self):
+        # ring-buffer slots of the stored pairs, oldest first
+        return [(self._first + k) % self.max_stored
+                for k in xrange(self.num_stored)]
+
+    def _allocate(self):
+        if self._point is None:
+            self._point = self.vec_fac.generate()
+            self._work = self.vec_fac.generate()
+            self._in = [self.vec_fac.generate()
+                        for k in xrange(self.max_stored)]
+            self._out = [self.vec_fac.generate()
+                         for k in xrange(self.max_stored)]
+            return True
+        return False
+
+    def set_point(self, at_design, dual_step=0.0):
+        """
+        Moves the store to a new linearization point, and drops the pairs
+        that are now stale.
+
+        Parameters
+        ----------
+        at_design : DesignVector
+            New linearization point.
+        dual_step : float, optional
+            Norm of the change in the Lagrange multipliers since the previous
+            linearization point.
+        """
+        if self._allocate():
+            self._point.equals(at_design)
+            return
+        self._work.equals_ax_p_by(1.0, at_design, -1.0, self._point)
+        step = numpy.sqrt(self._work.norm2**2 + dual_step**2)
+        if step == 0.0:
+            return
+        self._point.equals(at_design)
+        self.distance += step
+
+        # distances decrease from the oldest pair to the newest
+        limit = self.max_distance*max(at_design.norm2, 1.0)
+        while self.num_stored > 0 and self.distance[self._first] > limit:
+            self._first = (self._first + 1) % self.max_stored
+            self.num_stored -= 1
+
+    def add(self, in_vec, out_vec):
+        """
+        Records a Hessian-vector product at the current linearization point,
+        overwriting the oldest pair if the store is full.
+
+        Parameters
+        ----------
+        in_vec : DesignVector
+            Vector that was multiplied with the Hessian.
+        out_vec : DesignVector
+            Result of the product.
+        """
+        if self._point is None:
+            raise RuntimeError(
+                'CurvatureStore.add() >> linearization point is not set!')
+        if self.num_stored < self.max_stored:
+            slot = (self._first + self.num_stored) % self.max_stored
+            self.num_stored += 1
+        else:
+            slot = self._first
+            self._first = (self._first + 1) % self.max_stored
+        self._in[slot].equals(in_vec)
+        self._out[slot].equals(out_vec)
+        self.distance[slot] = 0.0
+
+        # update the Gram matrix of the products
+        idx = self._order()
+        prods = self._out[slot].multi_inner([self._out[k] for k in idx])
+        self._out_gram[slot, idx] = self._out_gram[idx, slot] = prods
+
+    def pairs(self):
+        """
+        Returns
+        -------
+        list of tuple
+            The stored ``(in_vec, out_vec, distance)`` triplets, oldest first.
+        """
+        return [(self._in[k], self._out[k], self.distance[k])
+                for k in self._order()]
+
+    def seed(self, quasi_newton):
+        """
+        Adds the stored pairs to a quasi-Newton approximation as
+        corrections, oldest first.
+
+        Parameters
+        ----------
+        quasi_newton : QuasiNewtonApprox
+            Approximation to be updated.
+        """
+        for in_vec, out_vec, distance in self.pairs():
+            quasi_newton.add_correction(in_vec, out_vec)
+
+    def initial_guess(self, rhs, solution):
+        """
+        Sets the solution to the combination of stored input vectors whose
+        stored products best approximate the right-hand side, in the
+        least-squares sense. This needs one block inner product.
+
+        Parameters
+        ----------
+        rhs : DesignVector
+            Right-hand side of the Hessian system.
+        solution : DesignVector
+            On exit, the initial guess; zero if the store is empty.
+        """
+        solution.equals(0.0)
+        if self.num_stored == 0:
+            return
+        idx = self._order()
+        gram = self._out_gram[numpy.ix_(idx, idx)]
+        prods = rhs.multi_inner([self._out[k] for k in idx] + [rhs])
+        coeffs = numpy.linalg.lstsq(gram, prods[:-1], rcond=-1)[0]
+
+        # the pairs come from nearby points, so only use the guess if the
+        # stored products predict a smaller residual than a zero guess
+        res2 = prods[-1] - 2.0*coeffs.dot(prods[:-1]) + \
+            coeffs.dot(gram.dot(coeffs))
+        if res2 < prods[-1]:
+            solution.multi_axpy(coeffs, [self._in[k] for k in idx])
+
+# imports here to prevent circular errors
+import numpy
+from kona.options import get_opt
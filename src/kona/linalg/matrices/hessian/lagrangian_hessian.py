@@ -10,6 +10,15 @@ class LagrangianHessian(BaseHessian):
 
     If slack terms are present, it will also perform a product with the slack
     derivative of the Lagrangian.
+
+    With the ``explicit`` option, the dense design block of the Hessian is
+    assembled from one product per design variable at every linearization,
+    and ``multiply_W()`` becomes a dense matrix-vector multiplication,
+    including the approximate products.
+
+    The tangent system is solved with STCG, or with another
+    ``'projected_trust_region'`` Krylov solver selected by class or by
+    registered name with the ``krylov_solver`` option.
     """
     def __init__(self, vector_factories, optns=None):
         super(LagrangianHessian, self).__init__(vector_factories, optns)
@@ -18,7 +27,14 @@ class LagrangianHessian(BaseHessian):
         self.primal_factory.request_num_vectors(3)
         self.state_factory.request_num_vectors(6)
         if self.eq_factory is not None:
-            self.eq_factory.request_num_vectors(4)
+            self.eq_factory.request_num_vectors(5)
+        if self.ineq_factory is not None:
+            self.ineq_factory.request_num_vectors(1)
+        if self.explicit:
+            self.primal_factory.request_num_vectors(2)
+        if self.fd_scheme == 'central':
+            self.primal_factory.request_num_vectors(1)
+            self.state_factory.request_num_vectors(1)
 
         # set misc flags
         self._approx = False
@@ -36,7 +52,11 @@ class LagrangianHessian(BaseHessian):
             'check_res' : get_opt(self.optns, True, 'check_res'),
             'rel_tol'  : get_opt(self.optns, 1e-3, 'rel_tol'),
         }
-        self.krylov = STCG(
+        krylov_solver = get_opt(self.optns, STCG, 'krylov_solver')
+        if isinstance(krylov_solver, str):
+            krylov_solver = get_krylov_solver(
+                krylov_solver, 'projected_trust_region')
+        self.krylov = krylov_solver(
             self.primal_factory,
             optns=krylov_optns,
             dual_factory=self.ineq_factory)
@@ -83,22 +103,37 @@ class LagrangianHessian(BaseHessian):
                     self.eq_factory.generate(), self.ineq_factory.generate())
                 self.dual_work = CompositeDualVector(
                     self.eq_factory.generate(), self.ineq_factory.generate())
+                self.last_dual = CompositeDualVector(
+                    self.eq_factory.generate(), self.ineq_factory.generate())
                 self.slack_term = self.ineq_factory.generate()
             elif self.eq_factory is not None:
                 self.dual_in = self.eq_factory.generate()
                 self.dual_out = self.eq_factory.generate()
                 self.dual_work = self.eq_factory.generate()
+                self.last_dual = self.eq_factory.generate()
                 self.slack_term = None
             elif self.ineq_factory is not None:
                 self.dual_in = self.ineq_factory.generate()
                 self.dual_out = self.ineq_factory.generate()
                 self.dual_work = self.ineq_factory.generate()
+                self.last_dual = self.ineq_factory.generate()
                 self.slack_term = self.ineq_factory.generate()
             else:
                 self.dual_work = None
+                self.last_dual = None
                 self.slack_term = None
                 self.dual_in = None
                 self.dual_out = None
+            if self.last_dual is not None:
+                self.last_dual.equals(self.at_dual)
+            if self.explicit:
+                self.design_unit = self.primal_factory.generate()
+                self.design_col = self.primal_factory.generate()
+            self.design_fd_work = None
+            self.state_fd_work = None
+            if self.fd_scheme == 'central':
+                self.design_fd_work = self.primal_factory.generate()
+                self.state_fd_work = self.state_factory.generate()
             self._allocated = True
 
         # reset radius
@@ -109,26 +144,12 @@ class LagrangianHessian(BaseHessian):
         self.cnstr_scale = cnstr_scale
 
         # compute adjoint residual at the linearization
-        self.adjoint_res.equals_objective_partial(
-            self.at_design, self.at_state, scale=self.obj_scale)
-        dRdU(self.at_design, self.at_state).T.product(
-            self.at_adjoint, self.state_work)
-        self.adjoint_res.plus(self.state_work)
-        dCdU(self.at_design, self.at_state).T.product(
-            self.at_dual, self.state_work)
-        self.state_work.times(self.cnstr_scale)
-        self.adjoint_res.plus(self.state_work)
+        self._adjoint_residual(
+            self.at_design, self.at_state, self.adjoint_res, self.state_work)
 
         # compute reduced gradient at the linearization
-        self.reduced_grad.equals_objective_partial(
-            self.at_design, self.at_state, scale=self.obj_scale)
-        dRdX(self.at_design, self.at_state).T.product(
-            self.at_adjoint, self.design_work)
-        self.reduced_grad.plus(self.design_work)
-        dCdX(self.at_design, self.at_state).T.product(
-            self.at_dual, self.design_work)
-        self.design_work.times(self.cnstr_scale)
-        self.reduced_grad.plus(self.design_work)
+        self._total_grad(
+            self.at_design, self.at_state, self.reduced_grad, self.design_work)
 
         # if slacks exist, compute the slack term
         if self.at_slack is not None:
@@ -136,26 +157,58 @@ class LagrangianHessian(BaseHessian):
             self.slack_term.pow(-1.)
             self.slack_term.times(self.at_dual)
 
-    def multiply_W(self, in_vec, out_vec):
+        # move the curvature store to the new point, including the step in
+        # the multipliers since the Hessian of the Lagrangian depends on them
+        dual_step = 0.0
+        if self.last_dual is not None:
+            self.dual_work.equals_ax_p_by(
+                1.0, self.at_dual, -1.0, self.last_dual)
+            dual_step = self.dual_work.norm2
+            self.last_dual.equals(self.at_dual)
+        if self.curvature is not None:
+            self.curvature.set_point(self.at_design, dual_step)
+
+        # assemble the dense Hessian if it costs fewer products than the last
+        # linearization used; the finite-difference errors are symmetrized
+        self.dense = None
+        if self._use_explicit(self.primal_factory._memory.ndv):
+            dense = self._assemble_dense(
+                self._multiply_W, self.design_unit, self.design_col)
+            self.dense = 0.5*(dense + dense.T)
+
+    def _total_grad(self, at_design, at_state, result, work):
+        # design derivative of the Lagrangian at fixed multipliers
+        result.equals_objective_partial(
+            at_design, at_state, scale=self.obj_scale)
+        dRdX(at_design, at_state).T.product(self.at_adjoint, work)
+        result.plus(work)
+        dCdX(at_design, at_state).T.product(self.at_dual, work)
+        work.times(self.cnstr_scale)
+        result.plus(work)
+
+    def _adjoint_residual(self, at_design, at_state, result, work):
+        # state derivative of the Lagrangian at fixed multipliers
+        result.equals_objective_partial(
+            at_design, at_state, scale=self.obj_scale)
+        dRdU(at_design, at_state).T.product(self.at_adjoint, work)
+        result.plus(work)
+        dCdU(at_design, at_state).T.product(self.at_dual, work)
+        work.times(self.cnstr_scale)
+        result.plus(work)
+
+    def _multiply_W(self, in_vec, out_vec):
+        # matrix-free product with the 2nd order adjoints
         # calculate the FD perturbation for the design
-        epsilon_fd = calc_epsilon(self.at_design.norm2, in_vec.norm2)
-
-        # perturb the design variables
-        self.pert_design.equals_ax_p_by(
-            1.0, self.at_design, epsilon_fd, in_vec)
+        design_eps = self._fd_epsilon(self.at_design.norm2, in_vec.norm2)
 
         # compute partial (d^2 L/dx^2)*in_vec and store in out_vec
-        out_vec.equals_objective_partial(
-            self.pert_design, self.at_state, scale=self.obj_scale)
-        dRdX(self.pert_design, self.at_state).T.product(
-            self.at_adjoint, self.design_work)
-        out_vec.plus(self.design_work)
-        dCdX(self.pert_design, self.at_state).T.product(
-            self.at_dual, self.design_work)
-        self.design_work.times(self.cnstr_scale)
-        out_vec.plus(self.design_work)
-        out_vec.minus(self.reduced_grad)
-        out_vec.divide_by(epsilon_fd)
+        def design_grad(step, result):
+            self.pert_design.equals_ax_p_by(1.0, self.at_design, step, in_vec)
+            self._total_grad(
+                self.pert_design, self.at_state, result, self.design_work)
+        self._fd_derivative(
+            design_grad, design_eps, self.reduced_grad, out_vec,
+            self.design_fd_work)
 
         # build RHS for first adjoint system and solve for forward adjoint
         dRdX(self.at_design, self.at_state).product(in_vec, self.state_work)
@@ -164,43 +217,35 @@ class LagrangianHessian(BaseHessian):
             dRdU(self.at_design, self.at_state).precond(
                 self.state_work, self.forward_adjoint)
         else:
-            rel_tol = self.product_tol/max(self.state_work.norm2, EPS)
+            rel_tol = self._solve_tol(
+                self.product_tol/max(self.state_work.norm2, EPS))
             dRdU(self.at_design, self.at_state).solve(
                 self.state_work, self.forward_adjoint, rel_tol=rel_tol)
 
         # compute the FD perturbation for the states
-        epsilon_fd = calc_epsilon(
+        state_eps = self._fd_epsilon(
             self.at_state.norm2, self.forward_adjoint.norm2)
-        self.pert_state.equals_ax_p_by(
-            1.0, self.at_state, epsilon_fd, self.forward_adjoint)
 
         # build RHS for second adjoint system
 
         # STEP 1: perturb design, evaluate adjoint residual, take difference
-        self.adjoint_work.equals_objective_partial(
-            self.pert_design, self.at_state, scale=self.obj_scale)
-        dRdU(self.pert_design, self.at_state).T.product(
-            self.at_adjoint, self.state_work)
-        self.adjoint_work.plus(self.state_work)
-        dCdU(self.pert_design, self.at_state).T.product(
-            self.at_dual, self.state_work)
-        self.state_work.times(self.cnstr_scale)
-        self.adjoint_work.plus(self.state_work)
-        self.adjoint_work.minus(self.adjoint_res)
-        self.adjoint_work.divide_by(epsilon_fd)
+        def design_res(step, result):
+            self.pert_design.equals_ax_p_by(1.0, self.at_design, step, in_vec)
+            self._adjoint_residual(
+                self.pert_design, self.at_state, result, self.state_work)
+        self._fd_derivative(
+            design_res, design_eps, self.adjoint_res, self.adjoint_work,
+            self.state_fd_work)
 
         # STEP 2: perturb state, evaluate adjoint residual, take difference
-        self.reverse_adjoint.equals_objective_partial(
-            self.at_design, self.pert_state, scale=self.obj_scale)
-        dRdU(self.at_design, self.pert_state).T.product(
-            self.at_adjoint, self.state_work)
-        self.reverse_adjoint.plus(self.state_work)
-        dCdU(self.at_design, self.pert_state).T.product(
-            self.at_dual, self.state_work)
-        self.state_work.times(self.cnstr_scale)
-        self.reverse_adjoint.plus(self.state_work)
-        self.reverse_adjoint.minus(self.adjoint_res)
-        self.reverse_adjoint.divide_by(epsilon_fd)
+        def state_res(step, result):
+            self.pert_state.equals_ax_p_by(
+                1.0, self.at_state, step, self.forward_adjoint)
+            self._adjoint_residual(
+                self.at_design, self.pert_state, result, self.state_work)
+        self._fd_derivative(
+            state_res, state_eps, self.adjoint_res, self.reverse_adjoint,
+            self.state_fd_work)
 
         # STEP 3: assemble the final RHS and solve the adjoint system
         self.adjoint_work.plus(self.reverse_adjoint)
@@ -209,7 +254,8 @@ class LagrangianHessian(BaseHessian):
             dRdU(self.at_design, self.at_state).T.precond(
                 self.adjoint_work, self.reverse_adjoint)
         else:
-            rel_tol = self.product_tol/max(self.adjoint_work.norm2, EPS)
+            rel_tol = self._solve_tol(
+                self.product_tol/max(self.adjoint_work.norm2, EPS))
             dRdU(self.at_design, self.at_state).T.solve(
                 self.adjoint_work, self.reverse_adjoint, rel_tol=rel_tol)
 
@@ -221,19 +267,28 @@ class LagrangianHessian(BaseHessian):
         out_vec.plus(self.design_work)
 
         # apply the Lagrangian adjoint to the cross-derivative part of Hessian
-        self.design_work.equals_objective_partial(
-            self.at_design, self.pert_state, scale=self.obj_scale)
-        dRdX(self.at_design, self.pert_state).T.product(
-            self.at_adjoint, self.pert_design)
-        self.design_work.plus(self.pert_design)
-        dCdX(self.at_design, self.pert_state).T.product(
-            self.at_dual, self.pert_design)
-        self.pert_design.times(self.cnstr_scale)
-        self.design_work.plus(self.pert_design)
-        self.design_work.minus(self.reduced_grad)
-        self.design_work.divide_by(epsilon_fd)
+        def state_grad(step, result):
+            self.pert_state.equals_ax_p_by(
+                1.0, self.at_state, step, self.forward_adjoint)
+            self._total_grad(
+                self.at_design, self.pert_state, result, self.pert_design)
+        self._fd_derivative(
+            state_grad, state_eps, self.reduced_grad, self.design_work,
+            self.design_fd_work)
         out_vec.plus(self.design_work)
 
+    def multiply_W(self, in_vec, out_vec):
+        if not self._approx:
+            self.num_products += 1
+        if self.dense is not None:
+            self._dense_product(self.dense, in_vec, out_vec)
+        else:
+            self._multiply_W(in_vec, out_vec)
+
+        # record the exact products
+        if self.curvature is not None and not self._approx:
+            self.curvature.add(in_vec, out_vec)
+
         # reset the approx and transpose flags at the end
         self._approx = False
 
@@ -298,5 +353,5 @@ from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.matrices.common import dRdX, dRdU, dCdX, dCdU
 from kona.linalg.matrices.hessian import AugmentedKKTMatrix
-from kona.linalg.solvers.util import calc_epsilon, EPS
-from kona.linalg.solvers.krylov import STCG
\ No newline at end of file
+from kona.linalg.solvers.util import EPS
+from kona.linalg.solvers.krylov import STCG, get_krylov_solver
\ No newline at end of file
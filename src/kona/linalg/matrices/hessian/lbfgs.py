@@ -3,30 +3,19 @@ from kona.linalg.matrices.hessian.basic import QuasiNewtonApprox
 class LimitedMemoryBFGS(QuasiNewtonApprox):
     """ Limited-memory BFGS approximation for the Hessian.
 
-    Attributes
-    ----------
-    lambda0 : float
-        ?
-    s_dot_s_list : list of float
-        The L2 norm of the step vector.
-    s_dot_y_list : list of float
-        Curvature.
+    The approximation is kept in the compact form of Byrd, Nocedal and
+    Schnabel, on top of the ring buffer and the inner products maintained
+    by ``QuasiNewtonApprox``. ``product()`` and ``solve()`` each need two
+    block inner products, one block update and a small dense solve.
+
+    The initial Hessian is ``init_hessian``, a diagonal stored as a vector,
+    if it is set. Otherwise, it is the identity scaled by :math:`y^Ty/s^Ty`
+    of the newest correction, or by ``norm_init`` before the first one.
     """
 
-    def __init__(self, vector_factory, optns=None):
-        super(LimitedMemoryBFGS, self).__init__(vector_factory, optns)
-
-        self.lambda0 = 0
-        self.s_dot_s_list = []
-        self.s_dot_y_list = []
-
-        self.max_stored = get_opt(self.optns, 10, 'max_stored')
-
-        vector_factory.request_num_vectors(2*self.max_stored)
-
     def add_correction(self, s_in, y_in):
-        two_norm = s_in.inner(s_in)
-        curvature = s_in.inner(y_in)
+        s_prods, y_prods = self._correction_inners(s_in, y_in)
+        curvature = s_prods[-1]
 
         # if curvature is too small, skip correction
         if curvature < numpy.finfo(float).eps:
@@ -35,68 +24,69 @@ class LimitedMemoryBFGS(QuasiNewtonApprox):
                 'correction skipped due to curvature condition.\n')
             return
 
-        # otherwise we must first free up space for the correction, if needed
-        if (len(self.s_list) == self.max_stored):
-            del self.s_list[0], self.y_list[0]
-            del self.s_dot_s_list[0], self.s_dot_y_list[0]
+        self._store_correction(s_in, y_in, s_prods, y_prods)
 
-        # get new vectors to store the correction
-        s_new = self.vec_fac.generate()
-        y_new = self.vec_fac.generate()
-
-        # set the new vectors to correction values
-        s_new.equals(s_in)
-        y_new.equals(y_in)
-
-        # append the list
-        self.s_list.append(s_new)
-        self.y_list.append(y_new)
-        self.s_dot_s_list.append(two_norm)
-        self.s_dot_y_list.append(curvature)
+    def _init_scale(self):
+        if self.num_stored == 0:
+            return self.norm_init
+        k = (self._first + self.num_stored - 1) % self.max_stored
+        return self.YtY[k, k]/self.StY[k, k]
 
     def product(self, in_vec, out_vec):
-        raise NotImplementedError
-
-    def solve(self, u_vec, v_vec, rel_tol=1e-15):
-        lambda0 = self.lambda0
-        s_list = self.s_list
-        y_list = self.y_list
-        s_dot_s_list = self.s_dot_s_list
-        s_dot_y_list = self.s_dot_y_list
-
-        num_stored = len(s_list)
-        rho = numpy.zeros(num_stored)
-        alpha = numpy.zeros(num_stored)
+        self._allocate_work()
+        out_vec.equals(in_vec)
+        self._apply_init(out_vec)
+        n = self.num_stored
+        if n == 0:
+            return
 
-        for k in xrange(num_stored):
-            rho[k] = 1.0 / (s_dot_s_list[k] * lambda0 +
-                            s_dot_y_list[k])
+        # B v = B0 v - [B0 S, Y] M^{-1} [S^T B0 v; Y^T v], where
+        # M = [S^T B0 S, L; L^T, -D]
+        StY = self._gram(self.StY)
+        L = numpy.tril(StY, -1)
+        M = numpy.block([[self._weighted_gram(False), L],
+                         [L.T, -numpy.diag(numpy.diag(StY))]])
+        rhs = numpy.concatenate((out_vec.multi_inner(self.s_list),
+                                 in_vec.multi_inner(self.y_list)))
+        coeffs = numpy.linalg.solve(M, rhs)
+
+        if self.init_hessian is None:
+            coeffs[:n] *= self._init_scale()
+            out_vec.multi_axpy(-coeffs, self.s_list + self.y_list)
+        else:
+            self._work.equals(0.0)
+            self._work.multi_axpy(coeffs[:n], self.s_list)
+            self._apply_init(self._work)
+            out_vec.minus(self._work)
+            out_vec.multi_axpy(-coeffs[n:], self.y_list)
 
+    def solve(self, u_vec, v_vec, rel_tol=1e-15):
+        self._allocate_work()
         v_vec.equals(u_vec)
-        for k in xrange(num_stored-1, -1, -1):
-            alpha[k] = rho[k] * s_list[k].inner(v_vec)
-            if lambda0 > 0.0:
-                v_vec.equals_ax_p_by(1.0, v_vec,
-                                     -alpha[k] * lambda0, s_list[k])
-            v_vec.equals_ax_p_by(1.0, v_vec, -alpha[k], y_list[k])
+        self._apply_init(v_vec, inverse=True)
+        if self.num_stored == 0:
+            return
 
-        if num_stored > 0:
-            k = num_stored - 1
-            yTy = y_list[k].inner(y_list[k])
-            if lambda0 > 0.0:
-                yTy += 2.0 * lambda0 * s_dot_y_list[k]
-                yTy += lambda0 * lambda0 * s_dot_s_list[k]
-            scale = 1.0 / (rho[k] * yTy)
-            v_vec.times(scale)
+        # H u = H0 u + [S, H0 Y] [p; q], where q = -R^{-1} S^T u and
+        # p = R^{-T} ((D + Y^T H0 Y) R^{-1} S^T u - Y^T H0 u)
+        StY = self._gram(self.StY)
+        R = numpy.triu(StY)
+        YtHY = self._weighted_gram(True)
+        Rinv_a = solve_tri(R, u_vec.multi_inner(self.s_list), lower=False)
+        p = solve_tri(R.T, (numpy.diag(numpy.diag(StY)) + YtHY).dot(Rinv_a) -
+                      v_vec.multi_inner(self.y_list), lower=True)
+
+        if self.init_hessian is None:
+            v_vec.multi_axpy(
+                numpy.concatenate((p, -Rinv_a/self._init_scale())),
+                self.s_list + self.y_list)
         else:
-            v_vec.divide_by(self.norm_init)
-
-        for k in xrange(num_stored):
-            beta = rho[k] * y_list[k].inner(v_vec)
-            if lambda0 > 0.0:
-                beta += rho[k] * lambda0 * s_list[k].inner(v_vec)
-            v_vec.equals_ax_p_by(1.0, v_vec, (alpha[k] - beta), s_list[k])
+            v_vec.multi_axpy(p, self.s_list)
+            self._work.equals(0.0)
+            self._work.multi_axpy(-Rinv_a, self.y_list)
+            self._apply_init(self._work, inverse=True)
+            v_vec.plus(self._work)
 
 # imports at the bottom to prevent circular import errors
 import numpy
-from kona.options import get_opt
+from kona.linalg.solvers.util import solve_tri
@@ -1,156 +1,149 @@
-import gc
 import numpy
 
-from kona.options import get_opt
-
 from kona.linalg.matrices.hessian.basic import QuasiNewtonApprox
 
 class LimitedMemorySR1(QuasiNewtonApprox):
     """ Limited memory symmetric rank-one update
 
+    The approximation is kept in the compact SR1 form of Byrd, Nocedal and
+    Schnabel, on top of the ring buffer and the inner products maintained
+    by ``QuasiNewtonApprox``, so ``product()`` and ``solve()`` each cost one
+    block inner product and one block update, and allocate no vectors.
+
+    The initial Hessian is ``init_hessian``, a diagonal stored as a vector,
+    if it is set, and the identity scaled by ``norm_init`` otherwise.
+
     Attributes
     ----------
-    lambda0 : float
-        ?
     threshold : float
-        ?
+        Corrections are skipped if :math:`|s^T(y - Bs)| <
+        threshold \\|s\\| \\|y - Bs\\|`.
     """
 
     def __init__(self, vector_factory, optns=None):
         super(LimitedMemorySR1, self).__init__(vector_factory, optns)
 
-        self.lambda0 = 0
-
         self.threshold = 1.e-8
 
-        self.max_stored = get_opt(self.optns, 10, 'max_stored')
+        # work vector for the skip test with a diagonal initial Hessian
+        vector_factory.request_num_vectors(1)
 
-        vector_factory.request_num_vectors(3*self.max_stored + 4)
+    def _middle_product(self):
+        # D + L + L^T - S^T B0 S, with L the strictly lower part of S^T Y
+        StY = self._gram(self.StY)
+        return numpy.tril(StY) + numpy.tril(StY, -1).T - \
+            self._weighted_gram(False)
 
-    def _check_threshold(self, z_list, k, alpha):
-        # alias some variables
-        lambda0 = self.lambda0
-        norm_init = self.norm_init
-        s_list = self.s_list
-        y_list = self.y_list
-        threshold = self.threshold
-
-        alpha[k] = (1.0 - lambda0)*z_list[k].inner(y_list[k]) + \
-            lambda0*norm_init*z_list[k].inner(s_list[k])
-        norm_grad = (1.0 - lambda0)**2*y_list[k].inner(y_list[k]) + \
-            lambda0**2*norm_init**2*s_list[k].inner(s_list[k]) + \
-            2.0*lambda0*norm_init*(1.0 - lambda0)*y_list[k].inner(s_list[k])
-        norm_grad = numpy.sqrt(norm_grad)
-
-        if abs(alpha[k]) < threshold * norm_grad * z_list[k].norm2 or \
-                abs(alpha[k]) < numpy.finfo(float).eps:
-            alpha[k] = 0.0
-        else:
-            alpha[k] = 1.0 / alpha[k]
+    def _middle_solve(self):
+        # R + R^T - D - Y^T H0 Y, with R the upper part of S^T Y
+        StY = self._gram(self.StY)
+        return numpy.triu(StY) + numpy.triu(StY, 1).T - \
+            self._weighted_gram(True)
 
-        return alpha
+    def _skip_residual(self, s_in, y_in, s_prods, y_prods):
+        """
+        Returns :math:`s^T(y - Bs)` and :math:`\\|y - Bs\\|` for the current
+        approximation B. With a scalar initial Hessian, they follow from the
+        cached inner products; otherwise :math:`y - Bs` is formed.
+        """
+        n = self.num_stored
+        sTs, sTy = s_prods[2*n:]
+        yTy = y_prods[2*n]
+        if self.init_hessian is not None:
+            with self.vec_fac.borrow(1) as (resid,):
+                self.product(s_in, resid)
+                resid.equals_ax_p_by(1.0, y_in, -1.0, resid)
+                s_res, res_res = resid.fused_inner(
+                    [(s_in, resid), (resid, resid)])
+            return s_res, numpy.sqrt(max(res_res, 0.0))
+
+        # B s = delta s + W c with W = Y - delta S and c = M^{-1} W^T s
+        delta = self._init_scale()
+        sBs = delta*sTs
+        yBs = delta*sTy
+        BsBs = delta**2*sTs
+        if n > 0:
+            a_s = s_prods[n:2*n] - delta*s_prods[:n]
+            a_y = y_prods[n:2*n] - delta*y_prods[:n]
+            c = _lstsq(self._middle_product(), a_s)
+            StY = self._gram(self.StY)
+            WtW = self._gram(self.YtY) - delta*(StY + StY.T) + \
+                delta**2*self._gram(self.StS)
+            sBs += a_s.dot(c)
+            yBs += a_y.dot(c)
+            BsBs += 2.0*delta*a_s.dot(c) + c.dot(WtW.dot(c))
+        res_res = yTy - 2.0*yBs + BsBs
+        return sTy - sBs, numpy.sqrt(max(res_res, 0.0))
 
     def add_correction(self, s_in, y_in):
         """
         Add the step and change in gradient to the lists storing the history.
         """
-        threshold = self.threshold
-
-        y_copy = self.vec_fac.generate()
-        tmp = self.vec_fac.generate()
-        y_copy.equals(y_in)
-        self.product(y_copy, tmp)
-        tmp.minus(s_in)
-
-        norm_resid = tmp.norm2
-        norm_y_new = y_in.norm2
-        prod = abs(y_in.inner(tmp))
+        s_prods, y_prods = self._correction_inners(s_in, y_in)
+        s_res, norm_resid = self._skip_residual(s_in, y_in, s_prods, y_prods)
+        norm_s = numpy.sqrt(s_prods[2*self.num_stored])
 
-        if prod < threshold*norm_resid*norm_y_new or \
-                prod < numpy.finfo(float).eps:
+        if abs(s_res) < self.threshold*norm_resid*norm_s or \
+                abs(s_res) < numpy.finfo(float).eps:
             self.out_file.write(
                 'LimitedMemorySR1::AddCorrection():' +
                 'correction skipped due to threshold condition.\n')
             return
 
-        # if maximum is reached, remove old elements
-        if len(self.s_list) == self.max_stored:
-            del self.s_list[0]
-            del self.y_list[0]
-
-        # generate two new vectors
-        s_new = self.vec_fac.generate()
-        y_new = self.vec_fac.generate()
-
-        # set them equal to the new correction
-        s_new.equals(s_in)
-        y_new.equals(y_in)
-
-        # add the corrections to the list
-        self.s_list.append(s_new)
-        self.y_list.append(y_new)
-
-        # force garbage collection
-        del s_new, y_new
-        gc.collect()
+        self._store_correction(s_in, y_in, s_prods, y_prods)
 
     def product(self, u_vec, v_vec):
-        s_list = self.s_list
-        y_list = self.y_list
-        num_stored = len(s_list)
-
-        Bs = []
-        for k in xrange(num_stored):
-            Bs.append(self.vec_fac.generate())
-            Bs[k].equals(s_list[k])
-
+        self._allocate_work()
         v_vec.equals(u_vec)
+        self._apply_init(v_vec)
+        n = self.num_stored
+        if n == 0:
+            return
 
-        for i in xrange(num_stored):
-            denom = 1.0 / (y_list[i].inner(s_list[i]) - Bs[i].inner(s_list[i]))
-            fac = (y_list[i].inner(u_vec) - Bs[i].inner(u_vec))*denom
-            v_vec.equals_ax_p_by(1.0, v_vec, fac, y_list[i])
-            v_vec.equals_ax_p_by(1.0, v_vec, -fac, Bs[i])
-            for j in xrange(i+1, num_stored):
-                fac = (y_list[i].inner(s_list[j])
-                       - Bs[i].inner(s_list[j]))*denom
-                Bs[j].equals_ax_p_by(1.0, Bs[j], fac, y_list[i])
-                Bs[j].equals_ax_p_by(1.0, Bs[j], -fac, Bs[i])
+        # B u = B0 u + (Y - B0 S) M^{-1} (Y - B0 S)^T u, where
+        # M = D + L + L^T - S^T B0 S
+        if self.init_hessian is None:
+            delta = self._init_scale()
+            prods = u_vec.multi_inner(self.s_list + self.y_list)
+            c = _lstsq(self._middle_product(), prods[n:] - delta*prods[:n])
+            v_vec.multi_axpy(numpy.concatenate((-delta*c, c)),
+                             self.s_list + self.y_list)
+        else:
+            c = _lstsq(self._middle_product(),
+                       u_vec.multi_inner(self.y_list) -
+                       v_vec.multi_inner(self.s_list))
+            self._work.equals(0.0)
+            self._work.multi_axpy(c, self.s_list)
+            self._apply_init(self._work)
+            v_vec.minus(self._work)
+            v_vec.multi_axpy(c, self.y_list)
 
     def solve(self, u_vec, v_vec, rel_tol=1e-15):
-        # alias some variables
-        lambda0 = self.lambda0
-        norm_init = self.norm_init
-        s_list = self.s_list
-        y_list = self.y_list
-        num_stored = len(s_list)
-
-        if num_stored == 0:
-            v_vec.equals(u_vec)
-            v_vec.divide_by(norm_init)
+        self._allocate_work()
+        v_vec.equals(u_vec)
+        self._apply_init(v_vec, inverse=True)
+        n = self.num_stored
+        if n == 0:
             return
 
-        alpha = numpy.zeros(num_stored)
-
-        z_list = []
-        for k in xrange(num_stored):
-            z_list.append(self.vec_fac.generate())
-            z_list[k].equals_ax_p_by(1.0 - lambda0, s_list[k],
-                                     (lambda0 - 1.0)/norm_init,
-                                     y_list[k])
-
-        alpha = self._check_threshold(z_list, 0, alpha)
-
-        for i in xrange(1, num_stored):
-            for j in xrange(1, num_stored):
-                prod = (1.0 - lambda0) * z_list[i-1].inner(y_list[j]) + \
-                    lambda0 * norm_init * z_list[i-1].inner(s_list[j])
-                z_list[j].equals_ax_p_by(1.0, z_list[j],
-                                         -alpha[i-1] * prod, z_list[i-1])
-
-            alpha = self._check_threshold(z_list, i, alpha)
-
-        v_vec.equals(u_vec)
-        for k in xrange(num_stored):
-            v_vec.equals_ax_p_by(1.0, v_vec,
-                                 alpha[k] * z_list[k].inner(u_vec), z_list[k])
+        # H u = H0 u + (S - H0 Y) N^{-1} (S - H0 Y)^T u, where
+        # N = R + R^T - D - Y^T H0 Y
+        if self.init_hessian is None:
+            delta = self._init_scale()
+            prods = u_vec.multi_inner(self.s_list + self.y_list)
+            c = _lstsq(self._middle_solve(), prods[:n] - prods[n:]/delta)
+            v_vec.multi_axpy(numpy.concatenate((c, -c/delta)),
+                             self.s_list + self.y_list)
+        else:
+            c = _lstsq(self._middle_solve(),
+                       u_vec.multi_inner(self.s_list) -
+                       v_vec.multi_inner(self.y_list))
+            v_vec.multi_axpy(c, self.s_list)
+            self._work.equals(0.0)
+            self._work.multi_axpy(c, self.y_list)
+            self._apply_init(self._work, inverse=True)
+            v_vec.minus(self._work)
+
+def _lstsq(M, rhs):
+    # the middle matrices can become singular after old corrections drop out
+    return numpy.linalg.lstsq(M, rhs, rcond=-1)[0]
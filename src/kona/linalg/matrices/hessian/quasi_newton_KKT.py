@@ -30,7 +30,8 @@ class QuasiNewtonKKTMatrix(BaseHessian):
         self.quasi_newton = LimitedMemorySR1(self.primal_factory, optns)
 
         # initialize the constraint jacobian objects
-        self.cnstr_jac = TotalConstraintJacobian(self.vec_fac)
+        self.cnstr_jac = TotalConstraintJacobian(
+            self.vec_fac, {'explicit' : self.explicit})
 
         # request vector memory for future allocation
         self.primal_factory.request_num_vectors(3)
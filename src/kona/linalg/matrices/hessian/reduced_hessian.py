@@ -19,6 +19,16 @@ class ReducedHessian(BaseHessian):
         ???
     quasi_newton : QuasiNewtonApproximation -like
         QN Hessian object to be used as preconditioner.
+    block_size : int
+        Maximum number of products whose 2nd order adjoints are solved
+        together in ``product_block()``.
+
+    The 2nd order adjoint terms are finite differences of the total gradient
+    and of the adjoint residual, with the scheme set by ``fd_scheme``.
+
+    With the ``explicit`` option, the dense Hessian is assembled from one
+    product per design variable at every linearization, and the products
+    become dense matrix-vector multiplications.
     """
     def __init__(self, vector_factories, optns=None):
         super(ReducedHessian, self).__init__(vector_factories, optns)
@@ -27,8 +37,7 @@ class ReducedHessian(BaseHessian):
         self.product_tol = get_opt(self.optns, 1e-6, 'product_tol')
         self.lamb = get_opt(self.optns, 0.0, 'lambda')
         self.scale = get_opt(self.optns, 1.0, 'scale')
-        self.nu = get_opt(self.optns, 0.95, 'nu')
-        self.dynamic_tol = get_opt(self.optns, False, 'dynamic_tol')
+        self.block_size = get_opt(self.optns, 1, 'block_size')
 
         # preconditioner and solver settings
         self.precond = get_opt(self.optns, None, 'precond')
@@ -41,6 +50,13 @@ class ReducedHessian(BaseHessian):
         # request vector memory for future allocation
         self.primal_factory.request_num_vectors(4)
         self.state_factory.request_num_vectors(7)
+        if self.block_size > 1:
+            self.state_factory.request_num_vectors(3*self.block_size)
+        if self.explicit:
+            self.primal_factory.request_num_vectors(2)
+        if self.fd_scheme == 'central':
+            self.primal_factory.request_num_vectors(1)
+            self.state_factory.request_num_vectors(1)
 
         # initialize abtract jacobians
         self.dRdX = dRdX()
@@ -103,132 +119,216 @@ class ReducedHessian(BaseHessian):
             self.primal_work = []
             for i in xrange(2):
                 self.primal_work.append(self.primal_factory.generate())
+            if self.explicit:
+                self.design_unit = self.primal_factory.generate()
+                self.design_col = self.primal_factory.generate()
+
+            # generate the extra work vectors of central differences
+            self.design_fd_work = None
+            self.state_fd_work = None
+            if self.fd_scheme == 'central':
+                self.design_fd_work = self.primal_factory.generate()
+                self.state_fd_work = self.state_factory.generate()
             self._allocated = True
 
         # compute adjoint residual at the linearization
-        self.adjoint_res.equals_objective_partial(
-            self.at_design, self.at_state, scale=self.scale)
-        self.dRdU.linearize(self.at_design, self.at_state)
-        self.dRdU.T.product(self.at_adjoint, self.state_work[0])
-        self.adjoint_res.plus(self.state_work[0])
+        self._adjoint_residual(
+            self.at_design, self.at_state, self.adjoint_res,
+            self.state_work[0])
 
         # compute reduced gradient at the linearization
-        self.reduced_grad.equals_objective_partial(
-            self.at_design, self.at_state, scale=self.scale)
-        self.dRdX.linearize(self.at_design, self.at_state)
-        self.dRdX.T.product(self.at_adjoint, self.primal_work[0])
-        self.reduced_grad.plus(self.primal_work[0])
-
-    def product(self, in_vec, out_vec):
-        """
-        Matrix-vector product for the reduced KKT system.
+        self._total_grad(
+            self.at_design, self.at_state, self.reduced_grad,
+            self.primal_work[0])
+
+        # move the curvature store to the new point
+        if self.curvature is not None:
+            self.curvature.set_point(self.at_design)
+
+        # assemble the dense Hessian if it costs fewer products than the last
+        # linearization used; the finite-difference errors are symmetrized
+        self.dense = None
+        if self._use_explicit(self.primal_factory._memory.ndv):
+            dense = self._assemble_dense(
+                self._product, self.design_unit, self.design_col)
+            self.dense = 0.5*(dense + dense.T)
+
+    def _total_grad(self, at_design, at_state, result, work):
+        # total gradient for the adjoint of the linearization
+        result.equals_objective_partial(at_design, at_state, scale=self.scale)
+        self.dRdX.linearize(at_design, at_state)
+        self.dRdX.T.product(self.at_adjoint, work)
+        result.plus(work)
+
+    def _adjoint_residual(self, at_design, at_state, result, work):
+        # residual of the adjoint equation for the adjoint of the linearization
+        result.equals_objective_partial(at_design, at_state, scale=self.scale)
+        self.dRdU.linearize(at_design, at_state)
+        self.dRdU.T.product(self.at_adjoint, work)
+        result.plus(work)
+
+    def _first_adjoint_rhs(self, in_vec, out_vec, rhs):
+        # start the product with the finite-difference of the total gradient,
+        # and build the RHS of the first 2nd order adjoint
+        def design_grad(step, result):
+            self.pert_design.equals_ax_p_by(1.0, self.at_design, step, in_vec)
+            self._total_grad(
+                self.pert_design, self.at_state, result, self.primal_work[0])
+        epsilon_fd = self._fd_epsilon(self.primal_norm, in_vec.norm2)
+        self._fd_derivative(
+            design_grad, epsilon_fd, self.reduced_grad, out_vec,
+            self.primal_work[1])
 
-        Parameters
-        ----------
-        in_vec : ReducedKKTVector
-            Vector to be multiplied with the KKT matrix.
-        out_vec : ReducedKKTVector
-            Result of the operation.
-        """
-        # calculate perturbation
-        # epsilon_fd = calc_epsilon(self.primal_norm, in_vec.norm2)
-        epsilon_fd = 1e-5
-
-        # perturb the design vector
-        self.pert_design.equals_ax_p_by(1.0, self.at_design, epsilon_fd, in_vec)
-
-        # compute total gradient at the perturbed design
-        out_vec.equals_objective_partial(self.pert_design, self.at_state,
-                                         scale=self.scale)
-        self.dRdX.linearize(self.pert_design, self.at_state)
-        self.dRdX.T.product(self.at_adjoint, self.primal_work[0])
+        # build RHS
+        self.dRdX.linearize(self.at_design, self.at_state)
+        self.dRdX.product(in_vec, rhs)
+        rhs.times(-1.0)
+
+    def _second_adjoint_rhs(self, in_vec, w_adj, rhs):
+        # build the RHS of the second 2nd order adjoint from the derivatives
+        # of the adjoint residual along the design and the state perturbations
+        def design_res(step, result):
+            self.pert_design.equals_ax_p_by(1.0, self.at_design, step, in_vec)
+            self._adjoint_residual(
+                self.pert_design, self.at_state, result, self.state_work[1])
+        epsilon_fd = self._fd_epsilon(self.primal_norm, in_vec.norm2)
+        self._fd_derivative(
+            design_res, epsilon_fd, self.adjoint_res, rhs, self.state_work[3])
+
+        def state_res(step, result):
+            self.state_work[1].equals_ax_p_by(1.0, self.at_state, step, w_adj)
+            self._adjoint_residual(
+                self.at_design, self.state_work[1], result, self.state_work[2])
+        epsilon_fd = self._fd_epsilon(self.state_norm, w_adj.norm2)
+        self._fd_derivative(
+            state_res, epsilon_fd, self.adjoint_res, self.state_work[3],
+            self.state_fd_work)
+
+        # assemble RHS, multiplied by -1
+        rhs.plus(self.state_work[3])
+        rhs.times(-1.0)
+
+    def _assemble(self, in_vec, w_adj, lambda_adj, out_vec):
+        # assemble the Hessian-vector product using 2nd order adjoints
+        # apply lambda_adj to the design part of the jacobian
+        self.dRdX.linearize(self.at_design, self.at_state)
+        self.dRdX.T.product(lambda_adj, self.primal_work[0])
         out_vec.plus(self.primal_work[0])
 
-        # take the difference between perturbed and unperturbed gradient
-        out_vec.minus(self.reduced_grad)
+        # apply w_adj to the cross-derivative part of the jacobian
+        def state_grad(step, result):
+            self.state_work[1].equals_ax_p_by(1.0, self.at_state, step, w_adj)
+            self._total_grad(
+                self.at_design, self.state_work[1], result, self.primal_work[1])
+        epsilon_fd = self._fd_epsilon(self.state_norm, w_adj.norm2)
+        self._fd_derivative(
+            state_grad, epsilon_fd, self.reduced_grad, self.primal_work[0],
+            self.design_fd_work)
+        out_vec.plus(self.primal_work[0])
 
-        # divide it by the perturbation
-        out_vec.divide_by(epsilon_fd)
+    def _post_product(self, in_vec, out_vec):
+        # record the product
+        if self.curvature is not None:
+            self.curvature.add(in_vec, out_vec)
 
-        # first adjoint system
-        ####################################
+        # update quasi-Newton method if necessary
+        if self.quasi_newton is not None:
+            self.quasi_newton.add_correction(in_vec, out_vec)
 
-        # build RHS
-        self.dRdX.linearize(self.at_design, self.at_state)
-        self.dRdX.product(in_vec, self.state_work[0])
-        self.state_work[0].times(-1.0)
+        # add globalization if necessary
+        if self.lamb > numpy.finfo(float).eps:
+            out_vec.equals_ax_p_by(
+                1.-self.lamb, out_vec, self.lamb*self.scale, in_vec)
 
-        # solve the first 2nd order adjoint
-        rel_tol = self.product_tol/max(self.state_work[0].norm2, EPS)
+    def _product(self, in_vec, out_vec):
+        # matrix-free product with the 2nd order adjoints
+        # first adjoint system
+        self._first_adjoint_rhs(in_vec, out_vec, self.state_work[0])
+        rel_tol = self._solve_tol(
+            self.product_tol/max(self.state_work[0].norm2, EPS))
         self.dRdU.linearize(self.at_design, self.at_state)
         self.dRdU.solve(
             self.state_work[0], self.w_adj, rel_tol=rel_tol)
 
         # second adjoint system
-        #####################################
-
-        # calculate total (dg/dx)^T*w using FD
-        self.state_work[0].equals_objective_partial(
-            self.pert_design, self.at_state, scale=self.scale)
-        self.dRdU.linearize(self.pert_design, self.at_state)
-        self.dRdU.T.product(self.at_adjoint, self.state_work[1])
-        self.state_work[0].plus(self.state_work[1])
-        self.state_work[0].minus(self.adjoint_res)
-        self.state_work[0].divide_by(epsilon_fd)
-
-        # multiply by -1 to use it as RHS
-        self.state_work[0].times(-1.0)
-
-        # perform state perturbation
-        self.state_work[1].equals_ax_p_by(
-            1.0, self.at_state, epsilon_fd, self.w_adj)
-
-        # calculate total (dS/du)^T*z using FD
-        self.state_work[2].equals_objective_partial(
-            self.at_design, self.state_work[1], scale=self.scale)
-        self.state_work[3].equals_ax_p_by(
-            -1./epsilon_fd, self.state_work[2], 1./epsilon_fd, self.adjoint_res)
-        self.dRdU.linearize(self.at_design, self.state_work[1])
-        self.dRdU.T.product(self.at_adjoint, self.state_work[2])
-        self.state_work[3].equals_ax_p_by(
-            1., self.state_work[3], -1./epsilon_fd, self.state_work[2])
-
-        # assemble RHS
-        self.state_work[0].plus(self.state_work[3])
-
-        # solve the second 2nd order adjoint
-        rel_tol = self.product_tol/max(self.state_work[0].norm2, EPS)
+        self._second_adjoint_rhs(in_vec, self.w_adj, self.state_work[0])
+        rel_tol = self._solve_tol(
+            self.product_tol/max(self.state_work[0].norm2, EPS))
         self.dRdU.linearize(self.at_design, self.at_state)
         self.dRdU.T.solve(
             self.state_work[0], self.lambda_adj, rel_tol=rel_tol)
 
-        # assemble the Hessian-vector product using 2nd order adjoints
-        ##############################################################
+        self._assemble(in_vec, self.w_adj, self.lambda_adj, out_vec)
 
-        # apply lambda_adj to the design part of the jacobian
-        self.dRdX.linearize(self.at_design, self.at_state)
-        self.dRdX.T.product(self.lambda_adj, self.primal_work[0])
-        out_vec.plus(self.primal_work[0])
+    def product(self, in_vec, out_vec):
+        """
+        Matrix-vector product for the reduced KKT system.
 
-        # apply w_adj to the cross-derivative part of the jacobian
-        self.primal_work[0].equals_objective_partial(
-            self.at_design, self.state_work[1], scale=self.scale)
-        self.dRdX.linearize(self.at_design, self.state_work[1])
-        self.dRdX.T.product(self.at_adjoint, self.primal_work[1])
-        self.primal_work[0].plus(self.primal_work[1])
-        self.primal_work[0].equals_ax_p_by(
-            1./epsilon_fd, self.primal_work[0],
-            -1./epsilon_fd, self.reduced_grad)
-        out_vec.plus(self.primal_work[0])
+        Parameters
+        ----------
+        in_vec : ReducedKKTVector
+            Vector to be multiplied with the KKT matrix.
+        out_vec : ReducedKKTVector
+            Result of the operation.
+        """
+        self.num_products += 1
+        if self.dense is not None:
+            self._dense_product(self.dense, in_vec, out_vec)
+        else:
+            self._product(in_vec, out_vec)
+        self._post_product(in_vec, out_vec)
 
-        # update quasi-Newton method if necessary
-        if self.quasi_newton is not None:
-            self.quasi_newton.add_correction(in_vec, out_vec)
+    def product_block(self, in_vecs, out_vecs):
+        """
+        Matrix-vector products for a block of vectors. The product of
+        ``in_vecs[k]`` is stored in ``out_vecs[k]``.
 
-        # add globalization if necessary
-        if self.lamb > numpy.finfo(float).eps:
-            out_vec.equals_ax_p_by(
-                1.-self.lamb, out_vec, self.lamb*self.scale, in_vec)
+        Up to ``block_size`` products are done together, so that each of the
+        two 2nd order adjoints is solved for all of them with a single
+        ``solve_multi()`` call.
+
+        Parameters
+        ----------
+        in_vecs : list of DesignVector
+            Vectors to be multiplied with the Hessian.
+        out_vecs : list of DesignVector
+            Results of the operation.
+        """
+        assert len(in_vecs) == len(out_vecs), \
+            "Number of input and output vectors do not match!"
+        if self.block_size <= 1 or self.dense is not None:
+            for in_vec, out_vec in zip(in_vecs, out_vecs):
+                self.product(in_vec, out_vec)
+            return
+        for start in xrange(0, len(in_vecs), self.block_size):
+            ins = in_vecs[start:start + self.block_size]
+            outs = out_vecs[start:start + self.block_size]
+            num = len(ins)
+            self.num_products += num
+            with self.state_factory.borrow(3*num) as work:
+                rhs = work[:num]
+                w_adj = work[num:2*num]
+                lambda_adj = work[2*num:]
+
+                # first adjoint systems
+                for k in xrange(num):
+                    self._first_adjoint_rhs(ins[k], outs[k], rhs[k])
+                rel_tol = self._solve_tol(
+                    self.product_tol/max(max(v.norm2 for v in rhs), EPS))
+                self.dRdU.linearize(self.at_design, self.at_state)
+                self.dRdU.solve_multi(rhs, w_adj, rel_tol=rel_tol)
+
+                # second adjoint systems
+                for k in xrange(num):
+                    self._second_adjoint_rhs(ins[k], w_adj[k], rhs[k])
+                rel_tol = self._solve_tol(
+                    self.product_tol/max(max(v.norm2 for v in rhs), EPS))
+                self.dRdU.linearize(self.at_design, self.at_state)
+                self.dRdU.T.solve_multi(rhs, lambda_adj, rel_tol=rel_tol)
+
+                for k in xrange(num):
+                    self._assemble(ins[k], w_adj[k], lambda_adj[k], outs[k])
+                    self._post_product(ins[k], outs[k])
 
     def solve(self, rhs, solution, rel_tol=None):
         """
@@ -271,4 +371,4 @@ from kona.options import get_opt
 from kona.linalg.vectors.common import DesignVector, StateVector
 from kona.linalg.matrices.common import dRdX, dRdU, IdentityMatrix
 from kona.linalg.solvers.krylov.basic import KrylovSolver
-from kona.linalg.solvers.util import calc_epsilon, EPS
\ No newline at end of file
+from kona.linalg.solvers.util import EPS
\ No newline at end of file
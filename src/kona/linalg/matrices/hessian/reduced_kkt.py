@@ -66,6 +66,14 @@ class ReducedKKTMatrix(BaseHessian):
         constraints. The slack implementation in this matrix is part of an ongoing development 
         effort to support inequality constraints at a future date.
 
+    With a curvature store attached (see ``set_curvature_store()``), the
+    design part of every product is recorded. The 2nd order adjoint of the
+    dual coupling :math:`-\\nabla_u c^T \\Delta \\lambda` is then solved
+    separately, batched with the design part in one ``solve_multi()`` call.
+    This adds no PDE solve only if the user solver implements
+    ``solve_adjoint_multi()`` as a true block solve; the default
+    implementation makes it one extra adjoint solve per product.
+
     Attributes
     ----------
     product_tol : float
@@ -94,11 +102,14 @@ class ReducedKKTMatrix(BaseHessian):
 
         # request vector memory for future allocation
         self.primal_factory.request_num_vectors(3)
-        self.state_factory.request_num_vectors(6)
+        self.state_factory.request_num_vectors(7)
         if self.eq_factory is not None:
-            self.eq_factory.request_num_vectors(3)
+            self.eq_factory.request_num_vectors(4)
         if self.ineq_factory is not None:
-            self.ineq_factory.request_num_vectors(3)
+            self.ineq_factory.request_num_vectors(4)
+        if self.fd_scheme == 'central':
+            self.primal_factory.request_num_vectors(1)
+            self.state_factory.request_num_vectors(1)
 
         # initialize abtract jacobians
         self.dRdX = dRdX()
@@ -114,6 +125,10 @@ class ReducedKKTMatrix(BaseHessian):
         self.dRdU.linearize(self.at_design, self.at_state)
         self.dRdU.T.solve(rhs_vec, solution, rel_tol=rel_tol)
 
+    def _adjoint_solve_multi(self, rhs_vecs, solutions, rel_tol=1e-6):
+        self.dRdU.linearize(self.at_design, self.at_state)
+        self.dRdU.T.solve_multi(rhs_vecs, solutions, rel_tol=rel_tol)
+
     def set_krylov_solver(self, krylov_solver):
         if isinstance(krylov_solver, KrylovSolver):
             self.krylov = krylov_solver
@@ -147,6 +162,7 @@ class ReducedKKTMatrix(BaseHessian):
             self.adjoint_res = self.state_factory.generate()
             self.w_adj = self.state_factory.generate()
             self.lambda_adj = self.state_factory.generate()
+            self.lambda_dual = self.state_factory.generate()
             self.state_work = []
             for i in xrange(3):
                 self.state_work.append(self.state_factory.generate())
@@ -156,13 +172,24 @@ class ReducedKKTMatrix(BaseHessian):
             self.reduced_grad = self.primal_factory.generate()
             self.primal_work = self.primal_factory.generate()
 
+            # generate the extra work vectors of central differences
+            self.design_fd_work = None
+            self.state_fd_work = None
+            if self.fd_scheme == 'central':
+                self.design_fd_work = self.primal_factory.generate()
+                self.state_fd_work = self.state_factory.generate()
+
             # generate dual vectors
             if isinstance(at_kkt.dual, CompositeDualVector):
                 dual_eq = self.eq_factory.generate()
                 dual_ineq = self.ineq_factory.generate()
                 self.dual_work = CompositeDualVector(dual_eq, dual_ineq)
+                self.last_dual = CompositeDualVector(
+                    self.eq_factory.generate(), self.ineq_factory.generate())
             else:
                 self.dual_work = self.eq_factory.generate()
+                self.last_dual = self.eq_factory.generate()
+            self.last_dual.equals(at_kkt.dual)
             self.slack_block = None
             if self.ineq_factory is not None:
                 self.slack_block = self.ineq_factory.generate()
@@ -221,6 +248,14 @@ class ReducedKKTMatrix(BaseHessian):
         self.primal_work.times(self.cnstr_scale)
         self.reduced_grad.plus(self.primal_work)
 
+        # move the curvature store to the new point, including the step in
+        # the multipliers since the Hessian of the Lagrangian depends on them
+        if self.curvature is not None:
+            self.dual_work.equals_ax_p_by(
+                1.0, self.at_dual, -1.0, self.last_dual)
+            self.curvature.set_point(self.at_design, self.dual_work.norm2)
+        self.last_dual.equals(self.at_dual)
+
     def product(self, in_vec, out_vec):
         """
         Matrix-vector product for the reduced KKT system.
@@ -266,7 +301,7 @@ class ReducedKKTMatrix(BaseHessian):
             out_dual_ineq = None
 
         # calculate appropriate FD perturbation for design
-        epsilon_fd = calc_epsilon(self.design_norm, in_design.norm2)
+        epsilon_fd = self._fd_epsilon(self.design_norm, in_design.norm2)
 
         # assemble RHS for first adjoint system
         self.dRdX.linearize(self.at_design, self.at_state)
@@ -276,32 +311,30 @@ class ReducedKKTMatrix(BaseHessian):
         # perform the adjoint solution
         self.w_adj.equals(0.0)
         # rel_tol = self.product_tol/max(self.state_work[0].norm2, EPS)
-        rel_tol = 1e-6
+        rel_tol = self._solve_tol(1e-6)
         self._linear_solve(self.state_work[0], self.w_adj, rel_tol=rel_tol)
 
         # find the adjoint perturbation by solving the linearized dual equation
-        self.pert_design.equals_ax_p_by(
-            1.0, self.at_design, epsilon_fd, in_design)
-        self.state_work[2].equals_ax_p_by(
-            1.0, self.at_state, epsilon_fd, self.w_adj)
-
-        # first part of LHS: evaluate the adjoint equation residual at
-        # perturbed design and state
-        self.state_work[0].equals_objective_partial(
-            self.pert_design, self.state_work[2], scale=self.obj_scale)
         pert_state = self.state_work[2] # aliasing for readability
-        self.dRdU.linearize(self.pert_design, pert_state)
-        self.dRdU.T.product(self.at_adjoint, self.state_work[1])
-        self.state_work[0].plus(self.state_work[1])
-        self.dCdU.linearize(self.pert_design, pert_state)
-        self.dCdU.T.product(self.at_dual, self.state_work[1])
-        self.state_work[1].times(self.cnstr_scale)
-        self.state_work[0].plus(self.state_work[1])
 
-        # at this point state_work[0] should contain the perturbed adjoint
-        # residual, so take difference with unperturbed adjoint residual
-        self.state_work[0].minus(self.adjoint_res)
-        self.state_work[0].divide_by(epsilon_fd)
+        # first part of LHS: differentiate the adjoint equation residual
+        # along the perturbed design and state
+        def adjoint_res(step, result):
+            self.pert_design.equals_ax_p_by(
+                1.0, self.at_design, step, in_design)
+            pert_state.equals_ax_p_by(1.0, self.at_state, step, self.w_adj)
+            result.equals_objective_partial(
+                self.pert_design, pert_state, scale=self.obj_scale)
+            self.dRdU.linearize(self.pert_design, pert_state)
+            self.dRdU.T.product(self.at_adjoint, self.state_work[1])
+            result.plus(self.state_work[1])
+            self.dCdU.linearize(self.pert_design, pert_state)
+            self.dCdU.T.product(self.at_dual, self.state_work[1])
+            self.state_work[1].times(self.cnstr_scale)
+            result.plus(self.state_work[1])
+        self._fd_derivative(
+            adjoint_res, epsilon_fd, self.adjoint_res, self.state_work[0],
+            self.state_fd_work)
 
         # multiply by -1 to move to RHS
         self.state_work[0].times(-1.0)
@@ -311,36 +344,57 @@ class ReducedKKTMatrix(BaseHessian):
         self.dCdU.T.product(in_dual, self.state_work[1])
         self.state_work[1].times(self.cnstr_scale)
 
-        # assemble final RHS
-        self.state_work[0].minus(self.state_work[1])
-
-        # perform the adjoint solution
-        self.lambda_adj.equals(0.0)
+        # perform the adjoint solution; with a curvature store, the dual part
+        # gets its own adjoint, solved together with the design part, so that
+        # the FD below is the Lagrangian Hessian product alone
         # rel_tol = self.product_tol/max(self.state_work[0].norm2, EPS)
-        rel_tol = 1e-6
-        self._adjoint_solve(
-            self.state_work[0], self.lambda_adj, rel_tol=rel_tol)
+        rel_tol = self._solve_tol(1e-6)
+        split_dual = self.curvature is not None
+        if split_dual:
+            self.state_work[1].times(-1.0)
+            self._adjoint_solve_multi(
+                [self.state_work[0], self.state_work[1]],
+                [self.lambda_adj, self.lambda_dual], rel_tol=rel_tol)
+        else:
+            self.state_work[0].minus(self.state_work[1])
+            self.lambda_adj.equals(0.0)
+            self._adjoint_solve(
+                self.state_work[0], self.lambda_adj, rel_tol=rel_tol)
 
         # evaluate first order optimality conditions at perturbed design, state
         # and adjoint:
         # g = df/dX + lag_mult*dC/dX + (adjoint + eps_fd*lambda_adj)*dR/dX
-        self.state_work[1].equals_ax_p_by(
-            1.0, self.at_adjoint, epsilon_fd, self.lambda_adj)
+        # and take the difference with unperturbed conditions
         pert_adjoint = self.state_work[1] # aliasing for readability
-        out_design.equals_objective_partial(
-            self.pert_design, pert_state, scale=self.obj_scale)
-        self.dRdX.linearize(self.pert_design, pert_state)
-        self.dRdX.T.product(pert_adjoint, self.primal_work)
-        out_design.plus(self.primal_work)
-        self.dCdX.linearize(self.pert_design, pert_state)
-        self.dCdX.T.product(self.at_dual, self.primal_work)
-        self.primal_work.times(self.cnstr_scale)
-        out_design.plus(self.primal_work)
-
-        # take difference with unperturbed conditions
-        out_design.times(self.grad_scale)
-        out_design.minus(self.reduced_grad)
-        out_design.divide_by(epsilon_fd)
+        def total_grad(step, result):
+            self.pert_design.equals_ax_p_by(
+                1.0, self.at_design, step, in_design)
+            pert_state.equals_ax_p_by(1.0, self.at_state, step, self.w_adj)
+            pert_adjoint.equals_ax_p_by(
+                1.0, self.at_adjoint, step, self.lambda_adj)
+            result.equals_objective_partial(
+                self.pert_design, pert_state, scale=self.obj_scale)
+            self.dRdX.linearize(self.pert_design, pert_state)
+            self.dRdX.T.product(pert_adjoint, self.primal_work)
+            result.plus(self.primal_work)
+            self.dCdX.linearize(self.pert_design, pert_state)
+            self.dCdX.T.product(self.at_dual, self.primal_work)
+            self.primal_work.times(self.cnstr_scale)
+            result.plus(self.primal_work)
+            result.times(self.grad_scale)
+        self._fd_derivative(
+            total_grad, epsilon_fd, self.reduced_grad, out_design,
+            self.design_fd_work)
+
+        # record the Lagrangian Hessian product, then add the dual coupling
+        # through the state that was left out of the FD
+        if self.curvature is not None:
+            self.curvature.add(in_design, out_design)
+        if split_dual:
+            self.dRdX.linearize(self.at_design, self.at_state)
+            self.dRdX.T.product(self.lambda_dual, self.primal_work)
+            self.primal_work.times(self.grad_scale)
+            out_design.plus(self.primal_work)
 
         # the dual part needs no FD
         self.dCdX.linearize(self.at_design, self.at_state)
@@ -378,4 +432,4 @@ from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.matrices.common import dRdX, dRdU, dCdX, dCdU
 from kona.linalg.solvers.krylov.basic import KrylovSolver
-from kona.linalg.solvers.util import calc_epsilon, EPS
\ No newline at end of file
+from kona.linalg.solvers.util import EPS
\ No newline at end of file
@@ -41,8 +41,8 @@ class ReducedSchurPreconditioner(BaseHessian):
             'rel_tol' : 1e-2,
             'check_res' :  False,
             'check_LS_grad' : False,
-            'krylov_file' : KonaFile(
-                'kona_schur.dat', self.primal_factory._memory.rank)}
+            'krylov_file' :
+                self.primal_factory._memory.open_file('kona_schur.dat')}
         self.krylov = FGMRES(self.primal_factory, optns=krylov_opts)
 
         # initialize an identity preconditioner
@@ -149,4 +149,3 @@ from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.linalg.matrices.hessian import TotalConstraintJacobian
 from kona.linalg.solvers.krylov import FGMRES
-from kona.linalg.memory import KonaFile
\ No newline at end of file
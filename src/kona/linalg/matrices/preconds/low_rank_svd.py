@@ -122,36 +122,24 @@ class LowRankSVD(BaseHessian):
         # calculate V = Q*v_tmp
         for j in xrange(len(self.V)):
             self.V[j].equals(0.0)
-            for i in xrange(len(v_tmp[:, j])):
-                self.q_work.equals(self.Q[i])
-                self.q_work.times(v_tmp[i, j])
-                self.V[j].plus(self.q_work)
+            self.V[j].multi_axpy(v_tmp[:, j], self.Q[:len(v_tmp[:, j])])
 
         # calculate U = P*u_tmp
         for j in xrange(len(self.U)):
             self.U[j].equals(0.0)
-            for i in xrange(len(u_tmp[:, j])):
-                self.p_work.equals(self.P[i])
-                self.p_work.times(u_tmp[i, j])
-                self.U[j].plus(self.p_work)
+            self.U[j].multi_axpy(u_tmp[:, j], self.P[:len(u_tmp[:, j])])
 
     def approx_fwd_prod(self, in_vec, out_vec):
-        VT_in = np.zeros(len(self.V))
-        for i in xrange(len(self.V)):
-            VT_in[i] = self.V[i].inner(in_vec)
+        VT_in = in_vec.multi_inner(self.V)
         SVT_in = np.dot(self.S, VT_in)
         out_vec.equals(0.0)
-        for i in xrange(len(self.U)):
-            out_vec.equals_ax_p_by(1., out_vec, SVT_in[i], self.U[i])
+        out_vec.multi_axpy(SVT_in, self.U)
 
     def approx_rev_prod(self, in_vec, out_vec):
-        UT_vec = np.zeros(len(self.U))
-        for i in xrange(len(self.U)):
-            UT_vec[i] = self.U[i].inner(in_vec)
+        UT_vec = in_vec.multi_inner(self.U)
         SUT_vec = np.dot(self.S, UT_vec)
         out_vec.equals(0.0)
-        for i in xrange(len(self.V)):
-            out_vec.equals_ax_p_by(1., out_vec, SUT_vec[i], self.V[i])
+        out_vec.multi_axpy(SUT_vec, self.V)
 
     def product(self, in_vec, out_vec):
         if not self._transposed:
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 
 class VectorFactory(object):
     """
@@ -15,6 +16,8 @@ class VectorFactory(object):
     ----------
     num_vecs : int
         Number of vectors requested from this factory.
+    num_single : int
+        Number of single precision vectors requested from this factory.
     _memory : KonaMemory
         All-knowing Kona memory manager.
     _vec_type : DesignVector or StateVector or DualVector
@@ -23,30 +26,52 @@ class VectorFactory(object):
 
     def __init__(self, memory, vec_type=None):
         self.num_vecs = 0
+        self.num_single = 0
         self._memory = memory
         if vec_type not in self._memory.vector_stack.keys():
             raise TypeError('VectorFactory() >> Unknown vector type!')
         else:
             self._vec_type = vec_type
 
-    def request_num_vectors(self, count):
+    def request_num_vectors(self, count, precision='double'):
         """
         Put in a request for the factory's vector type, to be used later.
 
+        Single precision vectors are kept in a separate pool. They are only
+        available for the design and dual spaces; state vectors are allocated
+        by the user, so single precision requests for them are served in
+        double precision.
+
         Parameters
         ----------
         count : int
             Number of vectors requested.
+        precision : str, optional
+            Storage precision of the vectors, ``'double'`` or ``'single'``.
         """
         if count < 1:
             raise ValueError('VectorFactory() >> ' +
                              'Cannot request less than 1 vector.')
-        self.num_vecs += count
+        if self._single(precision):
+            self.num_single += count
+        else:
+            self.num_vecs += count
+
+    def _single(self, precision):
+        if precision not in ['double', 'single']:
+            raise ValueError('VectorFactory() >> ' +
+                             'Unknown precision: %s'%precision)
+        return precision == 'single' and self._vec_type is not StateVector
 
-    def generate(self):
+    def generate(self, precision='double'):
         """
         Generate one abstract KonaVector of this vector factory's defined type.
 
+        Parameters
+        ----------
+        precision : str, optional
+            Storage precision of the vector, ``'double'`` or ``'single'``.
+
         Returns
         -------
         KonaVector
@@ -54,7 +79,8 @@ class VectorFactory(object):
         """
         if self._memory.allocated:
             try:
-                data = self._memory.pop_vector(self._vec_type)
+                data = self._memory.pop_vector(
+                    self._vec_type, single=self._single(precision))
             except IndexError:
                 raise MemoryError(
                     'No more vector memory available. ' +
@@ -64,22 +90,123 @@ class VectorFactory(object):
             raise RuntimeError('VectorFactory() >> ' +
                                'Must allocate memory before generating vector.')
 
+    @contextmanager
+    def borrow(self, count):
+        """
+        Context manager that generates the given number of vectors and
+        releases them back to the memory stack when the block exits.
+
+        This returns temporary vectors to memory deterministically, without
+        relying on garbage collection.
+
+        Parameters
+        ----------
+        count : int
+            Number of vectors to generate.
+
+        Yields
+        ------
+        list of KonaVector
+            Abstracted vectors linked to user generated memory.
+        """
+        vectors = [self.generate() for i in xrange(count)]
+        try:
+            yield vectors
+        finally:
+            for vector in vectors:
+                vector.release()
+
 class KonaFile(object):
+    """
+    Output stream wrapper that only writes on the root processor.
+
+    Parameters
+    ----------
+    filename : str, file or None
+        Name of the file to open, an already open stream, or ``None`` to
+        discard all output.
+    rank : int
+        Processor rank.
+    mode : str, optional
+        ``'unbuffered'`` writes every string through immediately,
+        ``'buffered'`` uses regular file buffering, and ``'async'`` hands the
+        strings to a background writer thread. Streams that were not opened by
+        this object are always written to directly.
+    queue_size : int, optional
+        Maximum number of pending strings in ``'async'`` mode.
 
-    def __init__(self, filename, rank):
+    Attributes
+    ----------
+    file : file or None
+        Underlying output stream.
+    """
+    def __init__(self, filename, rank, mode='unbuffered', queue_size=1024):
+        if mode not in ('unbuffered', 'buffered', 'async'):
+            raise ValueError('KonaFile() >> Invalid file mode: %s' % mode)
+        self._owner = False
+        self._queue = None
+        self._thread = None
         # only produce a file handle for the root processor
         if rank == 0:
             if isinstance(filename, str):
-                self.file = open(filename, 'w', 0)
+                if mode == 'unbuffered':
+                    self.file = open(filename, 'w', 0)
+                else:
+                    self.file = open(filename, 'w')
+                self._owner = True
             else:
                 self.file = filename
         else:
             self.file = None
+        # start the background writer
+        if self._owner and mode == 'async':
+            self._queue = Queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._writer)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _writer(self):
+        while True:
+            string = self._queue.get()
+            try:
+                if string is None:
+                    return
+                self.file.write(string)
+            finally:
+                self._queue.task_done()
 
     def write(self, string):
-        if self.file is not None:
+        if self._queue is not None:
+            self._queue.put(string)
+        elif self.file is not None:
             self.file.write(string)
 
+    def flush(self):
+        """
+        Write out all pending output.
+        """
+        if self._queue is not None:
+            self._queue.join()
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        """
+        Write out all pending output, stop the background writer and close the
+        file if it was opened by this object. Any further output is discarded.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+        if self.file is not None:
+            if self._owner:
+                self.file.close()
+                self.file = None
+            else:
+                self.file.flush()
+
 
 class KonaMemory(object):
     """
@@ -89,6 +216,18 @@ class KonaMemory(object):
     ----------
     solver : UserSolver
         A user-defined solver object that implements specific elementary tasks.
+    slab_alloc : boolean, optional
+        If ``True``, design and dual vectors are served as row views into one
+        contiguous 2-D array per vector type.
+    eval_cache_size : int, optional
+        Number of user function evaluations memoized at recent (design, state)
+        points. Zero, the default, disables the evaluation cache. The cache
+        relies on vector version stamps, so it must only be enabled if every
+        write to the user vector data outside of the ``KonaVector`` methods
+        is followed by ``KonaVector.touch()``.
+    file_mode : str, optional
+        Output mode for the files opened through ``open_file()``. See
+        ``KonaFile``.
 
     Attributes
     ----------
@@ -106,9 +245,44 @@ class KonaMemory(object):
         Memory stack for unused vector data.
     rank : int
         Processor rank.
+    slab_alloc : boolean
+        Flag for allocating design and dual vectors out of contiguous slabs.
+    slab : dict
+        2-D NumPy arrays backing each vector type when ``slab_alloc`` is set.
+    single_stack : dict
+        Memory stack for unused single precision vector data of the design
+        and dual spaces. These are never slab-backed.
+    stack_keys : dict
+        Set of keys for the data currently in each memory stack. Keys are
+        slab row indexes for slab-backed types, and object IDs otherwise.
+    num_allocated : dict
+        Number of vectors allocated for each vector type.
+    num_in_use : dict
+        Number of vectors of each type currently handed out to KonaVectors.
+    max_in_use : dict
+        High-water mark of ``num_in_use`` for each vector type.
+    lin_cache : collections.OrderedDict
+        Keys of the most recently activated linearization points, oldest first.
+    lin_cache_size : int
+        Maximum number of linearization points kept in ``lin_cache``.
+    eval_cache : collections.OrderedDict
+        Results of recent user function evaluations, least recently used
+        first, keyed on the function name and the evaluation point.
+    eval_cache_size : int
+        Maximum number of results kept in ``eval_cache``.
+    eval_hits : int
+        Number of user function evaluations served from ``eval_cache``.
+    file_mode : str
+        Output mode for the files opened through ``open_file()``.
+    files : list of KonaFile
+        Output streams opened through ``open_file()``.
+    krylov_stats : dict
+        Accumulated ``KrylovStats`` of all Krylov solves, keyed on the solver
+        name.
     """
 
-    def __init__(self, solver):
+    def __init__(self, solver, slab_alloc=False, eval_cache_size=0,
+                 file_mode='unbuffered'):
         # assign user object
         self.solver = solver
         self.ndv = solver.num_design
@@ -146,8 +320,50 @@ class KonaMemory(object):
         self.eq_factory = VectorFactory(self, DualVectorEQ)
         self.ineq_factory = VectorFactory(self, DualVectorINEQ)
 
+        # contiguous slab storage for the design and dual spaces
+        self.slab_alloc = slab_alloc
+        self.slab = {}
+        self._slab_vectors = {}
+
+        # single precision pools, indexed by object IDs in single_keys
+        self.single_stack = {
+            DesignVector : [],
+            DualVectorEQ : [],
+            DualVectorINEQ : [],
+        }
+        self.single_keys = {}
+        for vec_type in self.single_stack.keys():
+            self.single_keys[vec_type] = set()
+
+        # constant-time stack membership and pool usage counters
+        self.stack_keys = {}
+        self.num_allocated = {}
+        self.num_in_use = {}
+        self.max_in_use = {}
+        for vec_type in self.vector_stack.keys():
+            self.stack_keys[vec_type] = set()
+            self.num_allocated[vec_type] = 0
+            self.num_in_use[vec_type] = 0
+            self.max_in_use[vec_type] = 0
+
+        # recently used jacobian linearization points
+        self.lin_cache = OrderedDict()
+        self.lin_cache_size = 4
+        self._active_lin_key = None
+
+        # memoized user function evaluations
+        self.eval_cache = OrderedDict()
+        self.eval_cache_size = eval_cache_size
+        self.eval_hits = 0
+
+        # output streams
+        self.file_mode = file_mode
+        self.files = []
+        self._named_files = {}
+
         # cost tracking
         self.cost = 0
+        self.krylov_stats = {}
 
         self.allocated = False
 
@@ -163,10 +379,25 @@ class KonaMemory(object):
         user_data : BaseVector
             Unused user vector data container.
         """
-        if user_data not in self.vector_stack[vec_type]:
-            self.vector_stack[vec_type].append(user_data)
-
-    def pop_vector(self, vec_type):
+        if getattr(user_data, 'single_precision', False):
+            key = id(user_data)
+            if key not in self.single_keys[vec_type]:
+                self.single_keys[vec_type].add(key)
+                self.single_stack[vec_type].append(user_data)
+                self.num_in_use[vec_type] -= 1
+            return
+        if vec_type in self.slab:
+            key = user_data.slab_row
+            stack_item = key
+        else:
+            key = id(user_data)
+            stack_item = user_data
+        if key not in self.stack_keys[vec_type]:
+            self.stack_keys[vec_type].add(key)
+            self.vector_stack[vec_type].append(stack_item)
+            self.num_in_use[vec_type] -= 1
+
+    def pop_vector(self, vec_type, single=False):
         """
         Take an unused user vector object out of the memory stack and serve it
         to the vector factory.
@@ -175,6 +406,8 @@ class KonaMemory(object):
         ----------
         vec_type : KonaVector
             Vector type to be popped from the stack.
+        single : boolean, optional
+            Take the vector out of the single precision stack.
 
         Returns
         -------
@@ -184,8 +417,52 @@ class KonaMemory(object):
         if vec_type not in self.vector_stack.keys():
             raise TypeError('KonaMemory.pop_vector() >> ' +
                             'Unknown vector type!')
+
+        if single:
+            user_data = self.single_stack[vec_type].pop()
+            self.single_keys[vec_type].remove(id(user_data))
+        else:
+            user_data = self._pop_double(vec_type)
+        self.num_in_use[vec_type] += 1
+        self.max_in_use[vec_type] = max(
+            self.max_in_use[vec_type], self.num_in_use[vec_type])
+        return user_data
+
+    def _pop_double(self, vec_type):
+        stack_item = self.vector_stack[vec_type].pop()
+        if vec_type in self.slab:
+            self.stack_keys[vec_type].remove(stack_item)
+            user_data = self._slab_vectors[vec_type][stack_item]
         else:
-            return self.vector_stack[vec_type].pop()
+            self.stack_keys[vec_type].remove(id(stack_item))
+            user_data = stack_item
+        return user_data
+
+    def _allocate_slab(self, vec_type, size, num_vecs):
+        """
+        Reserve a single 2-D array for the given vector type, and wrap each of
+        its rows in a BaseVector that views the slab memory.
+
+        The memory stack for slab-backed types holds free row indexes instead
+        of BaseVector objects.
+
+        Parameters
+        ----------
+        vec_type : KonaVector
+            Vector type for the slab.
+        size : int
+            Length of each vector (number of slab columns).
+        num_vecs : int
+            Number of vectors (number of slab rows).
+        """
+        self.slab[vec_type] = np.zeros((num_vecs, size), dtype=float)
+        self._slab_vectors[vec_type] = []
+        for row in xrange(num_vecs):
+            user_data = BaseVector(0)
+            user_data.data = self.slab[vec_type][row]
+            user_data.slab_row = row
+            self._slab_vectors[vec_type].append(user_data)
+        self.vector_stack[vec_type] = range(num_vecs)
 
     def allocate_memory(self):
         """
@@ -199,20 +476,186 @@ class KonaMemory(object):
         if self.allocated:
             raise RuntimeError('Memory already allocated, can-not re-allocate')
 
-        self.vector_stack[DesignVector] = \
-            [BaseVector(self.ndv) for i in range(self.primal_factory.num_vecs)]
+        if self.slab_alloc:
+            self._allocate_slab(
+                DesignVector, self.ndv, self.primal_factory.num_vecs)
+            self._allocate_slab(
+                DualVectorEQ, self.neq, self.eq_factory.num_vecs)
+            self._allocate_slab(
+                DualVectorINEQ, self.nineq, self.ineq_factory.num_vecs)
+        else:
+            self.vector_stack[DesignVector] = \
+                [BaseVector(self.ndv)
+                 for i in range(self.primal_factory.num_vecs)]
+            self.vector_stack[DualVectorEQ] = \
+                [BaseVector(self.neq)
+                 for i in range(self.eq_factory.num_vecs)]
+            self.vector_stack[DualVectorINEQ] = \
+                [BaseVector(self.nineq)
+                 for i in range(self.ineq_factory.num_vecs)]
         self.vector_stack[StateVector] = \
             self.solver.allocate_state(self.state_factory.num_vecs)
-        self.vector_stack[DualVectorEQ] = \
-            [BaseVector(self.neq) for i in range(self.eq_factory.num_vecs)]
-        self.vector_stack[DualVectorINEQ] = \
-            [BaseVector(self.nineq) for i in range(self.ineq_factory.num_vecs)]
+
+        # single precision vectors for the design and dual spaces
+        sizes = {
+            DesignVector : (self.ndv, self.primal_factory.num_single),
+            DualVectorEQ : (self.neq, self.eq_factory.num_single),
+            DualVectorINEQ : (self.nineq, self.ineq_factory.num_single),
+        }
+        for vec_type, (size, num_vecs) in sizes.items():
+            stack = []
+            for i in xrange(num_vecs):
+                user_data = BaseVector(size, dtype=np.float32)
+                user_data.single_precision = True
+                stack.append(user_data)
+            self.single_stack[vec_type] = stack
+            self.single_keys[vec_type] = set(id(data) for data in stack)
+
+        # index the memory stacks for constant-time membership checks
+        for vec_type, stack in self.vector_stack.items():
+            if vec_type in self.slab:
+                self.stack_keys[vec_type] = set(stack)
+            else:
+                self.stack_keys[vec_type] = set(id(data) for data in stack)
+            self.num_allocated[vec_type] = len(stack)
+        for vec_type, stack in self.single_stack.items():
+            self.num_allocated[vec_type] += len(stack)
 
         self.allocated = True
 
+    def add_krylov_stats(self, stats):
+        """
+        Accumulate the statistics of a Krylov solve in ``krylov_stats``.
+
+        Parameters
+        ----------
+        stats : KrylovStats
+            Statistics of the solve.
+        """
+        if stats.solver in self.krylov_stats:
+            self.krylov_stats[stats.solver].add(stats)
+        else:
+            self.krylov_stats[stats.solver] = copy.copy(stats)
+
+    def activate_linearization(self, design, state):
+        """
+        Make sure the user solver knows the (design, state) point at which the
+        next jacobian products and linear solves are evaluated.
+
+        The solver is notified through ``UserSolver.linearization_changed()``
+        only when the point differs from the previously activated one.
+
+        Parameters
+        ----------
+        design : DesignVector
+            Design point of the linearization.
+        state : StateVector
+            State point of the linearization.
+        """
+        key = (id(design), design.version, id(state), state.version)
+        if key == self._active_lin_key:
+            return
+        self._active_lin_key = key
+        cached = key in self.lin_cache
+        if cached:
+            del self.lin_cache[key]
+        self.lin_cache[key] = None
+        while len(self.lin_cache) > self.lin_cache_size:
+            self.lin_cache.popitem(last=False)
+        self.solver.linearization_changed(
+            design.base.data, state.base, key, cached)
+
+    def get_eval(self, name, at_design, at_state):
+        """
+        Look up the result of a user function evaluation in the cache.
+
+        Parameters
+        ----------
+        name : str
+            Name of the user function.
+        at_design : DesignVector
+            Design point of the evaluation.
+        at_state : StateVector
+            State point of the evaluation.
+
+        Returns
+        -------
+        key : tuple
+            Cache key for the evaluation, to be passed to ``store_eval()``.
+        value : object or None
+            Cached result, or ``None`` if the evaluation is not cached.
+        """
+        key = (name, id(at_design), at_design.version,
+               id(at_state), at_state.version)
+        value = self.eval_cache.pop(key, None)
+        if value is not None:
+            # re-insert to mark the entry as most recently used
+            self.eval_cache[key] = value
+            self.eval_hits += 1
+        return key, value
+
+    def store_eval(self, key, value):
+        """
+        Store the result of a user function evaluation in the cache, evicting
+        the least recently used results if the cache is full.
+
+        Parameters
+        ----------
+        key : tuple
+            Cache key returned by ``get_eval()``.
+        value : object
+            Result of the evaluation. Arrays must not be modified afterwards.
+        """
+        if self.eval_cache_size <= 0:
+            return
+        self.eval_cache[key] = value
+        while len(self.eval_cache) > self.eval_cache_size:
+            self.eval_cache.popitem(last=False)
+
     def open_file(self, filename):
-        return KonaFile(filename, self.rank)
+        """
+        Open an output stream on the root processor. Opening the same file
+        name more than once returns the same stream.
+
+        Parameters
+        ----------
+        filename : str, file or None
+            Name of the file, an already open stream, or ``None`` to discard
+            all output.
+
+        Returns
+        -------
+        KonaFile
+        """
+        if isinstance(filename, str) and filename in self._named_files:
+            return self._named_files[filename]
+        out_file = KonaFile(filename, self.rank, mode=self.file_mode)
+        if isinstance(filename, str):
+            self._named_files[filename] = out_file
+        self.files.append(out_file)
+        return out_file
+
+    def flush_files(self):
+        """
+        Write out the pending output of all open streams.
+        """
+        for out_file in self.files:
+            out_file.flush()
+
+    def close_files(self):
+        """
+        Flush and close all streams opened through ``open_file()``.
+        """
+        for out_file in self.files:
+            out_file.close()
+        self.files = []
+        self._named_files = {}
 
 # imports at the bottom to prevent circular errors
+import copy
+import Queue
+import threading
+import numpy as np
+from collections import OrderedDict
 from kona.user import BaseVector, UserSolver, UserSolverIDF
 from kona.linalg.vectors.common import *
\ No newline at end of file
@@ -1,6 +1,11 @@
 import basic
 from stcg import STCG
+from gltr import GLTR
 from flecs import FLECS
 from fgmres import FGMRES
 from gcrot import GCROT
+from block_fgmres import BlockFGMRES
 from line_search_cg import LineSearchCG
+from basic import KrylovStats
+from registry import \
+    KRYLOV_SOLVERS, register_krylov_solver, get_krylov_solver
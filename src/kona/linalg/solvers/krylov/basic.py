@@ -1,4 +1,172 @@
+from contextlib import contextmanager
+from functools import wraps
+from timeit import default_timer
+
 from kona.options import get_opt
+from kona.linalg.solvers.util import EPS
+
+class KrylovStats(object):
+    """
+    Counters and timers for Krylov solves.
+
+    Every solve fills one of these in ``KrylovSolver.stats``, and
+    ``KonaMemory.krylov_stats`` accumulates them for each solver class.
+
+    Parameters
+    ----------
+    solver : str
+        Name of the Krylov solver.
+
+    Attributes
+    ----------
+    solver : str
+        Name of the Krylov solver.
+    num_solves : int
+        Number of solves recorded.
+    iters : int
+        Number of Krylov iterations.
+    num_matvec : int
+        Number of matrix-vector products.
+    num_precond : int
+        Number of preconditioner applications.
+    time_total : float
+        Wall time spent in the solver, in seconds.
+    time_matvec : float
+        Wall time spent in matrix-vector products.
+    time_precond : float
+        Wall time spent in the preconditioner.
+    time_orthog : float
+        Wall time spent orthogonalizing the subspace.
+    time_dense : float
+        Wall time spent on the dense reduced-space problems.
+    res_est : float
+        Final residual norm estimated by the solver, for the latest solve.
+    res_true : float or None
+        Final residual norm computed explicitly, for the latest solve. This
+        is ``None`` unless the solver checks its residual.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.num_solves = 0
+        self.iters = 0
+        self.num_matvec = 0
+        self.num_precond = 0
+        self.time_total = 0.
+        self.time_matvec = 0.
+        self.time_precond = 0.
+        self.time_orthog = 0.
+        self.time_dense = 0.
+        self.res_est = None
+        self.res_true = None
+
+    @property
+    def time_other(self):
+        """
+        Wall time not attributed to any other timer (vector updates, output).
+        """
+        return self.time_total - self.time_matvec - self.time_precond - \
+            self.time_orthog - self.time_dense
+
+    @contextmanager
+    def timing(self, name):
+        """
+        Context manager that adds the wall time of the block to the
+        ``time_<name>`` timer.
+        """
+        start = default_timer()
+        try:
+            yield
+        finally:
+            attr = 'time_' + name
+            setattr(self, attr, getattr(self, attr) + default_timer() - start)
+
+    def add(self, other):
+        """
+        Accumulate the counters of another set of statistics. The residuals
+        are replaced by the ones of ``other``.
+
+        Parameters
+        ----------
+        other : KrylovStats
+        """
+        self.num_solves += other.num_solves
+        self.iters += other.iters
+        self.num_matvec += other.num_matvec
+        self.num_precond += other.num_precond
+        self.time_total += other.time_total
+        self.time_matvec += other.time_matvec
+        self.time_precond += other.time_precond
+        self.time_orthog += other.time_orthog
+        self.time_dense += other.time_dense
+        self.res_est = other.res_est
+        self.res_true = other.res_true
+
+    def __str__(self):
+        return '%s: %i solves, %i iters, %i mat-vecs, %i precond; ' % (
+            self.solver, self.num_solves, self.iters, self.num_matvec,
+            self.num_precond) + \
+            'time %.3e s (mat-vec %.3e, precond %.3e, orthog %.3e, ' % (
+                self.time_total, self.time_matvec, self.time_precond,
+                self.time_orthog) + \
+            'dense %.3e, other %.3e)' % (self.time_dense, self.time_other)
+
+class _TimedProduct(object):
+    """
+    Wrapper that counts and times the calls to a matrix-vector product or a
+    preconditioner. Other attributes are looked up on the wrapped function,
+    so the matrix behind a bound method is still reachable via ``__self__``.
+    """
+
+    def __init__(self, func, stats, name):
+        self.func = func
+        self.stats = stats
+        self.name = name
+
+    def __call__(self, in_vec, out_vec):
+        self._apply(self.func, 1, in_vec, out_vec)
+
+    def block(self, func, in_vecs, out_vecs):
+        # apply a block version of the product to several vectors at once
+        self._apply(func, len(in_vecs), in_vecs, out_vecs)
+
+    def _apply(self, func, count, *args):
+        with self.stats.timing(self.name):
+            func(*args)
+        attr = 'num_' + self.name
+        setattr(self.stats, attr, getattr(self.stats, attr) + count)
+
+    def __getattr__(self, attr):
+        return getattr(self.__dict__['func'], attr)
+
+def record_stats(solve):
+    """
+    Decorator for the solve methods of Krylov solvers.
+
+    The products and the preconditioner are counted and timed into a new
+    ``KrylovStats`` stored in ``self.stats``, which is then accumulated on
+    ``KonaMemory``. The solver itself fills in the iteration count, the
+    residuals and the orthogonalization and dense timers. Solves nested in
+    another recorded solve of the same object are not recorded separately.
+    """
+    @wraps(solve)
+    def wrapper(self, mat_vec, b, x, precond=None):
+        if self._recording:
+            return solve(self, mat_vec, b, x, precond)
+        self.stats = KrylovStats(type(self).__name__)
+        self.stats.num_solves = 1
+        mat_vec = _TimedProduct(mat_vec, self.stats, 'matvec')
+        if precond is not None:
+            precond = _TimedProduct(precond, self.stats, 'precond')
+        self._recording = True
+        start = default_timer()
+        try:
+            return solve(self, mat_vec, b, x, precond)
+        finally:
+            self._recording = False
+            self.stats.time_total = default_timer() - start
+            self._memory.add_krylov_stats(self.stats)
+    return wrapper
 
 class KrylovSolver(object):
     """
@@ -19,9 +187,23 @@ class KrylovSolver(object):
         Relative residual tolerance for the solution.
     check_res : boolean
         Flag for checking the residual after solution is found
-    out_file : file
-        File stream for writing convergence data.
+    basis_precision : str
+        Storage precision of the Krylov basis vectors, ``'double'`` or
+        ``'single'``, for the solvers that keep a basis. Inner products and
+        the dense reduced-space arithmetic stay in double precision.
+    out_file : KonaFile
+        File stream for writing convergence data. Setting the ``krylov_file``
+        option to ``None`` turns the convergence log off.
+    stats : KrylovStats
+        Counters and timers of the latest solve.
+    capabilities : tuple of str
+        Roles the solver can fill in the optimization algorithms; see
+        ``get_krylov_solver()``.
     """
+
+    _recording = False
+    capabilities = ()
+
     def __init__(self, vector_factory, optns=None):
         # save the vector factory
         self.vec_fac = vector_factory
@@ -37,21 +219,28 @@ class KrylovSolver(object):
         self.max_iter = get_opt(self.optns, 10, 'subspace_size')
         self.rel_tol = get_opt(self.optns, 1e-6, 'rel_tol')
         self.check_res = get_opt(self.optns, True, 'check_res')
+        self.basis_precision = get_opt(
+            self.optns, 'double', 'basis_precision')
+
+        # statistics of the latest solve
+        self.stats = KrylovStats(type(self).__name__)
+        try:
+            self._memory = self.vec_fac._memory
+        except Exception:
+            self._memory = self.vec_fac[0]._memory
 
         # set up the info file
         self.out_file = get_opt(self.optns, 'kona_krylov.dat', 'krylov_file')
-        if isinstance(self.out_file, str):
-            try:
-                _memory = self.vec_fac._memory
-            except Exception:
-                _memory = self.vec_fac[0]._memory
-            self.out_file = _memory.open_file(self.out_file)
+        if self.out_file is None or isinstance(self.out_file, str):
+            self.out_file = self._memory.open_file(self.out_file)
 
     def _validate_options(self):
         if self.max_iter < 1:
             raise ValueError('max_iter must be greater than one')
         if self.rel_tol <= 0:
             raise ValueError('max_iter must be greater than zero')
+        if self.basis_precision not in ['double', 'single']:
+            raise ValueError('basis_precision must be double or single')
 
     def solve(self, mat_vec, b, x, precond):
         """
@@ -69,3 +258,105 @@ class KrylovSolver(object):
             Matrix-vector product for approximate inv(A).
         """
         raise NotImplementedError
+
+    def solve_multi(self, mat_vec, b_vecs, x_vecs, precond):
+        """
+        Solves the :math:`Ax_k=b_k` linear systems for several right-hand
+        sides.
+
+        Block solvers override this to build one subspace for all the
+        right-hand sides; by default, the systems are solved one at a time.
+
+        Parameters:
+        -----------
+        mat_vec : function
+            Matrix-vector product for left-hand side matrix A.
+        b_vecs : list of KonaVector
+            Right-hand side vectors.
+        x_vecs : list of KonaVector
+            Solution vectors.
+        precond : function
+            Matrix-vector product for approximate inv(A).
+
+        Returns
+        -------
+        list
+            Output of ``solve()`` for each right-hand side.
+        """
+        assert len(b_vecs) == len(x_vecs), \
+            "Number of RHS and solution vectors do not match!"
+        return [self.solve(mat_vec, b, x, precond)
+                for b, x in zip(b_vecs, x_vecs)]
+
+    def _block_product(self, mat_vec, in_vecs, out_vecs):
+        """
+        Applies ``mat_vec`` to a block of vectors.
+
+        If the object behind ``mat_vec`` has a method of the same name with a
+        ``_block`` suffix (e.g.: ``product_block`` for ``product``), it is
+        used for the whole block, which lets the matrix batch the linear
+        solves inside its products. Otherwise the products are done one at a
+        time.
+
+        Parameters
+        ----------
+        mat_vec : function
+            Matrix-vector product used by the solver.
+        in_vecs : list of KonaVector
+            Vectors to be multiplied.
+        out_vecs : list of KonaVector
+            Results of the products.
+        """
+        owner = getattr(mat_vec, '__self__', None)
+        name = getattr(mat_vec, '__name__', '')
+        block = getattr(owner, name + '_block', None)
+        if block is not None:
+            if isinstance(mat_vec, _TimedProduct):
+                mat_vec.block(block, in_vecs, out_vecs)
+            else:
+                block(in_vecs, out_vecs)
+        else:
+            for in_vec, out_vec in zip(in_vecs, out_vecs):
+                mat_vec(in_vec, out_vec)
+
+    def _set_product_tol(self, mat_vec, res, norm0):
+        """
+        Tells the matrix behind ``mat_vec`` how accurate the next products
+        need to be.
+
+        Following inexact Krylov theory, the product error can grow like
+        :math:`\|r_0\|/\|r_k\|` without spoiling the final residual, so the
+        requested relative tolerance is
+        ``rel_tol*norm0/(subspace_size*res)``. Matrices without a
+        ``set_product_tol()`` method are left alone.
+
+        Parameters
+        ----------
+        mat_vec : function
+            Matrix-vector product used by the solver.
+        res : float or None
+            Current residual norm. ``None`` restores the fixed tolerances.
+        norm0 : float
+            Reference residual norm.
+        """
+        matrix = getattr(mat_vec, '__self__', None)
+        if not hasattr(matrix, 'set_product_tol'):
+            return
+        if res is None:
+            matrix.set_product_tol(None)
+        else:
+            matrix.set_product_tol(
+                self.rel_tol*norm0/(self.max_iter*max(res, EPS)))
+
+    def _record(self, iters, res_est, res_true=None):
+        # store the outcome of the current solve in the statistics
+        self.stats.iters = iters
+        self.stats.res_est = res_est
+        self.stats.res_true = res_true
+
+    def release_workspace(self):
+        """
+        Hand any persistent work vectors back to memory. Solvers that keep a
+        workspace between solves override this.
+        """
+        pass
@@ -0,0 +1,212 @@
+from kona.linalg.solvers.krylov.basic import record_stats
+from kona.linalg.solvers.krylov.fgmres import FGMRES
+
+class BlockFGMRES(FGMRES):
+    """
+    Block variant of the Flexible Generalized Minimum RESidual solver.
+
+    ``solve_multi()`` builds a single block Krylov subspace for up to
+    ``block_size`` right-hand sides, so every Arnoldi step multiplies a whole
+    block of vectors. Matrices that provide a block product (see
+    ``KrylovSolver._block_product()``) can batch the linear solves inside
+    those products. The residual of each right-hand side is monitored
+    separately, and the iterations stop once all of them have converged.
+
+    Single right-hand sides are solved by the inherited ``solve()``.
+
+    Attributes
+    ----------
+    block_size : int
+        Maximum number of right-hand sides solved together.
+    """
+
+    def __init__(self, vector_factory, optns=None,
+                 eq_factory=None, ineq_factory=None):
+        super(BlockFGMRES, self).__init__(
+            vector_factory, optns, eq_factory, ineq_factory)
+
+        self.block_size = get_opt(self.optns, 2, 'block_size')
+
+        # put in memory request for the block subspace, stored in the basis
+        # precision, and the residuals in double
+        num_vecs = self.block_size*(2*self.max_iter + 1)
+        precision = self.basis_precision
+        self.vec_fac.request_num_vectors(num_vecs, precision)
+        self.vec_fac.request_num_vectors(self.block_size)
+        if self.eq_fac is not None:
+            self.eq_fac.request_num_vectors(num_vecs, precision)
+            self.eq_fac.request_num_vectors(self.block_size)
+        if self.ineq_fac is not None:
+            self.ineq_fac.request_num_vectors(2*num_vecs, precision)
+            self.ineq_fac.request_num_vectors(2*self.block_size)
+
+    def _validate_options(self):
+        super(BlockFGMRES, self)._validate_options()
+        if self.block_size < 1:
+            raise ValueError('block_size must be greater than zero')
+
+    def _orthonormalize(self, w, basis, col, H):
+        # orthonormalize w against the basis, storing the coefficients and
+        # the norm in column col of H; a dependent vector is zeroed instead
+        nrm0 = w.norm2
+        row = len(basis)
+        try:
+            mod_gram_schmidt(col, H, basis, w)
+            nrm = w.norm2
+        except numpy.linalg.LinAlgError:
+            nrm = 0.0
+        if nrm <= 1e-12*nrm0 or nrm <= EPS:
+            w.equals(0.0)
+            H[row, col] = 0.0
+            return False
+        w.divide_by(nrm)
+        H[row, col] = nrm
+        return True
+
+    @record_stats
+    def solve_multi(self, mat_vec, b_vecs, x_vecs, precond):
+        """
+        Solves the :math:`Ax_k=b_k` linear systems together, in blocks of up
+        to ``block_size`` right-hand sides.
+
+        Parameters:
+        -----------
+        mat_vec : function
+            Matrix-vector product for left-hand side matrix A.
+        b_vecs : list of KonaVector
+            Right-hand side vectors.
+        x_vecs : list of KonaVector
+            Solution vectors; used as initial guesses.
+        precond : function
+            Matrix-vector product for approximate inv(A).
+
+        Returns
+        -------
+        list of tuple
+            Number of iterations needed by each right-hand side, and its
+            final residual norm.
+        """
+        self._validate_options()
+        assert len(b_vecs) == len(x_vecs), \
+            "Number of RHS and solution vectors do not match!"
+        out = []
+        for start in xrange(0, len(b_vecs), self.block_size):
+            end = start + self.block_size
+            out += self._solve_block(
+                mat_vec, b_vecs[start:end], x_vecs[start:end], precond)
+        self._record(max(iters for iters, _ in out),
+                     max(beta for _, beta in out))
+        return out
+
+    def _solve_block(self, mat_vec, b_vecs, x_vecs, precond):
+        s = len(b_vecs)
+        m = self.max_iter
+
+        # generate the block subspace
+        precision = self.basis_precision
+        W = [[self._generate_vector(precision) for k in xrange(s)]
+             for j in xrange(m + 1)]
+        Z = [[self._generate_vector(precision) for k in xrange(s)]
+             for j in xrange(m)]
+        res_vecs = [self._generate_vector() for k in xrange(s)]
+        basis = []
+
+        # block Hessenberg matrix and RHS of the least-squares problem
+        H = numpy.zeros(((m + 1)*s, m*s))
+        G = numpy.zeros(((m + 1)*s, s))
+
+        # calculate and store the initial residuals
+        self._block_product(mat_vec, x_vecs, res_vecs)
+        norm0 = numpy.zeros(s)
+        for k in xrange(s):
+            res_vecs[k].equals_ax_p_by(1.0, b_vecs[k], -1.0, res_vecs[k])
+            W[0][k].equals(res_vecs[k])
+            norm0[k] = b_vecs[k].norm2
+        beta = numpy.array([res_vecs[k].norm2 for k in xrange(s)])
+        iters = numpy.zeros(s, dtype=int)
+        converged = (beta <= self.rel_tol*norm0) | (beta < self.abs_tol)
+
+        # orthonormalize the initial residuals; G holds their coefficients
+        for k in xrange(s):
+            self._orthonormalize(W[0][k], basis, k, G)
+            basis.append(W[0][k])
+
+        # output header information
+        self.out_file.write(
+            '# Block FGMRES residual history, %i right-hand sides\n'%s +
+            '# residual tolerance target = %e\n'%self.rel_tol +
+            '# basis precision           = %s\n'%precision +
+            '# iters' + ' '*5 + 'rel. res. of each right-hand side\n')
+        self._write_block_history(0, beta, norm0)
+
+        num_cols = 0
+        for j in xrange(m):
+            if numpy.all(converged):
+                break
+
+            # precondition the current block and add the next one
+            for k in xrange(s):
+                precond(W[j][k], Z[j][k])
+            self._block_product(mat_vec, Z[j], W[j+1])
+
+            # block Arnoldi step
+            with self.stats.timing('orthog'):
+                for k in xrange(s):
+                    self._orthonormalize(W[j+1][k], basis, j*s + k, H)
+                    basis.append(W[j+1][k])
+            num_cols = (j + 1)*s
+
+            # solve the least-squares problem for all right-hand sides and
+            # get the residual norms
+            rows = num_cols + s
+            with self.stats.timing('dense'):
+                Y, _, _, _ = numpy.linalg.lstsq(
+                    H[:rows, :num_cols], G[:rows], rcond=-1)
+                res = G[:rows] - H[:rows, :num_cols].dot(Y)
+                beta = numpy.sqrt(numpy.sum(res**2, axis=0))
+            for k in xrange(s):
+                if not converged[k]:
+                    iters[k] = j + 1
+            converged = (beta <= self.rel_tol*norm0) | (beta < self.abs_tol)
+            self._write_block_history(j + 1, beta, norm0)
+
+        # update the solutions
+        if num_cols > 0:
+            Z_flat = [vec for block in Z[:num_cols//s] for vec in block]
+            for k in xrange(s):
+                x_vecs[k].multi_axpy(Y[:, k], Z_flat)
+
+        if self.check_res:
+            # recalculate explicitly and check final residuals
+            self._block_product(mat_vec, x_vecs, res_vecs)
+            for k in xrange(s):
+                res_vecs[k].equals_ax_p_by(1.0, b_vecs[k], -1.0, res_vecs[k])
+                true_res = res_vecs[k].norm2
+                self.out_file.write(
+                    '# Block FGMRES final (true) residual %i : '%k +
+                    '|res|/|res0| = %e\n'%(true_res/max(norm0[k], EPS)))
+                if abs(true_res - beta[k]) > 0.01*self.rel_tol*norm0[k]:
+                    self.out_file.write(
+                        '# WARNING in Block FGMRES: true residual norm and ' +
+                        'calculated residual norm do not agree.\n' +
+                        '# (res - beta)/res0 = %e\n'%(
+                            (true_res - beta[k])/max(norm0[k], EPS)))
+                beta[k] = true_res
+
+        # release the block subspace back to memory
+        for block in W + Z + [res_vecs]:
+            for vector in block:
+                vector.release()
+
+        return [(iters[k], beta[k]) for k in xrange(s)]
+
+    def _write_block_history(self, num_iter, beta, norm0):
+        self.out_file.write(
+            ' %6i'%num_iter + ' '*5 +
+            ' '.join(['%e'%(beta[k]/max(norm0[k], EPS))
+                      for k in xrange(len(beta))]) + '\n')
+
+# imports here to prevent circular errors
+import numpy
+from kona.options import get_opt
+from kona.linalg.solvers.util import EPS, mod_gram_schmidt
@@ -1,10 +1,34 @@
-from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
 
 class FGMRES(KrylovSolver):
     """
     Flexible Generalized Minimum RESidual solver.
+
+    The subspace vectors and the least-squares work arrays are generated at
+    the first solve and reused by all subsequent solves, until they are handed
+    back to memory with ``release_workspace()``.
+
+    With ``max_outer`` larger than one, the solver is restarted after every
+    ``subspace_size`` iterations, FGMRES(m). If ``deflation`` is positive, the
+    restarts keep that many harmonic Ritz vectors of the previous cycle in the
+    subspace (flexible GMRES-DR), which recovers most of the convergence lost
+    to restarting when the slow modes are few.
+
+    The residual is always formed in double precision. With a single
+    precision basis and no deflation, every cycle ends with the true residual
+    and the next one restarts from it, so that the solution keeps improving
+    below the accuracy of the basis (iterative refinement).
+
+    Attributes
+    ----------
+    max_outer : int
+        Maximum number of restart cycles.
+    num_deflate : int
+        Number of harmonic Ritz vectors kept between restart cycles.
     """
 
+    capabilities = ('linear',)
+
     def __init__(self, vector_factory, optns=None,
                  eq_factory=None, ineq_factory=None):
         super(FGMRES, self).__init__(vector_factory, optns)
@@ -14,165 +38,358 @@ class FGMRES(KrylovSolver):
         self.abs_tol = get_opt(self.optns, 1e-12, 'abs_tol')
         self.check_LSgrad = get_opt(self.optns, False, 'check_LSgrad')
 
-        # put in memory request
-        self.vec_fac.request_num_vectors(2*self.max_iter + 1)
+        # get restart options
+        self.max_outer = get_opt(self.optns, 1, 'max_outer')
+        self.num_deflate = get_opt(self.optns, 0, 'deflation')
+
+        # put in memory request; the subspace is stored in the basis
+        # precision, and the residual in double
+        num_vecs = 2*self.max_iter + 1
+        if self.num_deflate > 0:
+            num_vecs += self.num_deflate + 1
+        precision = self.basis_precision
+        self.vec_fac.request_num_vectors(num_vecs, precision)
+        self.vec_fac.request_num_vectors(1)
         self.eq_fac = eq_factory
         self.ineq_fac = ineq_factory
         if self.eq_fac is not None:
-            self.eq_fac.request_num_vectors(2*self.max_iter + 1)
+            self.eq_fac.request_num_vectors(num_vecs, precision)
+            self.eq_fac.request_num_vectors(1)
         if self.ineq_fac is not None:
-            self.ineq_fac.request_num_vectors(4*self.max_iter + 2)
+            self.ineq_fac.request_num_vectors(2*num_vecs, precision)
+            self.ineq_fac.request_num_vectors(2)
+
+        # persistent workspace, generated at the first solve
+        self._W = None
+        self._Z = None
+        self._V = None
+        self._res = None
+
+    def _validate_options(self):
+        super(FGMRES, self)._validate_options()
+        if self.max_outer < 1:
+            raise ValueError('max_outer must be greater than zero')
+        if self.num_deflate < 0 or self.num_deflate >= self.max_iter:
+            raise ValueError(
+                'deflation must be non-negative and less than subspace_size')
 
-    def _generate_vector(self):
+    def _generate_vector(self, precision='double'):
         # if there are no constraints, just return design vectors
         if self.eq_fac is None and self.ineq_fac is None:
-            return self.vec_fac.generate()
+            return self.vec_fac.generate(precision)
         # this is for only inequality constraints
         elif self.eq_fac is None:
-            design = self.vec_fac.generate()
-            slack = self.ineq_fac.generate()
+            design = self.vec_fac.generate(precision)
+            slack = self.ineq_fac.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual = self.ineq_fac.generate()
+            dual = self.ineq_fac.generate(precision)
             return ReducedKKTVector(primal, dual)
         # this is for only equality constraints
         elif self.ineq_fac is None:
-            primal = self.vec_fac.generate()
-            dual = self.eq_fac.generate()
+            primal = self.vec_fac.generate(precision)
+            dual = self.eq_fac.generate(precision)
             return ReducedKKTVector(primal, dual)
         # and finally, this is for both types of constraints
         else:
-            design = self.vec_fac.generate()
-            slack = self.ineq_fac.generate()
+            design = self.vec_fac.generate(precision)
+            slack = self.ineq_fac.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual_eq = self.eq_fac.generate()
-            dual_ineq = self.ineq_fac.generate()
+            dual_eq = self.eq_fac.generate(precision)
+            dual_ineq = self.ineq_fac.generate(precision)
             dual = CompositeDualVector(dual_eq, dual_ineq)
             return ReducedKKTVector(primal, dual)
 
+    def _get_workspace(self):
+        # generate the subspace vectors and work arrays on first use
+        if self._W is None:
+            precision = self.basis_precision
+            self._W = [self._generate_vector(precision)
+                       for i in xrange(self.max_iter + 1)]
+            self._Z = [self._generate_vector(precision)
+                       for i in xrange(self.max_iter)]
+            # scratch vectors for forming the deflated basis at restarts
+            if self.num_deflate > 0:
+                self._V = [self._generate_vector(precision)
+                           for i in xrange(self.num_deflate + 1)]
+            else:
+                self._V = []
+            self._res = self._generate_vector()
+            self._y = numpy.zeros(self.max_iter)
+            self._g = numpy.zeros(self.max_iter + 1)
+            self._c = numpy.zeros(self.max_iter + 1)
+            self._Q = numpy.eye(self.max_iter + 1)
+            self._H = numpy.zeros((self.max_iter + 1, self.max_iter))
+            self._Hbar = numpy.zeros((self.max_iter + 1, self.max_iter))
+        return self._W, self._Z, self._V, self._res
+
+    def release_workspace(self):
+        """
+        Hand the subspace vectors back to memory. A new workspace is generated
+        at the next solve.
+        """
+        if self._W is not None:
+            for vector in self._W + self._Z + self._V + [self._res]:
+                vector.release()
+            self._W = None
+            self._Z = None
+            self._V = None
+            self._res = None
+
+    def _reset_reduced(self):
+        # clear the reduced least-squares problem and the accumulated Givens
+        # rotations
+        for array in [self._y, self._g, self._H, self._Hbar]:
+            array.fill(0.)
+        self._Q[:, :] = numpy.eye(self.max_iter + 1)
+
+    def _restart(self, m, W, Z, V):
+        """
+        Compress the subspace of a complete cycle into the starting subspace
+        of the next cycle, and reset the reduced least-squares problem.
+
+        The next cycle starts from the deflation vectors (if any) and the
+        current residual, so that the Arnoldi relation
+
+        .. math:: A Z_k = W_{k+1} \\bar{H}_k
+
+        holds for the kept vectors. The reduced matrix is triangularized by
+        rotating the basis, so the cycle can continue with Givens rotations.
+
+        Parameters
+        ----------
+        m : int
+            Number of columns built in the completed cycle.
+        W, Z, V : list of KonaVector
+            Subspace, preconditioned subspace and scratch vectors.
+
+        Returns
+        -------
+        int
+            Number of deflation vectors kept in the new subspace.
+        """
+        y = self._y
+        g = self._g
+        H = self._H
+        Hbar = self._Hbar
+        # residual of the cycle in the coordinates of W
+        res = self._c[:m+1] - Hbar[:m+1, :m].dot(y[:m])
+        res_norm = numpy.linalg.norm(res)
+        if self.num_deflate > 0:
+            G = harmonic_ritz(Hbar[:m+1, :m], self.num_deflate)
+        else:
+            G = numpy.zeros((m, 0))
+        k = G.shape[1]
+
+        if k == 0:
+            # plain restart from the residual, formed in place
+            coeffs = res/res_norm
+            W[0].times(coeffs[0])
+            W[0].multi_axpy(coeffs[1:], W[1:m+1])
+            self._reset_reduced()
+            g[0] = res_norm
+            return 0
+
+        # orthonormal basis of the kept directions and the residual
+        P = numpy.zeros((m+1, k+1))
+        P[:m, :k] = G
+        P[:, k] = res
+        P, _ = numpy.linalg.qr(P)
+        # project the Hessenberg matrix and triangularize it
+        Q, R = numpy.linalg.qr(
+            P.T.dot(Hbar[:m+1, :m]).dot(P[:m, :k]), mode='complete')
+        T = P.dot(Q)
+        # form the new bases in the scratch vectors and swap them in
+        for j in xrange(k+1):
+            V[j].equals(0.)
+            V[j].multi_axpy(T[:, j], W[:m+1])
+        for j in xrange(k+1):
+            W[j], V[j] = V[j], W[j]
+        for j in xrange(k):
+            V[j].equals(0.)
+            V[j].multi_axpy(P[:m, j], Z[:m])
+        for j in xrange(k):
+            Z[j], V[j] = V[j], Z[j]
+        # reduced problem in the new basis
+        self._reset_reduced()
+        H[:k, :k] = R[:k, :]
+        Hbar[:k, :k] = R[:k, :]
+        g[:k+1] = T.T.dot(res)
+        return k
+
+    @record_stats
     def solve(self, mat_vec, b, x, precond):
         # validate solver options
         self._validate_options()
 
         # initialize some work data
-        W = []
-        Z = []
-        y = numpy.zeros(self.max_iter)
-        g = numpy.zeros(self.max_iter + 1)
-        rLS = numpy.zeros(self.max_iter)
-        sn = numpy.zeros(self.max_iter + 1)
-        cn = numpy.zeros(self.max_iter + 1)
-        H = numpy.zeros((self.max_iter + 1, self.max_iter))
+        W, Z, V, res = self._get_workspace()
+        y = self._y
+        g = self._g
+        c = self._c
+        Q = self._Q
+        H = self._H
+        Hbar = self._Hbar
+        self._reset_reduced()
         iters = 0
 
         # calculate norm of rhs vector
         norm0 = b.norm2
 
         # calculate and store the initial residual
-        W.append(self._generate_vector())
-        mat_vec(x, W[0])
-        W[0].times(-1.)
-        W[0].plus(b)
-        beta = W[0].norm2
+        mat_vec(x, res)
+        res.equals_ax_p_by(1.0, b, -1.0, res)
+        beta = res.norm2
 
         if (beta <= self.rel_tol*norm0) or (beta < self.abs_tol):
             # system is already solved
             self.out_file.write('FMGRES system solved by initial guess.\n')
+            self._record(iters, beta)
             return iters, beta
 
         # normalize the residual
+        W[0].equals(res)
         W[0].divide_by(beta)
 
         # initialize RHS of reduced system
         g[0] = beta
 
         # output header information
-        write_header(self.out_file, 'FGMRES', self.rel_tol, beta)
+        write_header(self.out_file, 'FGMRES', self.rel_tol, beta,
+                     self.basis_precision)
         write_history(self.out_file, 0, beta, norm0)
 
-        # BEGIN BIG LOOP
-        ################
+        num_kept = 0
+        for cycle in xrange(self.max_outer):
 
-        lin_depend = False
-        for i in xrange(self.max_iter):
+            # save the RHS of the reduced system before any rotations
+            c[:] = g
 
-            # check convergence and linear dependence
-            if lin_depend and (beta > self.rel_tol*norm0):
-                raise RuntimeError(
-                    'FGMRES: Arnoldi process breakdown: ' +
-                    'H(%i, %i) = %e, however '%(i+1, i, H[i+1, i]) +
-                    '||res|| = %e\n'%beta)
-            elif beta < self.rel_tol*norm0 or beta < self.abs_tol:
-                break
+            # BEGIN BIG LOOP
+            ################
+
+            lin_depend = False
+            small_grad = False
+            num_cols = num_kept
+            for i in xrange(num_kept, self.max_iter):
 
-            iters += 1
-
-            # precondition W[i] and store result in Z[i]
-            Z.append(self._generate_vector())
-            precond(W[i], Z[i])
-
-            # add to krylov subspace
-            W.append(self._generate_vector())
-            mat_vec(Z[i], W[i+1])
-
-            # try modified Gram-Schmidt orthogonalization
-            try:
-                mod_GS_normalize(i, H, W)
-            except numpy.linalg.LinAlgError:
-                lin_depend = True
-
-            # apply old Givens rotations to new column of the Hessenberg matrix
-            # then generate new Givens rotation matrix and apply it to the last
-            # two elements of H[i, :] and g
-            for k in xrange(i):
-                H[k, i], H[k+1, i] = apply_givens(
-                    sn[k], cn[k], H[k, i], H[k+1, i])
-
-            H[i, i], H[i+1, i], sn[i], cn[i] = generate_givens(
-                H[i, i], H[i+1, i])
-            y[i] = g[i] # save for check_LSgrad
-            g[i], g[i+1] = apply_givens(sn[i], cn[i], g[i], g[i+1])
-
-            if self.check_LSgrad and iters > 1:
-                # check the gradient of the least-squares problem
-                y[:i] = numpy.zeros(i)
-                for k in xrange(i-1, -1, -1):
-                    y[k], y[k+1] = apply_givens(-sn[k], cn[k], y[k], y[k+1])
-                rLS = numpy.dot(H[:i+1,:i+1], y[:i+1])
-                if numpy.sqrt(rLS.dot(rLS)) < 1000*EPS:
-                    self.out_file.write(
-                        '# small gradient in FGMRES least-squares problem\n')
+                # check convergence and linear dependence
+                if lin_depend and (beta > self.rel_tol*norm0):
+                    raise RuntimeError(
+                        'FGMRES: Arnoldi process breakdown: ' +
+                        'H(%i, %i) = %e, however '%(i+1, i, H[i+1, i]) +
+                        '||res|| = %e\n'%beta)
+                elif beta < self.rel_tol*norm0 or beta < self.abs_tol:
                     break
 
-            # set L2 norm of residual and output relative residual if necessary
-            beta = abs(g[i+1])
-            write_history(self.out_file, i+1, beta, norm0)
+                iters += 1
+                num_cols += 1
+
+                # precondition W[i] and store result in Z[i]
+                precond(W[i], Z[i])
+
+                # add to krylov subspace, relaxing the product accuracy as
+                # the residual drops
+                self._set_product_tol(mat_vec, beta, norm0)
+                mat_vec(Z[i], W[i+1])
+
+                # try modified Gram-Schmidt orthogonalization
+                with self.stats.timing('orthog'):
+                    try:
+                        mod_GS_normalize(i, H, W)
+                    except numpy.linalg.LinAlgError:
+                        lin_depend = True
+                Hbar[:i+2, i] = H[:i+2, i]
+
+                if self.check_LSgrad:
+                    # undo the old Givens rotations on g[i]; with the rotations
+                    # accumulated in Q, this is a row of Q
+                    y[:i+1] = g[i]*Q[i, :i+1]
+
+                # apply old Givens rotations to new column of the Hessenberg
+                # matrix then generate new Givens rotation matrix and apply it
+                # to the last two elements of H[i, :] and g
+                with self.stats.timing('dense'):
+                    givens_update(Q, H, g, i)
+
+                if self.check_LSgrad and iters > 1:
+                    # check the gradient of the least-squares problem
+                    rLS = numpy.dot(H[:i+1,:i+1], y[:i+1])
+                    if numpy.sqrt(rLS.dot(rLS)) < 1000*EPS:
+                        self.out_file.write(
+                            '# small gradient in FGMRES least-squares ' +
+                            'problem\n')
+                        small_grad = True
+                        num_cols -= 1
+                        break
+
+                # set L2 norm of residual and output relative residual
+                beta = abs(g[i+1])
+                write_history(self.out_file, iters, beta, norm0)
 
-        ##############
-        # END BIG LOOP
+            ##############
+            # END BIG LOOP
 
-        # solve the least squares system
-        y[:i] = solve_tri(H[:i, :i], g[:i], lower=False)
-        for k in xrange(i):
-            x.equals_ax_p_by(1.0, x, y[k], Z[k])
+            # solve the least squares system and update the solution
+            with self.stats.timing('dense'):
+                y[:num_cols] = solve_tri(
+                    H[:num_cols, :num_cols], g[:num_cols], lower=False)
+            x.multi_axpy(y[:num_cols], Z[:num_cols])
+
+            # a single precision basis only resolves the residual to its own
+            # accuracy, so the cycle ends with the true residual
+            refine = self.basis_precision == 'single' and self.num_deflate == 0
+            beta_est = beta
+            true_res = None
+            if refine:
+                mat_vec(x, res)
+                res.equals_ax_p_by(1.0, b, -1.0, res)
+                true_res = res.norm2
+                beta = true_res
+                self.out_file.write(
+                    '# FGMRES cycle %i (true) residual : '%(cycle + 1) +
+                    '|res|/|res0| = %e\n'%(beta/norm0))
+
+            # stop if converged, out of cycles or unable to extend the subspace
+            if beta < self.rel_tol*norm0 or beta < self.abs_tol or \
+                    lin_depend or small_grad or cycle == self.max_outer - 1:
+                break
+
+            # restart from the true residual, or the deflated subspace
+            if refine:
+                W[0].equals(res)
+                W[0].divide_by(beta)
+                self._reset_reduced()
+                g[0] = beta
+                num_kept = 0
+            else:
+                num_kept = self._restart(num_cols, W, Z, V)
+            self.out_file.write(
+                '# FGMRES restart %i : '%(cycle + 1) +
+                'kept %i deflation vectors\n'%num_kept)
+        self._set_product_tol(mat_vec, None, norm0)
+        self._record(iters, beta)
 
         if self.check_res:
-            # recalculate explicitly and check final residual
-            mat_vec(x, W[0])
-            W[0].equals_ax_p_by(1.0, b, -1.0, W[0])
-            true_res = W[0].norm2
+            # recalculate explicitly and check final residual, unless the
+            # last cycle already did
+            if true_res is None:
+                mat_vec(x, res)
+                res.equals_ax_p_by(1.0, b, -1.0, res)
+                true_res = res.norm2
             self.out_file.write(
                 '# FGMRES final (true) residual : ' +
                 '|res|/|res0| = %e\n'%(true_res/norm0)
             )
-            if abs(true_res - beta) > 0.01*self.rel_tol*norm0:
+            if abs(true_res - beta_est) > 0.01*self.rel_tol*norm0:
                 self.out_file.write(
                     '# WARNING in FGMRES: true residual norm and ' +
                     'calculated residual norm do not agree.\n' +
-                    '# (res - beta)/res0 = %e\n'%((true_res - beta)/norm0)
+                    '# (res - beta)/res0 = %e\n'%((true_res - beta_est)/norm0)
                 )
-            return iters, true_res
-        else:
-            return iters, beta
+            self.stats.res_true = true_res
+            beta = true_res
+
+        return iters, beta
 
 # imports at the bottom to prevent circular errors
 import numpy
@@ -182,4 +399,4 @@ from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.solvers.util import \
     EPS, write_header, write_history, solve_tri, \
-    generate_givens, apply_givens, mod_GS_normalize
\ No newline at end of file
+    givens_update, mod_GS_normalize, harmonic_ritz
\ No newline at end of file
@@ -1,5 +1,5 @@
 
-from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
 
 class FLECS(KrylovSolver):
     """
@@ -28,6 +28,11 @@ class FLECS(KrylovSolver):
         Flag for negative curvature in the search direction.
     trust_active : boolean
         Flag for trust-region detection.
+    max_recycle : int
+        Maximum number of harmonic Ritz vectors carried over from one solve to
+        the next.
+    U : list of ReducedKKTVector
+        Recycled search directions from the previous solve.
 
     Parameters
     ----------
@@ -37,6 +42,8 @@ class FLECS(KrylovSolver):
         Optiona dictionary
     """
 
+    capabilities = ('kkt_trust_region',)
+
     def __init__(self, vector_factories, optns=None):
         super(FLECS, self).__init__(vector_factories, optns)
 
@@ -56,6 +63,9 @@ class FLECS(KrylovSolver):
         self.grad_scale = get_opt(self.optns, 1.0, 'grad_scale')
         self.feas_scale = get_opt(self.optns, 1.0, 'feas_scale')
 
+        # get subspace recycling options
+        self.max_recycle = get_opt(self.optns, 0, 'max_recycle')
+
         # extract vector factories from the factory array
         self.primal_factory = None
         self.eq_factory = None
@@ -68,32 +78,42 @@ class FLECS(KrylovSolver):
             elif factory._vec_type is DualVectorINEQ:
                 self.ineq_factory = factory
 
-        # put in memory request
-        self.primal_factory.request_num_vectors(2*self.max_iter + 2)
+        # put in memory request; V, Z and the recycled U are stored in the
+        # basis precision, and the residual and the solution checked by
+        # check_res in double
+        num_vecs = 2*self.max_iter + 1 + self.max_recycle
+        precision = self.basis_precision
+        self.primal_factory.request_num_vectors(num_vecs, precision)
+        self.primal_factory.request_num_vectors(2)
         if self.eq_factory is not None:
-            self.eq_factory.request_num_vectors(2*self.max_iter + 2)
+            self.eq_factory.request_num_vectors(num_vecs, precision)
+            self.eq_factory.request_num_vectors(2)
         if self.ineq_factory is not None:
-            self.ineq_factory.request_num_vectors(2*(2*self.max_iter + 2))
+            self.ineq_factory.request_num_vectors(2*num_vecs, precision)
+            self.ineq_factory.request_num_vectors(4)
 
         # initialize vector holder arrays
         self.V = []
         self.Z = []
+        self.U = []
+        self.num_recycled = 0
+        self.iters = 0
 
-    def _generate_vector(self):
-        design = self.primal_factory.generate()
+    def _generate_vector(self, precision='double'):
+        design = self.primal_factory.generate(precision)
         if self.eq_factory is not None and self.ineq_factory is not None:
-            slack = self.ineq_factory.generate()
+            slack = self.ineq_factory.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual_eq = self.eq_factory.generate()
-            dual_ineq = self.ineq_factory.generate()
+            dual_eq = self.eq_factory.generate(precision)
+            dual_ineq = self.ineq_factory.generate(precision)
             dual = CompositeDualVector(dual_eq, dual_ineq)
         elif self.eq_factory is not None:
             primal = design
-            dual = self.eq_factory.generate()
+            dual = self.eq_factory.generate(precision)
         elif self.ineq_factory is not None:
-            slack = self.ineq_factory.generate()
+            slack = self.ineq_factory.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual = self.ineq_factory.generate()
+            dual = self.ineq_factory.generate(precision)
         return ReducedKKTVector(primal, dual)
 
     def _validate_options(self):
@@ -102,50 +122,50 @@ class FLECS(KrylovSolver):
         assert self.primal_factory is not None
         if self.eq_factory is None:
             assert self.ineq_factory is not None
+        if self.max_recycle < 0 or self.max_recycle >= self.max_iter:
+            raise ValueError(
+                'max_recycle must be non-negative and less than subspace_size')
 
     def _reset(self):
-        # clear out all the vectors stored in V
+        # release all the vectors stored in V and Z
         # the data goes back to the stack and is used again later
-        for vector in self.V:
-            if self.eq_factory is not None and self.ineq_factory is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.primal
-                del vector.dual.eq
-                del vector.dual.ineq
-                del vector.dual
-            elif self.eq_factory is not None:
-                del vector.primal
-                del vector.dual
-            elif self.ineq_factory is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.dual
-            del vector
+        for vector in self.V + self.Z:
+            vector.release()
         self.V = []
-
-        # clear out all vectors stored in Z
-        # the data goes back to the stack and is used again later
-        for vector in self.Z:
-            if self.eq_factory is not None and self.ineq_factory is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.primal
-                del vector.dual.eq
-                del vector.dual.ineq
-                del vector.dual
-            elif self.eq_factory is not None:
-                del vector.primal
-                del vector.dual
-            elif self.ineq_factory is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.dual
-            del vector
         self.Z = []
 
-        # force garbage collection
-        gc.collect()
+    def _update_recycle(self):
+        # compress the search directions of the previous solve into the
+        # harmonic Ritz vectors of smallest magnitude; these are the slowest
+        # converging directions and are used to seed the next subspace
+        self.num_recycled = 0
+        if self.max_recycle == 0 or self.iters == 0:
+            return
+        # the recycled directions are not preconditioned images of V, so the
+        # vectors are extracted for the matrix itself using V^T Z
+        G = harmonic_ritz(
+            self.H[:self.iters+1, :self.iters], self.max_recycle,
+            WtZ=self.VtZ[:self.iters+1, :self.iters])
+        if len(self.U) == 0:
+            self.U = [self._generate_vector(self.basis_precision)
+                      for k in xrange(self.max_recycle)]
+        for k in xrange(G.shape[1]):
+            self.U[k].equals(0.0)
+            self.U[k].multi_axpy(G[:, k], self.Z[:self.iters])
+            self.U[k].divide_by(self.U[k].norm2)
+        self.num_recycled = G.shape[1]
+
+    def release_workspace(self):
+        """
+        Hand the search directions of the last solve and the recycled vectors
+        back to memory. Recycling restarts from scratch at the next solve.
+        """
+        self._reset()
+        for vector in self.U:
+            vector.release()
+        self.U = []
+        self.num_recycled = 0
+        self.iters = 0
 
     def _write_header(self, norm0, grad0, feas0):
         self.out_file.write(
@@ -155,6 +175,7 @@ class FLECS(KrylovSolver):
             '# initial residual norm     = %e\n'%norm0 +
             '# initial gradient norm     = %e\n'%grad0 +
             '# initial constraint norm   = %e\n'%feas0 +
+            '# basis precision           = %s\n'%self.basis_precision +
             '# iters' + ' '*5 +
             'rel. res.   ' + ' '*5 +
             'rel. grad.  ' + ' '*5 +
@@ -240,30 +261,21 @@ class FLECS(KrylovSolver):
         Hess_aug += Hess_red
 
         # compute the RHS for the augmented Lagrangian problem
-        rhs_aug = numpy.zeros(self.iters)
-        for k in xrange(self.iters):
-            rhs_aug[k] = -self.g[0]*(self.VtZ_prim[0, k] + self.mu*VtVH[0, k])
+        rhs_aug = -self.g[0]*(VtZ_prim_r[0, :] + self.mu*VtVH[0, :])
 
         radius_aug = self.radius  
         try:
             # compute the transformation to apply trust-radius directly
-            rhs_tmp = numpy.copy(rhs_aug)
             # NOTE: Numpy Cholesky always returns a lower triangular matrix
             # but UTU in C++ version contains both upper and lower information
             L = numpy.linalg.cholesky(ZtZ_prim_r)
-            rhs_aug = solve_tri(L, rhs_tmp, lower=True)
-  
-            for j in xrange(self.iters):
-                rhs_tmp[:] = Hess_aug[:,j]
-                vec_tmp = solve_tri(L, rhs_tmp, lower=True)
-                Hess_aug[:, j] = vec_tmp[:]
-
-            for j in xrange(self.iters):
-                rhs_tmp[:] = Hess_aug[j,:]
-                vec_tmp = solve_tri(L, rhs_tmp, lower=True)
-                Hess_aug[j,:] = vec_tmp[:]
+            rhs_tmp = solve_tri(L, rhs_aug, lower=True)
+
+            # L^{-1} Hess_aug L^{-T}, with one triangular solve per side
+            Hess_tmp = solve_tri(L, Hess_aug, lower=True)
+            Hess_tmp = solve_tri(L, Hess_tmp.T, lower=True).T
             vec_tmp, lamb, self.pred_aug = solve_trust_reduced(
-                Hess_aug, rhs_aug, radius_aug)
+                Hess_tmp, rhs_tmp, radius_aug)
             self.y_aug = solve_tri(L.T, vec_tmp, lower=False)
 
         except numpy.linalg.LinAlgError:
@@ -298,11 +310,14 @@ class FLECS(KrylovSolver):
         if (self.pred_aug - self.pred) > 0.05*abs(self.pred):
             self.neg_curv = True
 
+    @record_stats
     def solve(self, mat_vec, b, x, precond):
         # validate solver options
         self._validate_options()
 
-        # reset vector memory for a new fresh solution
+        # keep the useful part of the previous subspace, and reset vector
+        # memory for a new fresh solution
+        self._update_recycle()
         self._reset()
 
         # initialize some work data
@@ -328,7 +343,7 @@ class FLECS(KrylovSolver):
         norm0 = b.norm2
 
         # calculate initial (negative) residual and compute its norm
-        self.V.append(self._generate_vector())
+        self.V.append(self._generate_vector(self.basis_precision))
         self.V[0].equals(b)
         self.V[0].primal.times(self.grad_scale)
         self.V[0].dual.times(self.feas_scale)
@@ -365,48 +380,74 @@ class FLECS(KrylovSolver):
             # advance iteration counter
             self.iters += 1
 
-            # precondition self.V[i] and store results in self.Z[i]
-            self.Z.append(self._generate_vector())
-            precond(self.V[i], self.Z[i])
-
-            # add to Krylov subspace
-            self.V.append(self._generate_vector())
+            # precondition self.V[i] and store results in self.Z[i]; the
+            # first directions are the recycled ones, if any
+            self.Z.append(self._generate_vector(self.basis_precision))
+            if i < self.num_recycled:
+                self.Z[i].equals(self.U[i])
+            elif i == self.num_recycled and i > 0:
+                # continue from the residual left by the recycled directions,
+                # so the rest of the subspace is built for the projected system
+                res_red = self.g[:i+1] - self.H[:i+1, :i].dot(self.y[:i])
+                res.equals(0.0)
+                res.multi_axpy(res_red, self.V[:i+1])
+                precond(res, self.Z[i])
+            else:
+                precond(self.V[i], self.Z[i])
+
+            # add to Krylov subspace, relaxing the product accuracy as the
+            # residual drops
+            self.V.append(self._generate_vector(self.basis_precision))
             self.Z[i].primal.times(self.grad_scale)
             self.Z[i].dual.times(self.feas_scale)
+            self._set_product_tol(mat_vec, res_norm, norm0)
             mat_vec(self.Z[i], self.V[i+1])
             self.Z[i].primal.divide_by(self.grad_scale)
             self.Z[i].dual.divide_by(self.feas_scale)
             self.V[i+1].primal.times(self.grad_scale)
             self.V[i+1].dual.times(self.feas_scale)
 
-            # modified Gram-Schmidt orthonormalization
-            try:
-                mod_GS_normalize(i, self.H, self.V)
-            except numpy.linalg.LinAlgError:
-                self.lin_depend = True
-
-            # compute new row and column of the VtZ matrix
-            for k in xrange(i+1):
-                self.VtZ_prim[k, i] = self.V[k].primal.inner(self.Z[i].primal)
-                self.VtZ_prim[i+1, k] = self.V[i+1].primal.inner(
-                    self.Z[k].primal)
-
-                self.VtZ_dual[k, i] = self.V[k].dual.inner(self.Z[i].dual)
-                self.VtZ_dual[i+1, k] = self.V[i+1].dual.inner(self.Z[k].dual)
-
-                self.VtZ[k, i] = self.VtZ_prim[k, i] + self.VtZ_dual[k, i]
-                self.VtZ[i+1, k] = self.VtZ_prim[i+1, k] + self.VtZ_dual[i+1, k]
-
-                self.ZtZ_prim[k, i] = self.Z[k].primal.inner(self.Z[i].primal)
-                self.ZtZ_prim[i, k] = self.Z[i].primal.inner(self.Z[k].primal)
-
-                self.VtV_dual[k, i+1] = self.V[k].dual.inner(self.V[i+1].dual)
-                self.VtV_dual[i+1, k] = self.V[i+1].dual.inner(self.V[k].dual)
-
-            self.VtV_dual[i+1, i+1] = self.V[i+1].dual.inner(self.V[i+1].dual)
+            # modified Gram-Schmidt orthonormalization, and the new rows and
+            # columns of the Gram matrices
+            with self.stats.timing('orthog'):
+                try:
+                    mod_GS_normalize(i, self.H, self.V)
+                except numpy.linalg.LinAlgError:
+                    self.lin_depend = True
+
+                # compute new row and column of the VtZ matrix
+                for k in xrange(i+1):
+                    self.VtZ_prim[k, i] = self.V[k].primal.inner(
+                        self.Z[i].primal)
+                    self.VtZ_prim[i+1, k] = self.V[i+1].primal.inner(
+                        self.Z[k].primal)
+
+                    self.VtZ_dual[k, i] = self.V[k].dual.inner(
+                        self.Z[i].dual)
+                    self.VtZ_dual[i+1, k] = self.V[i+1].dual.inner(
+                        self.Z[k].dual)
+
+                    self.VtZ[k, i] = \
+                        self.VtZ_prim[k, i] + self.VtZ_dual[k, i]
+                    self.VtZ[i+1, k] = \
+                        self.VtZ_prim[i+1, k] + self.VtZ_dual[i+1, k]
+
+                    self.ZtZ_prim[k, i] = self.Z[k].primal.inner(
+                        self.Z[i].primal)
+                    self.ZtZ_prim[i, k] = self.Z[i].primal.inner(
+                        self.Z[k].primal)
+
+                    self.VtV_dual[k, i+1] = self.V[k].dual.inner(
+                        self.V[i+1].dual)
+                    self.VtV_dual[i+1, k] = self.V[i+1].dual.inner(
+                        self.V[k].dual)
+
+                self.VtV_dual[i+1, i+1] = self.V[i+1].dual.inner(
+                    self.V[i+1].dual)
 
             # solve the reduced problems and compute the residual
-            self.solve_subspace_problems()
+            with self.stats.timing('dense'):
+                self.solve_subspace_problems()
 
             # calculate the new residual norm
             res_norm = (self.gamma/self.feas_scale)**2 + \
@@ -432,6 +473,8 @@ class FLECS(KrylovSolver):
 
         #########################################
         # finished looping over search directions
+        self._set_product_tol(mat_vec, None, norm0)
+        self._record(self.iters, res_norm)
 
         if self.neg_curv:
             self.out_file.write('# negative curvature suspected\n')
@@ -452,15 +495,16 @@ class FLECS(KrylovSolver):
 
         # check residual
         if self.check_res:
-            # calculate true residual for the solution
-            self.V[0].equals(0.0)
-            for k in xrange(self.iters):
-                self.V[0].equals_ax_p_by(
-                    1.0, self.V[0], self.y_mult[k], self.Z[k])
-            mat_vec(self.V[0], res)
+            # calculate true residual for the solution, accumulated in double
+            sol = self._generate_vector()
+            sol.equals(0.0)
+            sol.multi_axpy(self.y_mult[:self.iters], self.Z[:self.iters])
+            mat_vec(sol, res)
+            sol.release()
             res.equals_ax_p_by(1.0, b, -1.0, res)
             true_res = res.norm2
             true_feas = res.dual.norm2
+            self.stats.res_true = true_res
             # print residual information
             out_data = true_res/norm0
             self.out_file.write(
@@ -491,6 +535,9 @@ class FLECS(KrylovSolver):
                     '# (feas_true - feas_comp)/feas0 = %e\n'%out_data
                 )
 
+        # release the residual work vector
+        res.release()
+
     def re_solve(self, b, x):
         # calculate norms for the RHS vector
         grad0 = b.primal.norm2
@@ -535,7 +582,6 @@ class FLECS(KrylovSolver):
         x.dual.times(self.feas_scale)
 
 # package imports at the bottom to prevent errors
-import gc
 import numpy
 from numpy import sqrt
 
@@ -544,4 +590,5 @@ from kona.linalg.vectors.common import *
 from kona.linalg.vectors.composite import ReducedKKTVector
 from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.solvers.util import \
-    solve_tri, solve_trust_reduced, eigen_decomp, mod_GS_normalize, EPS
\ No newline at end of file
+    solve_tri, solve_trust_reduced, eigen_decomp, mod_GS_normalize, EPS, \
+    harmonic_ritz
\ No newline at end of file
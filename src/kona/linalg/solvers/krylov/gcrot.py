@@ -1,10 +1,12 @@
-from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
 
 class GCROT(KrylovSolver):
     """
     Generalized Conjugate Residual method with Orthogonalization, Truncated
     """
 
+    capabilities = ('linear',)
+
     def __init__(self, vector_factory, optns=None,
                  eq_factory=None, ineq_factory=None):
         super(GCROT, self).__init__(vector_factory, optns)
@@ -20,43 +22,48 @@ class GCROT(KrylovSolver):
         self.max_outer = get_opt(self.optns, 10, 'max_outer')
         self.max_krylov = get_opt(self.optns, 50, 'max_matvec')
 
-        # put in memory request
-        num_vectors = 2*self.max_iter + 2*self.max_recycle + 4
-        self.vec_fac.request_num_vectors(num_vectors)
+        # put in memory request; the subspaces W, Z, C and U are stored in
+        # the basis precision, and the three work vectors in double
+        num_basis = 2*self.max_iter + 2*self.max_recycle + 1
+        precision = self.basis_precision
+        self.vec_fac.request_num_vectors(num_basis, precision)
+        self.vec_fac.request_num_vectors(3)
         self.eq_fac = eq_factory
         self.ineq_fac = ineq_factory
         if self.eq_fac is not None:
-            self.eq_fac.request_num_vectors(2 * self.max_iter + 1)
+            self.eq_fac.request_num_vectors(num_basis, precision)
+            self.eq_fac.request_num_vectors(3)
         if self.ineq_fac is not None:
-            self.ineq_fac.request_num_vectors(4 * self.max_iter + 2)
+            self.ineq_fac.request_num_vectors(2*num_basis, precision)
+            self.ineq_fac.request_num_vectors(6)
 
         # set empty subpaces
         self.C = []
         self.U = []
 
-    def _generate_vector(self):
+    def _generate_vector(self, precision='double'):
         # if there are no constraints, just return design vectors
         if self.eq_fac is None and self.ineq_fac is None:
-            return self.vec_fac.generate()
+            return self.vec_fac.generate(precision)
         # this is for only inequality constraints
         elif self.eq_fac is None:
-            design = self.vec_fac.generate()
-            slack = self.ineq_fac.generate()
+            design = self.vec_fac.generate(precision)
+            slack = self.ineq_fac.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual = self.ineq_fac.generate()
+            dual = self.ineq_fac.generate(precision)
             return ReducedKKTVector(primal, dual)
         # this is for only equality constraints
         elif self.ineq_fac is None:
-            primal = self.vec_fac.generate()
-            dual = self.eq_fac.generate()
+            primal = self.vec_fac.generate(precision)
+            dual = self.eq_fac.generate(precision)
             return ReducedKKTVector(primal, dual)
         # and finally, this is for both types of constraints
         else:
-            design = self.vec_fac.generate()
-            slack = self.ineq_fac.generate()
+            design = self.vec_fac.generate(precision)
+            slack = self.ineq_fac.generate(precision)
             primal = CompositePrimalVector(design, slack)
-            dual_eq = self.eq_fac.generate()
-            dual_ineq = self.ineq_fac.generate()
+            dual_eq = self.eq_fac.generate(precision)
+            dual_ineq = self.ineq_fac.generate(precision)
             dual = CompositeDualVector(dual_eq, dual_ineq)
             return ReducedKKTVector(primal, dual)
 
@@ -64,52 +71,17 @@ class GCROT(KrylovSolver):
         self.num_stored = 0
         self.ptr = 0
 
-        # clear out all the vectors stored in C
+        # release all the vectors stored in C and U
         # the data goes back to the stack and is used again later
-        for vector in self.C:
-            if self.eq_fac is not None and self.ineq_fac is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.primal
-                del vector.dual.eq
-                del vector.dual.ineq
-                del vector.dual
-            elif self.eq_fac is not None:
-                del vector.primal
-                del vector.dual
-            elif self.ineq_fac is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.dual
-            del vector
+        for vector in self.C + self.U:
+            vector.release()
         self.C = []
-
-        # clear out all vectors stored in U
-        # the data goes back to the stack and is used again later
-        for vector in self.U:
-            if self.eq_fac is not None and self.ineq_fac is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.primal
-                del vector.dual.eq
-                del vector.dual.ineq
-                del vector.dual
-            elif self.eq_fac is not None:
-                del vector.primal
-                del vector.dual
-            elif self.ineq_fac is not None:
-                del vector.primal.design
-                del vector.primal.slack
-                del vector.dual
-            del vector
         self.U = []
 
-        # force garbage collection
-        gc.collect()
-
         # print into krylov file
         self.out_file.write('# Subspace cleared!\n')
 
+    @record_stats
     def solve(self, mat_vec, b, x, precond):
         # validate solver options
         self._validate_options()
@@ -136,10 +108,15 @@ class GCROT(KrylovSolver):
         if (beta <= self.rel_tol*norm0) or (beta < self.abs_tol):
             # system is already solved
             self.out_file.write('GCROT system solved by initial guess.\n')
+            C_new.release()
+            U_new.release()
+            res.release()
+            self._record(iters, beta)
             return iters, beta
 
         # output header information
-        write_header(self.out_file, 'GCROT', self.rel_tol, beta)
+        write_header(self.out_file, 'GCROT', self.rel_tol, beta,
+                     self.basis_precision)
         write_history(self.out_file, 0, beta, norm0)
 
         # begin outer, GCROT, loop
@@ -153,14 +130,13 @@ class GCROT(KrylovSolver):
 
             # initialize some work data for FGMRES
             y = numpy.zeros(fgmres_iter + 1)
-            sn = numpy.zeros(fgmres_iter + 1)
-            cn = numpy.zeros(fgmres_iter + 1)
+            Q = numpy.eye(fgmres_iter + 1)
             H = numpy.zeros((fgmres_iter + 1, fgmres_iter))
             g = numpy.zeros(fgmres_iter+1)
             B = numpy.zeros((self.num_stored, fgmres_iter))
 
             # normalize residual to get W[0]
-            W.append(self._generate_vector())
+            W.append(self._generate_vector(self.basis_precision))
             W[0].equals(res)
             W[0].divide_by(beta)
 
@@ -186,35 +162,31 @@ class GCROT(KrylovSolver):
                 iters += 1
 
                 # precondition W[i] and store result in Z[i]
-                Z.append(self._generate_vector())
+                Z.append(self._generate_vector(self.basis_precision))
                 precond(W[i], Z[i])
 
                 # add to krylov subspace
-                W.append(self._generate_vector())
+                W.append(self._generate_vector(self.basis_precision))
                 mat_vec(Z[i], W[i+1])
 
-                # orthogonalize W[i+1] against the recycled subspace C[:]
-                try:
-                    mod_gram_schmidt(i, B, self.C, W[i+1])
-                except numpy.linalg.LinAlgError:
-                    lin_depend = True
+                with self.stats.timing('orthog'):
+                    # orthogonalize W[i+1] against the recycled subspace C[:]
+                    try:
+                        mod_gram_schmidt(i, B, self.C, W[i+1])
+                    except numpy.linalg.LinAlgError:
+                        lin_depend = True
 
-                # now orthonormalize W[i+1] against the W[:i]
-                try:
-                    mod_GS_normalize(i, H, W)
-                except numpy.linalg.LinAlgError:
-                    lin_depend = True
+                    # now orthonormalize W[i+1] against the W[:i]
+                    try:
+                        mod_GS_normalize(i, H, W)
+                    except numpy.linalg.LinAlgError:
+                        lin_depend = True
 
                 # apply old Givens rotations to new column of the Hessenberg
                 # matrix then generate new Givens rotation matrix and apply it
                 # to the last two elements of H[i, :] and g
-                for k in xrange(i):
-                    H[k, i], H[k+1, i] = apply_givens(
-                        sn[k], cn[k], H[k, i], H[k+1, i])
-
-                H[i, i], H[i+1, i], sn[i], cn[i] = generate_givens(
-                    H[i, i], H[i+1, i])
-                g[i], g[i+1] = apply_givens(sn[i], cn[i], g[i], g[i+1])
+                with self.stats.timing('dense'):
+                    givens_update(Q, H, g, i)
 
                 # set L2 norm of residual and output relative residual
                 beta = abs(g[i+1])
@@ -226,23 +198,17 @@ class GCROT(KrylovSolver):
 
             # calculate U_new = (Z - U B)R^{-1} g
             # first, solve to get y = R^{-1} g
-            y[:i] = solve_tri(H[:i, :i], g[:i], lower=False)
+            with self.stats.timing('dense'):
+                y[:i] = solve_tri(H[:i, :i], g[:i], lower=False)
             U_new.equals(0.0)
-            for k in xrange(i):
-                U_new.equals_ax_p_by(1.0, U_new, y[k], Z[k])
+            U_new.multi_axpy(y[:i], Z[:i])
             # update U_new -= U * B
-            for k in xrange(self.num_stored):
-                tmp = numpy.dot(B[k, :i], y[:i])
-                U_new.equals_ax_p_by(1.0, U_new, -tmp, self.U[k])
+            U_new.multi_axpy(-B[:, :i].dot(y[:i]), self.U[:self.num_stored])
 
             # finished with g, so undo rotations to find C_new
-            y[:i] = g[:i]
-            y[i] = 0.0
-            for k in xrange(i-1, -1, -1):
-                y[k], y[k+1] = apply_givens(-sn[k], cn[k], y[k], y[k+1])
+            y[:i+1] = Q[:i, :i+1].T.dot(g[:i])
             C_new.equals(0.0)
-            for k in xrange(i+1):
-                C_new.equals_ax_p_by(1.0, C_new, y[k], W[k])
+            C_new.multi_axpy(y[:i+1], W[:i+1])
 
             # normalize and scale new vectors and update solution and res
             alpha = 1.0/C_new.norm2
@@ -253,6 +219,8 @@ class GCROT(KrylovSolver):
             x.equals_ax_p_by(1.0, x, alpha, U_new)
 
             # clear W and Z before saving C and U
+            for vector in W + Z:
+                vector.release()
             W = []
             Z = []
 
@@ -261,8 +229,8 @@ class GCROT(KrylovSolver):
             if self.num_stored < self.max_recycle:
                 self.ptr = self.num_stored
                 self.num_stored += 1
-                self.C.append(self._generate_vector())
-                self.U.append(self._generate_vector())
+                self.C.append(self._generate_vector(self.basis_precision))
+                self.U.append(self._generate_vector(self.basis_precision))
             else:
                 if self.max_recycle > 0:
                     self.ptr = (self.ptr+1) % self.num_stored
@@ -281,6 +249,11 @@ class GCROT(KrylovSolver):
         # end GCRO loop
         ###############
 
+        # release the work vectors back to memory
+        C_new.release()
+        U_new.release()
+        self._record(iters, beta)
+
         if self.check_res:
             # recalculate explicitly and check final residual
             mat_vec(x, res)
@@ -296,12 +269,14 @@ class GCROT(KrylovSolver):
                     'calculated residual norm do not agree.\n' +
                     '# (res - beta)/res0 = %e\n'%((true_res - beta)/norm0)
                 )
+            res.release()
+            self.stats.res_true = true_res
             return iters, true_res
         else:
+            res.release()
             return iters, beta
 
 # imports here to prevent circular errors
-import gc
 import numpy
 from kona.options import get_opt
 from kona.linalg.vectors.composite import ReducedKKTVector
@@ -309,4 +284,4 @@ from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.vectors.composite import CompositeDualVector
 from kona.linalg.solvers.util import \
     EPS, write_header, write_history, solve_tri, \
-    generate_givens, apply_givens, mod_gram_schmidt, mod_GS_normalize
\ No newline at end of file
+    givens_update, mod_gram_schmidt, mod_GS_normalize
\ No newline at end of file
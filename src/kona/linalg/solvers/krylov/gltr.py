@@ -0,0 +1,212 @@
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
+
+class GLTR(KrylovSolver):
+    """
+    Generalized Lanczos Trust-Region (GLTR) Krylov iterative method, after
+    Gould, Lucidi, Roma and Toint.
+
+    STCG stops at the first step that reaches the trust-region boundary or
+    finds non-positive curvature. GLTR keeps expanding the preconditioned
+    Lanczos subspace past that point, and at every iteration solves the
+    trust-region subproblem restricted to the subspace with
+    ``solve_trust_reduced()``. The step keeps improving along the boundary,
+    which pays off when the Hessian is indefinite or the radius is small.
+    Inside the trust region, the iterates are the same as those of
+    preconditioned CG.
+
+    As in STCG, the trust region is measured in the 2-norm, so the reduced
+    problem is transformed with the Cholesky factor of the Gram matrix of
+    the Lanczos vectors. The Gram matrix is the identity when no
+    preconditioner is used.
+
+    Attributes
+    ----------
+    radius : float
+        Trust region radius.
+    dual_fac : VectorFactory
+        Factory for the slack part of composite primal vectors, if any.
+    """
+
+    capabilities = ('trust_region',)
+
+    def __init__(self, vector_factory, optns=None, dual_factory=None):
+        super(GLTR, self).__init__(vector_factory, optns)
+
+        self.rel_tol = get_opt(self.optns, 1e-5, 'rel_tol')
+        self.abs_tol = get_opt(self.optns, 1e-12, 'abs_tol')
+
+        # set a default trust radius
+        # NOTE: the trust radius is set by the optimization algorithm
+        self.radius = 1.0
+
+        # set factory and request vectors needed in solve() method; the
+        # Lanczos vectors and their preconditioned images are stored in the
+        # basis precision, and the residual in double
+        num_vecs = 2*(self.max_iter + 1)
+        precision = self.basis_precision
+        self.vec_fac.request_num_vectors(num_vecs, precision)
+        self.vec_fac.request_num_vectors(1)
+        self.dual_fac = dual_factory
+        if self.dual_fac is not None:
+            self.dual_fac.request_num_vectors(num_vecs, precision)
+            self.dual_fac.request_num_vectors(1)
+
+    def _validate_options(self):
+        super(GLTR, self)._validate_options()
+        if self.radius < 0:
+            raise ValueError('radius must be postive')
+
+    def _generate_vector(self, precision='double'):
+        if self.dual_fac is None:
+            return self.vec_fac.generate(precision)
+        else:
+            design = self.vec_fac.generate(precision)
+            slack = self.dual_fac.generate(precision)
+            return CompositePrimalVector(design, slack)
+
+    def _solve_reduced(self, T, G, gamma0):
+        # solve min -gamma0*h[0] + 0.5*h^T T h s.t. sqrt(h^T G h) <= radius,
+        # by transforming to the 2-norm with the Cholesky factor of G
+        n = T.shape[0]
+        L = numpy.linalg.cholesky(G)
+        rhs = numpy.zeros(n)
+        rhs[0] = -gamma0
+        rhs = solve_tri(L, rhs, lower=True)
+        Hess = solve_tri(L, T, lower=True)
+        Hess = solve_tri(L, Hess.T, lower=True).T
+        y, lam, pred = solve_trust_reduced(Hess, rhs, self.radius)
+        h = solve_tri(L.T, y, lower=False)
+        return h, lam, pred
+
+    @record_stats
+    def solve(self, mat_vec, b, x, precond):
+        self._validate_options()
+        m = self.max_iter
+        precision = self.basis_precision
+
+        # Lanczos vectors V, orthonormal in the inner product defined by the
+        # preconditioner, and their preconditioned images Q
+        V = [self._generate_vector(precision) for k in xrange(m + 1)]
+        Q = [self._generate_vector(precision) for k in xrange(m + 1)]
+        r = self._generate_vector()
+
+        # tridiagonal Lanczos matrix Q^T A Q, and Gram matrix Q^T Q
+        T = numpy.zeros((m + 1, m + 1))
+        G = numpy.zeros((m + 1, m + 1))
+
+        # define initial residual
+        x.equals(0.0)
+        norm0 = b.norm2
+        res = norm0
+        pred = 0.0
+        lam = 0.0
+        n = 0
+
+        write_header(self.out_file, 'GLTR', self.rel_tol, norm0, precision)
+        write_history(self.out_file, 0, norm0, norm0)
+
+        if norm0 > self.abs_tol:
+            V[0].equals(b)
+            precond(V[0], Q[0])
+            gamma0 = V[0].inner(Q[0])
+            if gamma0 <= 0.0:
+                raise ValueError(
+                    'GLTR.solve() : preconditioner is not positive definite')
+            gamma0 = sqrt(gamma0)
+            V[0].divide_by(gamma0)
+            Q[0].divide_by(gamma0)
+            G[0, 0] = Q[0].inner(Q[0])
+
+        # START OF BIG FOR LOOP
+        #######################
+        for i in xrange(m):
+            if res <= self.abs_tol:
+                break
+
+            # expand the subspace, relaxing the product accuracy as the
+            # residual drops
+            self._set_product_tol(mat_vec, res, norm0)
+            mat_vec(Q[i], V[i+1])
+            w = V[i+1]
+
+            # Lanczos step, with full reorthogonalization against the stored
+            # vectors (the first sweep also removes the three-term part)
+            with self.stats.timing('orthog'):
+                for sweep in xrange(2):
+                    coeffs = w.multi_inner(Q[:i+1])
+                    w.multi_axpy(-coeffs, V[:i+1])
+                    T[i, i] += coeffs[i]
+                precond(w, Q[i+1])
+                beta = w.inner(Q[i+1])
+                w_norm2 = w.norm2
+                breakdown = beta <= (EPS*gamma0)**2
+                if not breakdown:
+                    beta = sqrt(beta)
+                    V[i+1].divide_by(beta)
+                    Q[i+1].divide_by(beta)
+                    T[i+1, i] = T[i, i+1] = beta
+                    gram = Q[i+1].multi_inner(Q[:i+2])
+                    G[i+1, :i+2] = gram
+                    G[:i+2, i+1] = gram
+            n = i + 1
+
+            # solve the trust-region problem in the subspace; the residual of
+            # the Lanczos relation is beta*h[-1]*v_{i+1}
+            with self.stats.timing('dense'):
+                h, lam, pred = self._solve_reduced(
+                    T[:n, :n], G[:n, :n], gamma0)
+            res = 0.0 if breakdown else abs(h[-1])*w_norm2
+            write_history(self.out_file, i+1, res, norm0)
+
+            if res < norm0*self.rel_tol or res < self.abs_tol:
+                break
+        #####################
+        # END OF BIG FOR LOOP
+        self._set_product_tol(mat_vec, None, norm0)
+
+        # assemble the solution from the preconditioned Lanczos vectors
+        active = lam > 0.0
+        if n > 0:
+            x.multi_axpy(h, Q[:n])
+        if active:
+            self.out_file.write(
+                '# trust-region boundary active: lambda = %e\n'%lam)
+
+        # if flagged, perform the residual check
+        self._record(n, res)
+        if self.check_res:
+            mat_vec(x, r)
+            r.equals_ax_p_by(1.0, b, -1.0, r)
+            true_res = r.norm2
+            self.stats.res_true = true_res
+            self.out_file.write(
+                '# GLTR final (true) residual : ' +
+                '|res|/|res0| = %e\n'%(true_res/max(norm0, EPS)))
+            # on the boundary, b - Ax does not vanish at the solution
+            if not active and \
+                    abs(true_res - res) > 0.01*self.rel_tol*norm0:
+                self.out_file.write(
+                    '# WARNING in GLTR.solve(): ' +
+                    'true residual norm and calculated residual norm ' +
+                    'do not agree.\n')
+                self.out_file.write(
+                    '# (res - beta)/res0 = %e\n'%((true_res - res)/norm0))
+
+        # release the work vectors back to memory
+        for vector in V + Q + [r]:
+            vector.release()
+
+        # check that the solution satisfies the trust-region
+        if (x.norm2 - self.radius) > 1e-6:
+            raise ValueError('GLTR.solve() : solution outside of trust-region')
+
+        # return some useful stuff
+        return pred, active
+
+# imports here to prevent circular errors
+import numpy
+from numpy import sqrt
+from kona.options import get_opt
+from kona.linalg.vectors.composite import CompositePrimalVector
+from kona.linalg.solvers.util import \
+    EPS, solve_tri, solve_trust_reduced, write_header, write_history
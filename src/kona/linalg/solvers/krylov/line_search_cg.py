@@ -1,80 +1,170 @@
-from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
 
 class LineSearchCG(KrylovSolver):
     """
     Line search Conjugate-Gradient method from page 169 of Numerical Optimization 
     2nd edition by Nocedal and Wright.
+
+    With the ``pipelined`` option, the Ghysels-Vanroose recurrences are used
+    instead, so that each iteration needs a single fused reduction.
     """
+
+    capabilities = ('line_search',)
+
     def __init__(self, vector_factory, optns=None):
         super(LineSearchCG, self).__init__(vector_factory, optns)
 
+        self.pipelined = get_opt(self.optns, False, 'pipelined')
+
         # set factory and request vectors needed in solve() method
-        self.vec_fac.request_num_vectors(5)
+        self.vec_fac.request_num_vectors(7 if self.pipelined else 5)
         
         # use initial tolerance as benchmark
         self.init_tol = self.rel_tol
 
+    @record_stats
     def solve(self, mat_vec, neg_grad, p, precond=None):
         self._validate_options()
 
-        # grab some vectors from memory stack
-        z = self.vec_fac.generate()
-        r_old = self.vec_fac.generate()
-        r = self.vec_fac.generate()
-        d = self.vec_fac.generate()
-        Bd = self.vec_fac.generate()
-
-        # define initial residual and other scalars
-        p.equals(0.0)
-        z.equals(0.0)
-        Bd.equals(0.0)
-        d.equals(neg_grad)
-        r.equals(d)
-        r.times(-1.)
-
-        # write header and initial point
-        norm0 = r.norm2
-        write_header(self.out_file, 'Line-search CG', self.rel_tol, norm0)
-        write_history(self.out_file, 0, norm0, norm0)
-
-        # START OF BIG FOR LOOP
-        #######################
-        for i in xrange(self.max_iter):
-            
-            mat_vec(d, Bd)
-            curv = d.inner(Bd)
-            
-            # check curvature
-            if curv <= 1e-8:
-                # return steepest descent if negative
-                self.out_file.write('# Negative curvature encountered!\n')
+        if self.pipelined:
+            return self._solve_pipelined(mat_vec, neg_grad, p)
+
+        # borrow some vectors from memory stack
+        with self.vec_fac.borrow(5) as (z, r_old, r, d, Bd):
+
+            # define initial residual and other scalars
+            p.equals(0.0)
+            z.equals(0.0)
+            Bd.equals(0.0)
+            d.equals(neg_grad)
+            r.equals(d)
+            r.times(-1.)
+
+            # write header and initial point
+            norm0 = r.norm2
+            res_norm = norm0
+            write_header(self.out_file, 'Line-search CG', self.rel_tol, norm0)
+            write_history(self.out_file, 0, norm0, norm0)
+
+            # START OF BIG FOR LOOP
+            #######################
+            for i in xrange(self.max_iter):
+
+                mat_vec(d, Bd)
+                curv = d.inner(Bd)
+
+                # check curvature
+                if curv <= 1e-8:
+                    # return steepest descent if negative
+                    self.out_file.write('# Negative curvature encountered!\n')
+                    if i == 0:
+                        p.equals(neg_grad)
+                    else:
+                        p.equals(z)
+                    self._record(i, res_norm)
+                    return (None, False)
+
+                alpha = r.inner(r)/curv
+                z.equals_ax_p_by(1., z, alpha, d)
+                r_old.equals(r)
+                r.equals_ax_p_by(1., r, alpha, Bd)
+
+                res_norm = r.norm2
+                write_history(self.out_file, i+1, res_norm, norm0)
+                if res_norm/norm0 <= self.rel_tol:
+                    p.equals(z)
+                    self._record(i+1, res_norm)
+                    return (None, False)
+
+                beta = r.inner(r)/r_old.inner(r_old)
+                d.equals_ax_p_by(-1., r, beta, d)
+
+            #####################
+            # END OF BIG FOR LOOP
+
+            # if we got here, solver failed to find an answer
+            p.equals(z)
+            self._record(self.max_iter, res_norm)
+            return (None, True)
+
+    def _solve_pipelined(self, mat_vec, neg_grad, p):
+        # borrow some vectors from memory stack
+        with self.vec_fac.borrow(7) as (z, r, w, Bw, d, Bd, BBd):
+
+            # define initial residual and other scalars
+            p.equals(0.0)
+            z.equals(0.0)
+            d.equals(0.0)
+            Bd.equals(0.0)
+            BBd.equals(0.0)
+            r.equals(neg_grad)
+            mat_vec(r, w)
+            alpha = 0.0
+            gamma_old = 1.0
+
+            # START OF BIG FOR LOOP
+            #######################
+            for i in xrange(self.max_iter + 1):
+
+                # the only reduction of the iteration
+                gamma, delta = r.fused_inner([(r, r), (w, r)])
+                res_norm = sqrt(max(gamma, 0.0))
+
+                # check convergence of the previous iteration
                 if i == 0:
-                    p.equals(neg_grad)
+                    norm0 = res_norm
+                    write_header(
+                        self.out_file, 'Line-search CG', self.rel_tol, norm0)
+                    write_history(self.out_file, 0, norm0, norm0)
                 else:
-                    p.equals(z)
-                return (None, False)
-            
-            alpha = r.inner(r)/curv
-            z.equals_ax_p_by(1., z, alpha, d)
-            r_old.equals(r)
-            r.equals_ax_p_by(1., r, alpha, Bd)
-            
-            res_norm = r.norm2
-            write_history(self.out_file, i+1, res_norm, norm0)
-            if res_norm/norm0 <= self.rel_tol:
-                p.equals(z)
-                return (None, False)
-            
-            beta = r.inner(r)/r_old.inner(r_old)
-            d.equals_ax_p_by(-1., r, beta, d)
-
-        #####################
-        # END OF BIG FOR LOOP
-            
-        # if we got here, solver failed to find an answer
-        p.equals(z)
-        return (None, True)
+                    write_history(self.out_file, i, res_norm, norm0)
+                    if res_norm/norm0 <= self.rel_tol:
+                        p.equals(z)
+                        self._record(i, res_norm)
+                        return (None, False)
+                if i == self.max_iter:
+                    break
+
+                # product for the new direction
+                mat_vec(w, Bw)
+
+                # the curvature d^T B d follows from the reduced quantities
+                if i == 0:
+                    beta = 0.0
+                    curv = delta
+                else:
+                    beta = gamma/gamma_old
+                    curv = delta - beta*gamma/alpha
+                gamma_old = gamma
+                d.equals_ax_p_by(1., r, beta, d)
+                Bd.equals_ax_p_by(1., w, beta, Bd)
+                BBd.equals_ax_p_by(1., Bw, beta, BBd)
+
+                # check curvature
+                if curv <= 1e-8:
+                    # return steepest descent if negative
+                    self.out_file.write('# Negative curvature encountered!\n')
+                    if i == 0:
+                        p.equals(neg_grad)
+                    else:
+                        p.equals(z)
+                    self._record(i, res_norm)
+                    return (None, False)
+
+                alpha = gamma/curv
+                z.equals_ax_p_by(1., z, alpha, d)
+                r.equals_ax_p_by(1., r, -alpha, Bd)
+                w.equals_ax_p_by(1., w, -alpha, BBd)
+
+            #####################
+            # END OF BIG FOR LOOP
+
+            # if we got here, solver failed to find an answer
+            p.equals(z)
+            self._record(self.max_iter, res_norm)
+            return (None, True)
 
 # imports here to prevent circular errors
 from numpy import sqrt
+from kona.options import get_opt
 from kona.linalg.solvers.util import write_header, write_history
\ No newline at end of file
@@ -0,0 +1,73 @@
+from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.stcg import STCG
+from kona.linalg.solvers.krylov.gltr import GLTR
+from kona.linalg.solvers.krylov.flecs import FLECS
+from kona.linalg.solvers.krylov.fgmres import FGMRES
+from kona.linalg.solvers.krylov.gcrot import GCROT
+from kona.linalg.solvers.krylov.block_fgmres import BlockFGMRES
+from kona.linalg.solvers.krylov.line_search_cg import LineSearchCG
+
+KRYLOV_SOLVERS = {
+    'stcg' : STCG,
+    'gltr' : GLTR,
+    'flecs' : FLECS,
+    'fgmres' : FGMRES,
+    'gcrot' : GCROT,
+    'block_fgmres' : BlockFGMRES,
+    'linesearch_cg' : LineSearchCG,
+}
+
+def register_krylov_solver(name, solver_class):
+    """
+    Add a Krylov solver to the registry, so that algorithms can select it
+    by name through their ``krylov_solver`` option.
+
+    The algorithm that uses the solver determines the constructor arguments
+    and the ``solve()`` outputs it expects, so the new class should follow
+    the solver it replaces (e.g.: ``STCG`` for trust-region steps), and
+    declare the same ``capabilities``:
+
+    * ``'linear'`` : general linear systems, like ``FGMRES`` and ``GCROT``.
+    * ``'line_search'`` : descent directions, like ``LineSearchCG``.
+    * ``'trust_region'`` : trust-region steps, like ``STCG`` and ``GLTR``.
+    * ``'projected_trust_region'`` : trust-region steps with a null-space
+      projection preconditioner (``proj_cg``), like ``STCG``.
+    * ``'kkt_trust_region'`` : trust-region steps of the KKT system, like
+      ``FLECS``.
+
+    Parameters
+    ----------
+    name : str
+        Case-insensitive name of the solver.
+    solver_class : type
+        A subclass of ``KrylovSolver``.
+    """
+    assert issubclass(solver_class, KrylovSolver), \
+        "Krylov solvers must be derived from KrylovSolver!"
+    KRYLOV_SOLVERS[name.lower()] = solver_class
+
+def get_krylov_solver(name, capability=None):
+    """
+    Look up a Krylov solver class by name.
+
+    Parameters
+    ----------
+    name : str
+        Case-insensitive name of the solver.
+    capability : str, optional
+        Role the solver has to fill; see ``register_krylov_solver()``.
+
+    Returns
+    -------
+    type
+        The registered ``KrylovSolver`` subclass.
+    """
+    try:
+        solver_class = KRYLOV_SOLVERS[name.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError('Unknown Krylov solver: %s'%name)
+    if capability is not None and \
+            capability not in solver_class.capabilities:
+        raise ValueError(
+            'Krylov solver %s cannot be used for %s'%(name, capability))
+    return solver_class
@@ -1,4 +1,4 @@
-from kona.linalg.solvers.krylov.basic import KrylovSolver
+from kona.linalg.solvers.krylov.basic import KrylovSolver, record_stats
 
 class STCG(KrylovSolver):
     """
@@ -9,7 +9,14 @@ class STCG(KrylovSolver):
     radius : float
         Trust region radius.
     proj_cg : boolean
+    pipelined : boolean
+        If True, use the pipelined (Ghysels-Vanroose) recurrences, which need
+        a single fused reduction per iteration and track the norm of the
+        solution by recurrence.
     """
+
+    capabilities = ('trust_region', 'projected_trust_region')
+
     def __init__(self, vector_factory, optns=None, dual_factory=None):
         super(STCG, self).__init__(vector_factory, optns)
 
@@ -22,12 +29,14 @@ class STCG(KrylovSolver):
 
         # get other options
         self.proj_cg = get_opt(self.optns, False, 'proj_cg')
+        self.pipelined = get_opt(self.optns, False, 'pipelined')
 
         # set factory and request vectors needed in solve() method
-        self.vec_fac.request_num_vectors(7)
+        num_vecs = 10 if self.pipelined else 7
+        self.vec_fac.request_num_vectors(num_vecs)
         self.dual_fac = dual_factory
         if self.dual_fac is not None:
-            self.dual_fac.request_num_vectors(7)
+            self.dual_fac.request_num_vectors(num_vecs)
 
     def _validate_options(self):
         super(STCG, self)._validate_options()
@@ -42,9 +51,59 @@ class STCG(KrylovSolver):
             slack = self.dual_fac.generate()
             return CompositePrimalVector(design, slack)
 
+    def _finish(self, mat_vec, b, x, precond, r, z, norm0, res_norm2,
+                r_dot_z, iters):
+        # compute the predicted decrease in objective
+        r.plus(b)
+        pred = 0.5*x.inner(r)
+        r.minus(b)
+
+        # if flagged, perform the residual check
+        self._record(iters, r_dot_z if self.proj_cg else res_norm2)
+        failed_res = False
+        if self.check_res:
+            # get the final residual
+            mat_vec(x, r)
+            # perform r = b - r
+            r.times(-1)
+            r.plus(b)
+            if self.proj_cg:
+                precond(r, z)
+                res = r.inner(z)
+                if abs(res - r_dot_z) > 0.01*self.rel_tol*norm0:
+                    failed_res = True
+                    failed_out = (res - r_dot_z)/norm0
+            else:
+                res = r.norm2
+                if abs(res - res_norm2) > 0.01*self.rel_tol*norm0:
+                    failed_res = True
+                    failed_out = (res - res_norm2)/norm0
+            self.stats.res_true = res
+            # write the residual check message
+            self.out_file.write(
+                '# STCG final (true) residual : ' +
+                '|res|/|res0| = %e\n'%(res/norm0))
+            if failed_res:
+                self.out_file.write(
+                    '# WARNING in STCG.solve(): ' +
+                    'true residual norm and calculated residual norm ' +
+                    'do not agree.\n')
+                self.out_file.write('# (res - beta)/res0 = %e\n'%(failed_out))
+
+        # check that the solution satisfies the trust-region
+        x_norm2 = x.norm2
+        if (x_norm2 - self.radius) > 1e-6:
+            raise ValueError('STCG.solve() : solution outside of trust-region')
+
+        return pred
+
+    @record_stats
     def solve(self, mat_vec, b, x, precond):
         self._validate_options()
 
+        if self.pipelined:
+            return self._solve_pipelined(mat_vec, b, x, precond)
+
         # grab some vectors from memory stack
         r = self._generate_vector()
         z = self._generate_vector()
@@ -59,6 +118,7 @@ class STCG(KrylovSolver):
 
         norm0 = r.norm2
         res_norm2 = norm0
+        res0 = norm0
         precond(r, z)
         r_dot_z = r.inner(z)
         if self.proj_cg:
@@ -75,12 +135,9 @@ class STCG(KrylovSolver):
         #######################
         for i in xrange(self.max_iter):
 
-            # to be included from c++
-            # if (ptin.get<bool>("dynamic",false))
-            #     mat_vec.set_product_tol(ptin.get<double>("tol")*norm0/
-            #                   (res_norm2*static_cast<double>(maxiter_)))
-
-            # calculate alpha
+            # calculate alpha, relaxing the product accuracy as the residual
+            # drops
+            self._set_product_tol(mat_vec, res_norm2, res0)
             mat_vec(p, Ap)
             alpha = p.inner(Ap)
             # check alpha for non-positive curvature
@@ -183,46 +240,154 @@ class STCG(KrylovSolver):
             p.plus(z)
         #####################
         # END OF BIG FOR LOOP
+        self._set_product_tol(mat_vec, None, res0)
 
-        # compute the predicted decrease in objective
-        r.plus(b)
-        pred = 0.5*x.inner(r)
-        r.minus(b)
+        pred = self._finish(
+            mat_vec, b, x, precond, r, z, norm0, res_norm2, r_dot_z, i+1)
 
-        # if flagged, perform the residual check
-        failed_res = False
-        if self.check_res:
-            # get the final residual
-            mat_vec(x, r)
-            # perform r = b - r
-            r.times(-1)
-            r.plus(b)
-            if self.proj_cg:
-                precond(r, z)
-                res = r.inner(z)
-                if abs(res - r_dot_z) > 0.01*self.rel_tol*norm0:
-                    failed_res = True
-                    failed_out = (res - r_dot_z)/norm0
+        # release the work vectors back to memory
+        for vector in [r, z, p, Ap, work]:
+            vector.release()
+
+        # return some useful stuff
+        return pred, active
+
+    def _solve_pipelined(self, mat_vec, b, x, precond):
+        """
+        Pipelined variant of the solve, after Ghysels and Vanroose.
+
+        All the inner products of an iteration, including those needed to
+        update the norm of the solution for the trust-region check, are
+        computed with one ``fused_inner`` call. The preconditioner and the
+        matrix-vector product that follow do not depend on its result, so a
+        distributed implementation can overlap them with the reduction.
+        """
+        # grab some vectors from memory stack
+        r = self._generate_vector()
+        u = self._generate_vector() # M r
+        w = self._generate_vector() # A u
+        m = self._generate_vector() # M w
+        n = self._generate_vector() # A m
+        p = self._generate_vector()
+        s = self._generate_vector() # A p
+        q = self._generate_vector() # M s
+        t = self._generate_vector() # A q
+
+        # define initial residual and its preconditioned images
+        r.equals(b)
+        x.equals(0.0)
+        for vector in [p, s, q, t]:
+            vector.equals(0.0)
+        precond(r, u)
+        mat_vec(u, w)
+
+        # scalars for the recurrences of x^T x, x^T p and p^T p
+        x2 = 0.0
+        xp = 0.0
+        p2 = 0.0
+        alpha = 0.0
+        gamma_old = 1.0
+        active = False
+
+        # START OF BIG FOR LOOP
+        #######################
+        for i in xrange(self.max_iter + 1):
+
+            # the only reduction of the iteration
+            r_dot_z, delta, uu, up, xu, rr = r.fused_inner(
+                [(r, u), (w, u), (u, u), (u, p), (x, u), (r, r)])
+            res_norm2 = sqrt(max(rr, 0.0))
+            res = r_dot_z if self.proj_cg else res_norm2
+
+            # check convergence of the previous iteration
+            if i == 0:
+                norm0 = res
+                res0 = res_norm2
+                write_header(self.out_file, 'STCG', self.rel_tol, norm0)
+                write_history(self.out_file, 0, norm0, norm0)
             else:
-                res = r.norm2
-                if abs(res - res_norm2) > 0.01*self.rel_tol*norm0:
-                    failed_res = True
-                    failed_out = (res - res_norm2)/norm0
-            # write the residual check message
-            self.out_file.write(
-                '# STCG final (true) residual : ' +
-                '|res|/|res0| = %e\n'%(res/norm0))
-            if failed_res:
+                write_history(self.out_file, i, res, norm0)
+                if res < norm0*self.rel_tol or res < self.abs_tol:
+                    break
+            if i == self.max_iter:
+                break
+
+            # preconditioner and product for the new direction
+            precond(w, m)
+            self._set_product_tol(mat_vec, res_norm2, res0)
+            mat_vec(m, n)
+
+            # the curvature p^T A p follows from the reduced quantities
+            if i == 0:
+                beta = 0.0
+                curv = delta
+            else:
+                beta = r_dot_z/gamma_old
+                curv = delta - beta*r_dot_z/alpha
+            gamma_old = r_dot_z
+            xp = xu + beta*(xp + alpha*p2)
+            p2 = uu + 2.0*beta*up + beta**2*p2
+            p.equals_ax_p_by(1.0, u, beta, p)
+            s.equals_ax_p_by(1.0, w, beta, s)
+            q.equals_ax_p_by(1.0, m, beta, q)
+            t.equals_ax_p_by(1.0, n, beta, t)
+
+            # check for non-positive curvature
+            if curv <= 0.0:
+                # direction of non-positive curvature detected
+                if p2 > EPS:
+                    # step to the trust-region boundary
+                    tau = (-xp + sqrt(xp**2 - p2*(x2 - self.radius**2)))/p2
+                    x.equals_ax_p_by(1.0, x, tau, p)
+                    r.equals_ax_p_by(1.0, r, -tau, s)
+                res_norm2 = r.norm2
+                if self.proj_cg:
+                    precond(r, u)
+                    r_dot_z = r.inner(u)
+                    write_history(self.out_file, i+1, r_dot_z, norm0)
+                else:
+                    write_history(self.out_file, i+1, res_norm2, norm0)
                 self.out_file.write(
-                    '# WARNING in STCG.solve(): ' +
-                    'true residual norm and calculated residual norm ' +
-                    'do not agree.\n')
-                self.out_file.write('# (res - beta)/res0 = %e\n'%(failed_out))
+                    '# direction of nonpositive curvature detected: ' +
+                    'alpha = %e\n'%curv)
+                active = True
+                break
 
-        # check that the solution satisfies the trust-region
-        x_norm2 = x.norm2
-        if (x_norm2 - self.radius) > 1e-6:
-            raise ValueError('STCG.solve() : solution outside of trust-region')
+            # check to see if the step would leave the trust region
+            alpha = r_dot_z/curv
+            x2_new = x2 + 2.0*alpha*xp + alpha**2*p2
+            if sqrt(max(x2_new, 0.0)) > self.radius:
+                # calculate new step within trust region
+                tau = (-xp + sqrt(xp**2 - p2*(x2 - self.radius**2)))/p2
+                x.equals_ax_p_by(1.0, x, tau, p)
+                r.equals_ax_p_by(1.0, r, -tau, s)
+                res_norm2 = r.norm2
+                if self.proj_cg:
+                    precond(r, u)
+                    r_dot_z = r.inner(u)
+                    write_history(self.out_file, i+1, r_dot_z, norm0)
+                else:
+                    write_history(self.out_file, i+1, res_norm2, norm0)
+                self.out_file.write('# trust-region boundary encountered\n')
+                active = True
+                break
+
+            # if we got here, we're still inside the trust region
+            x.equals_ax_p_by(1.0, x, alpha, p)
+            r.equals_ax_p_by(1.0, r, -alpha, s)
+            u.equals_ax_p_by(1.0, u, -alpha, q)
+            w.equals_ax_p_by(1.0, w, -alpha, t)
+            x2 = x2_new
+        #####################
+        # END OF BIG FOR LOOP
+        self._set_product_tol(mat_vec, None, res0)
+
+        pred = self._finish(
+            mat_vec, b, x, precond, r, u, norm0, res_norm2, r_dot_z, i)
+
+        # release the work vectors back to memory
+        for vector in [r, u, w, m, n, p, s, q, t]:
+            vector.release()
 
         # return some useful stuff
         return pred, active
@@ -24,31 +24,41 @@ def abs_sign(x, y):
     """
     return abs(x)*np.sign(y)
 
-def calc_epsilon(eval_at_norm, mult_by_norm):
+def calc_epsilon(eval_at_norm, mult_by_norm, scheme='forward'):
     """
-    Determines the perturbation parameter for forward-difference based
+    Determines the perturbation parameter for finite-difference based
     matrix-vector products
 
+    The relative perturbation balances truncation against round-off errors:
+    :math:`\\sqrt{\\epsilon}` for forward differences, and
+    :math:`\\epsilon^{1/3}` for central differences.
+
     Parameters
     ----------
     eval_at_norm : float
         the norm of the vector at which the Jacobian-like matrix is evaluated
     mult_by_norm : float
         the norm of the vector that is being multiplied
+    scheme : str, optional
+        the difference scheme, ``'forward'`` or ``'central'``
 
     Returns
     -------
     float : perturbation parameter
     """
+    if scheme == 'central':
+        rel_eps = EPS**(1./3.)
+    else:
+        rel_eps = np.sqrt(EPS)
     if mult_by_norm < EPS*eval_at_norm or mult_by_norm < EPS:
         # multiplying vector is zero in a relative or absolute sense
         return 1.0
     else:
         if eval_at_norm < EPS*mult_by_norm:
             # multiplying vector dominates, so treat eval_at vector like zero
-            return np.sqrt(EPS)/mult_by_norm
+            return rel_eps/mult_by_norm
         else:
-            return np.sqrt(EPS)*eval_at_norm/mult_by_norm
+            return rel_eps*eval_at_norm/mult_by_norm
 
 def eigen_decomp(A):
     """
@@ -77,6 +87,63 @@ def eigen_decomp(A):
     inv_idx[idx] = np.arange(idx.shape[0])
     return eig_vals[idx].real, eig_vec[:,inv_idx].real
 
+def harmonic_ritz(H, num_vecs, WtZ=None):
+    """
+    Returns the harmonic Ritz vectors of the Arnoldi relation
+    :math:`AZ_m = W_{m+1}\\bar{H}_m` that belong to the harmonic Ritz values
+    of smallest magnitude.
+
+    Complex conjugate pairs are represented by the real and imaginary parts of
+    one vector of the pair, and are only returned together.
+
+    By default, :math:`Z_m` is assumed to be the (flexibly) preconditioned
+    image of :math:`W_m`. If the projection :math:`W_{m+1}^TZ_m` is given
+    instead, the vectors are the harmonic Ritz vectors of :math:`A` itself in
+    the span of :math:`Z_m`, which remains valid for arbitrary search
+    directions :math:`Z_m`.
+
+    Parameters
+    ----------
+    H : 2-D numpy.ndarray
+        (m+1) x m upper Hessenberg matrix of the Arnoldi relation.
+    num_vecs : int
+        Maximum number of vectors to return.
+    WtZ : 2-D numpy.ndarray, optional
+        (m+1) x m matrix of inner products between the two bases.
+
+    Returns
+    -------
+    2-D numpy.ndarray
+        m x k matrix, with k <= num_vecs, whose columns are the harmonic Ritz
+        vectors in the coordinates of :math:`Z_m`.
+    """
+    m = H.shape[1]
+    try:
+        if WtZ is None:
+            Hm = H[:m, :m]
+            em = np.zeros(m)
+            em[-1] = 1.0
+            f = np.linalg.solve(Hm.T, em)
+            theta, G = np.linalg.eig(Hm + H[m, m-1]**2*np.outer(f, em))
+        else:
+            # (AZ)^T (AZg - theta Zg) = 0
+            theta, G = np.linalg.eig(
+                np.linalg.solve(H.T.dot(WtZ), H.T.dot(H)))
+    except np.linalg.LinAlgError:
+        return np.zeros((m, 0))
+    vecs = []
+    for j in np.argsort(abs(theta)):
+        if len(vecs) == num_vecs:
+            break
+        if theta[j].imag == 0.0:
+            vecs.append(G[:, j].real)
+        elif theta[j].imag > 0.0 and len(vecs) + 2 <= num_vecs:
+            vecs.append(G[:, j].real)
+            vecs.append(G[:, j].imag)
+    if len(vecs) == 0:
+        return np.zeros((m, 0))
+    return np.array(vecs).T
+
 def apply_givens(s, c, h1, h2):
     """
     Applies a Givens rotation to a 2-vector
@@ -146,6 +213,43 @@ def generate_givens(dx, dy):
 
     return dx, dy, s, c
 
+def givens_update(Q, H, g, i):
+    """
+    Triangularizes column ``i`` of an upper Hessenberg matrix in place.
+
+    Instead of applying the previous Givens rotations one at a time, their
+    product is accumulated in ``Q`` so that they can be applied to the new
+    column with a single matrix-vector product. The new rotation is then
+    generated, folded into ``Q`` and applied to ``g``.
+
+    ``Q`` must be the identity when column 0 is triangularized.
+
+    Parameters
+    ----------
+    Q : 2-D numpy.ndarray
+        Accumulated rotations; on exit, :math:`Q\bar{H}` is upper triangular
+        up to column ``i``.
+    H : 2-D numpy.ndarray
+        Hessenberg matrix, triangularized up to column ``i-1`` on entry.
+    g : 1-D numpy.ndarray
+        Right-hand side of the least-squares problem, rotated like ``H``.
+    i : int
+        Index of the new column.
+
+    Returns
+    -------
+    s : float
+        sine of the new Givens rotation angle
+    c : float
+        cosine of the new Givens rotation angle
+    """
+    if i > 0:
+        H[:i+1, i] = Q[:i+1, :i+1].dot(H[:i+1, i])
+    H[i, i], H[i+1, i], s, c = generate_givens(H[i, i], H[i+1, i])
+    Q[i:i+2, :i+2] = np.array([[c, s], [-s, c]]).dot(Q[i:i+2, :i+2])
+    g[i], g[i+1] = apply_givens(s, c, g[i], g[i+1])
+    return s, c
+
 def lanczos_tridiag(mat_vec, Q, Q_init=False):
     """
     Uses the traditional Lanczos algorithm to compute a tridiagonalization.
@@ -325,18 +429,13 @@ def solve_trust_reduced(H, g, radius):
     eig_vals, eig = eigen_decomp(H)
     eigmin = eig_vals[0]
     lam = 0.0
-    n = H.shape[0]
     if eigmin > 1e-12:
         # Hessian is semi-definite on span(Z), so solve for y and check if ||y||
         # is in trust region radius
         y, fnc, dfnc = secular_function(H, g, lam, radius)
         if (fnc < 0.0): # i.e. norm_2(y) < raidus
             # compute predicted decrease in objective and return
-            pred = 0.0
-            for i in xrange(n):
-                for j in xrange(n):
-                    pred -= 0.5*y[i]*H[i,j]*y[j]
-                pred -= g[i]*y[i]
+            pred = -y.dot(0.5*np.array(H.dot(y)) + g)
             return y, lam, pred
 
     # if we get here, either the Hessian is semi-definite or ||y|| > radius
@@ -476,14 +575,46 @@ def secular_function(H, g, lam, radius):
 
     return y, fnc, dfnc
 
-def mod_GS_normalize(i, Hsbg, w):
+def _cgs2(w, basis, nrm, reorth=0.5):
+    """
+    Orthogonalizes w against the (orthonormal) basis vectors using classical
+    Gram-Schmidt with selective reorthogonalization (CGS2).
 
-    reorth = 0.98
+    Each sweep computes all the projection coefficients with one fused
+    ``multi_inner`` and removes them with one fused ``multi_axpy``. A second
+    sweep is performed only when the first one removed so much of ``w`` that
+    cancellation may have spoiled orthogonality.
+
+    Parameters
+    ----------
+    w : KonaVector-like
+        Vector to be orthogonalized in place.
+    basis : list of KonaVector-like
+        Orthonormal vectors to orthogonalize against.
+    nrm : float
+        Squared norm of ``w`` on entry.
+    reorth : float, optional
+        A second sweep is done if the squared norm of ``w`` drops below this
+        fraction of its initial value.
 
-    # get the norm of the vector being orthogonalized, and find the
-    # threshold for re-orthogonalization
+    Returns
+    -------
+    numpy.ndarray
+        Projection coefficients of the original ``w`` onto the basis.
+    """
+    coeffs = w.multi_inner(basis)
+    w.multi_axpy(-coeffs, basis)
+    # estimate the remaining norm and check if reorthogonalization is necessary
+    if nrm - coeffs.dot(coeffs) < reorth*nrm:
+        correction = w.multi_inner(basis)
+        w.multi_axpy(-correction, basis)
+        coeffs += correction
+    return coeffs
+
+def mod_GS_normalize(i, Hsbg, w):
+
+    # get the norm of the vector being orthogonalized
     nrm = w[i+1].inner(w[i+1])
-    thr = nrm*reorth
     if abs(nrm) <= EPS:
         # norm of w[i+1] is effectively zero; it is linearly dependent
         # raise a LinAlgError to catch later
@@ -499,23 +630,8 @@ def mod_GS_normalize(i, Hsbg, w):
         w[i+1].divide_by(np.sqrt(nrm))
         return
 
-    # begin main Gram-Schmidt loop
-    for k in xrange(i+1):
-        prod = w[i+1].inner(w[k])
-        Hsbg[k, i] = prod
-        w[i+1].equals_ax_p_by(1.0, w[i+1], -prod, w[k])
-
-        # check if reorthogonalization is necessary
-        if (prod**2 > thr):
-            prod = w[i+1].inner(w[k])
-            Hsbg[k, i] += prod
-            w[i+1].equals_ax_p_by(1.0, w[i+1], -prod, w[k])
-
-        # update norm and check size
-        nrm -= Hsbg[k, i]**2
-        if (nrm < 0.0):
-            nrm = 0.0
-        thr = nrm*reorth
+    # orthogonalize against the whole basis at once
+    Hsbg[:i+1, i] = _cgs2(w[i+1], w[:i+1], nrm)
 
     # test the resulting vector
     nrm = w[i+1].norm2
@@ -536,11 +652,8 @@ def mod_gram_schmidt(i, B, C, w, normalize=False):
         # nothing to do, exit
         return
 
-    # get the norm of the vector being orthogonalized, and find the
-    # threshold for re-orthogonalization
-    reorth = 0.98
+    # get the norm of the vector being orthogonalized
     nrm = w.inner(w)
-    thr = nrm*reorth
     if abs(nrm) <= EPS:
         # norm of w is effectively zero; it is linearly dependent
         # raise a LinAlgError to catch later
@@ -551,23 +664,8 @@ def mod_gram_schmidt(i, B, C, w, normalize=False):
     elif np.isnan(nrm):
         raise ValueError('mod_gram_schmidt failed : w = NaN')
 
-    # begin main Gram-Schmidt loop
-    for k in xrange(len(C)):
-        prod = w.inner(C[k])
-        B[k, i] = prod
-        w.equals_ax_p_by(1.0, w, -prod, C[k])
-
-        # check if reorthogonalization is necessary
-        if (prod**2 > thr):
-            prod = w.inner(C[k])
-            B[k, i] += prod
-            w.equals_ax_p_by(1.0, w, -prod, C[k])
-
-        # update norm and check size
-        nrm -= B[k, i]**2
-        if (nrm < 0.0):
-            nrm = 0.0
-            thr = nrm*reorth
+    # orthogonalize against the whole basis at once
+    B[:len(C), i] = _cgs2(w, C, nrm)
 
     # test the resulting vector
     nrm = w.norm2
@@ -580,7 +678,7 @@ def mod_gram_schmidt(i, B, C, w, normalize=False):
             w.divide_by(nrm)
         return
 
-def write_header(out_file, solver_name, res_tol, res_init):
+def write_header(out_file, solver_name, res_tol, res_init, precision=None):
     """
     Writes krylov solver data file header text.
 
@@ -594,13 +692,16 @@ def write_header(out_file, solver_name, res_tol, res_init):
         Residual tolerance for convergence.
     res_init : float
         Initial residual norm.
+    precision : string, optional
+        Storage precision of the Krylov basis vectors, if the solver has one.
     """
     out_file.write(
         '# %s residual history\n'%solver_name +
         '# residual tolerance target = %e\n'%res_tol +
-        '# initial residual norm     = %e\n'%res_init +
-        '# iters' + ' '*12 + 'rel. res.\n'
-    )
+        '# initial residual norm     = %e\n'%res_init)
+    if precision is not None:
+        out_file.write('# basis precision           = %s\n'%precision)
+    out_file.write('# iters' + ' '*12 + 'rel. res.\n')
 
 def write_history(out_file, num_iter, res, res_init):
     """
@@ -1,3 +1,7 @@
+from itertools import count
+
+# global source of vector version stamps
+_version_counter = count()
 
 class KonaVector(object):
     """
@@ -18,14 +22,51 @@ class KonaVector(object):
         Pointer to the Kona user memory.
     base : BaseVector
         User defined vector object that contains data and operations on data.
+    _version : int
+        Globally unique stamp that changes whenever the vector data changes.
     """
 
     def __init__(self, memory_obj, user_vector=None):
         self._memory = memory_obj
         self.base = user_vector
+        self.touch()
+
+    def touch(self):
+        """
+        Mark the vector data as modified.
+
+        All in-place operations call this to give the vector a new, globally
+        unique version stamp. Code that writes into ``base`` directly must call
+        it afterwards.
+        """
+        self._version = next(_version_counter)
+
+    @property
+    def version(self):
+        """
+        Version stamp of the vector data. Two stamps are equal only if they
+        belong to the same vector and the data has not changed in between.
+
+        Returns
+        -------
+        int
+            Version stamp.
+        """
+        return self._version
 
     def __del__(self):
-        self._memory.push_vector(type(self), self.base)
+        self.release()
+
+    def release(self):
+        """
+        Return the underlying user data to the Kona memory stack immediately,
+        instead of waiting for the garbage collector.
+
+        The vector must not be used after it is released.
+        """
+        if self.base is not None:
+            self._memory.push_vector(type(self), self.base)
+            self.base = None
 
     def _check_type(self, vector):
         if not isinstance(vector, type(self)):
@@ -50,6 +91,7 @@ class KonaVector(object):
         else:
             assert isinstance(val, type(self))
             self.base.equals_vector(val.base)
+        self.touch()
 
     def plus(self, vector):
         """
@@ -64,6 +106,7 @@ class KonaVector(object):
         """
         assert isinstance(vector, type(self))
         self.base.plus(vector.base)
+        self.touch()
 
     def minus(self, vector):
         """
@@ -78,11 +121,11 @@ class KonaVector(object):
         """
         if vector == self:  # special case...
             self.equals(0)
+            return
 
         assert isinstance(vector, type(self))
-        self.base.times_scalar(-1.)
-        self.base.plus(vector.base)
-        self.base.times_scalar(-1.)
+        self.base.equals_ax_p_by(1., self.base, -1., vector.base)
+        self.touch()
 
     def times(self, factor):
         """
@@ -101,6 +144,7 @@ class KonaVector(object):
         else:
             assert isinstance(factor, type(self))
             self.base.times_vector(factor.base)
+        self.touch()
 
     def divide_by(self, val):
         """
@@ -136,6 +180,7 @@ class KonaVector(object):
         assert isinstance(X, type(self))
         assert isinstance(Y, type(self))
         self.base.equals_ax_p_by(a, X.base, b, Y.base)
+        self.touch()
 
     def exp(self, vector):
         """
@@ -149,6 +194,7 @@ class KonaVector(object):
         """
         assert isinstance(vector, type(self))
         self.base.exp(vector.base)
+        self.touch()
 
     def log(self, vector):
         """
@@ -162,6 +208,7 @@ class KonaVector(object):
         """
         assert isinstance(vector, type(self))
         self.base.log(vector.base)
+        self.touch()
 
     def pow(self, power):
         """
@@ -172,6 +219,7 @@ class KonaVector(object):
         power : float
         """
         self.base.pow(power)
+        self.touch()
 
     def inner(self, vector):
         """
@@ -185,6 +233,84 @@ class KonaVector(object):
         assert isinstance(vector, type(self))
         return self.base.inner(vector.base)
 
+    def multi_inner(self, vectors):
+        """
+        Computes inner products with each vector in a list.
+
+        Uses the fused ``multi_inner`` of the user data container if it
+        exists, and falls back to individual inner products otherwise.
+
+        Parameters
+        ----------
+        vectors : list of KonaVector
+            Vectors for the operation.
+
+        Returns
+        -------
+        numpy.ndarray
+            Inner products, one per vector.
+        """
+        for vector in vectors:
+            assert isinstance(vector, type(self))
+        bases = [vector.base for vector in vectors]
+        if hasattr(self.base, 'multi_inner'):
+            return np.asarray(self.base.multi_inner(bases), dtype=float)
+        else:
+            return np.array([self.base.inner(base) for base in bases])
+
+    def fused_inner(self, pairs):
+        """
+        Computes the inner products of several pairs of vectors with a single
+        reduction.
+
+        Uses the ``fused_inner`` of the user data container if it exists, and
+        falls back to individual inner products otherwise.
+
+        Parameters
+        ----------
+        pairs : list of tuple of KonaVector
+            Pairs of vectors for the operation.
+
+        Returns
+        -------
+        numpy.ndarray
+            Inner products, one per pair.
+        """
+        for x, y in pairs:
+            assert isinstance(x, type(self))
+            assert isinstance(y, type(self))
+        bases = [(x.base, y.base) for x, y in pairs]
+        if hasattr(self.base, 'fused_inner'):
+            return np.asarray(self.base.fused_inner(bases), dtype=float)
+        else:
+            return np.array([x.inner(y) for x, y in bases])
+
+    def multi_axpy(self, coeffs, vectors):
+        """
+        Adds a linear combination of the vectors in a list to this vector in
+        place, i.e.: ``self += sum(coeffs[k]*vectors[k])``.
+
+        Uses the fused ``multi_axpy`` of the user data container if it
+        exists, and falls back to individual scaled additions otherwise.
+
+        Parameters
+        ----------
+        coeffs : array-like
+            Scalar coefficients of the vectors.
+        vectors : list of KonaVector
+            Vectors for the operation.
+        """
+        assert len(coeffs) == len(vectors)
+        for vector in vectors:
+            assert isinstance(vector, type(self))
+        bases = [vector.base for vector in vectors]
+        if hasattr(self.base, 'multi_axpy'):
+            self.base.multi_axpy(coeffs, bases)
+        else:
+            for coeff, base in zip(coeffs, bases):
+                self.base.equals_ax_p_by(1., self.base, coeff, base)
+        self.touch()
+
     @property
     def norm2(self):  # this takes the L2 norm of the vector
         """
@@ -229,6 +355,7 @@ class DesignVector(KonaVector):
         """
         if self._memory.num_real_design is not None:
             self.base.data[self._memory.num_real_design:] = 0.
+            self.touch()
 
     def restrict_to_target(self):
         """
@@ -240,6 +367,7 @@ class DesignVector(KonaVector):
             self.base.data[:self._memory.num_real_design] = 0.
         else:
             self.base.data[:] = 0.
+        self.touch()
 
     def convert_to_dual(self, dual_vector):
         """
@@ -262,6 +390,7 @@ class DesignVector(KonaVector):
         if self._memory.num_real_design is not None:
             eq_vec.base.data[self._memory.num_real_ceq:] = \
                 self.base.data[self._memory.num_real_design:]
+            eq_vec.touch()
 
     def enforce_bounds(self):
         """
@@ -275,12 +404,14 @@ class DesignVector(KonaVector):
             for i in xrange(len(self.base.data)):
                 if self.base.data[i] > self.ub:
                     self.base.data[i] = self.ub
+        self.touch()
 
     def equals_init_design(self):
         """
         Sets this vector equal to the initial design point.
         """
         self.base.data[:] = self._memory.solver.init_design()
+        self.touch()
 
     def equals_objective_partial(self, at_primal, at_state, scale=1.0):
         """
@@ -306,8 +437,12 @@ class DesignVector(KonaVector):
                 "must be DesignVector or CompositePrimalVector!")
         assert isinstance(at_state, StateVector), \
             "Invalid state vector type: must be StateVector!"
-        self.base.data[:] = self._memory.solver.eval_dFdX(
-            at_design.base.data, at_state.base)
+        key, dFdX = self._memory.get_eval('eval_dFdX', at_design, at_state)
+        if dFdX is None:
+            dFdX = np.array(self._memory.solver.eval_dFdX(
+                at_design.base.data, at_state.base), dtype=float)
+            self._memory.store_eval(key, dFdX)
+        self.base.data[:] = dFdX
         self.times(scale)
 
     def equals_total_gradient(self, at_primal, at_state, at_adjoint, scale=1.0):
@@ -342,8 +477,10 @@ class DesignVector(KonaVector):
         self.equals_objective_partial(at_design, at_state)
         self.times(scale)
         # multiply the adjoint variables with the jacobian
+        self._memory.activate_linearization(at_design, at_state)
         self.base.data[:] += self._memory.solver.multiply_dRdX_T(
             at_design.base.data, at_state.base, at_adjoint.base)
+        self.touch()
 
     def equals_lagrangian_total_gradient(
             self, at_primal, at_state, at_dual, at_adjoint,
@@ -404,6 +541,7 @@ class DesignVector(KonaVector):
             self.base.data[:] += self._memory.solver.multiply_dCINdX_T(
                 at_design.base.data, at_state.base, at_dual_ineq.base.data) * \
                 cnstr_scale
+        self.touch()
 
 class StateVector(KonaVector):
     """
@@ -459,8 +597,17 @@ class StateVector(KonaVector):
                 "must be DesignVector or CompositePrimalVector!")
         assert isinstance(at_state, StateVector), \
             "Invalid state vector type: must be StateVector!"
-        self._memory.solver.eval_residual(
-            at_design.base.data, at_state.base, self.base)
+        key, residual = self._memory.get_eval(
+            'eval_residual', at_design, at_state)
+        if residual is not None:
+            self.base.data[:] = residual
+        else:
+            self._memory.solver.eval_residual(
+                at_design.base.data, at_state.base, self.base)
+            # only Kona's own state containers can be copied into the cache
+            if isinstance(self.base, BaseVector):
+                self._memory.store_eval(key, self.base.data.copy())
+        self.touch()
 
     def equals_primal_solution(self, at_primal):
         """
@@ -482,12 +629,90 @@ class StateVector(KonaVector):
                 "must be DesignVector or CompositePrimalVector!")
         cost = self._memory.solver.solve_nonlinear(
             at_design.base.data, self.base)
+        self.touch()
         self._memory.cost += abs(cost)
         if cost < 0:
             return False
         else:
             return True
 
+    def equals_objective_adjoint_rhs(self, at_primal, at_state, scale=1.0):
+        """
+        Computes in-place the right hand side of the objective adjoint system,
+        ``-scale * dF/dU``, so that several adjoint systems can be solved
+        together with :meth:`~kona.linalg.matrices.common.dRdU.solve_multi`.
+
+        Parameters
+        ----------
+        at_primal : DesignVector or CompositePrimalVector
+            Current primal point.
+        at_state : StateVector
+            Current state point.
+        scale : float, optional
+            Scaling for the objective function.
+        """
+        self.equals_objective_partial(at_primal, at_state)
+        self.times(-scale)
+
+    def equals_constraint_adjoint_rhs(self, at_primal, at_state, at_dual,
+                                      state_work, scale=1.0):
+        """
+        Computes in-place the right hand side of the constraint adjoint system,
+        ``-scale * dual^T * dC/dU``.
+
+        Parameters
+        ----------
+        at_primal : DesignVector or CompositePrimalVector
+            Current primal point.
+        at_state : StateVector
+            Current state point.
+        at_dual : DualVectorEQ, DualVectorINEQ or CompositeDualVector
+            Current dual point.
+        state_work : StateVector
+            Temporary work vector of State type.
+        scale : float, optional
+            Scaling for the constraints.
+        """
+        assert isinstance(state_work, StateVector), \
+            "Invalid work vector type: must be StateVector!"
+        dCdU(at_primal, at_state).T.product(at_dual, self, state_work)
+        self.times(-scale)
+
+    def equals_lagrangian_adjoint_rhs(self, at_kkt, at_state, state_work,
+                                      obj_scale=1.0, cnstr_scale=1.0):
+        """
+        Computes in-place the right hand side of the Lagrangian adjoint system,
+        ``-(obj_scale * dF/dU + cnstr_scale * dual^T * dC/dU)``.
+
+        Parameters
+        ----------
+        at_kkt : ReducedKKTVector
+            Current KKT point.
+        at_state : StateVector
+            Current state point.
+        state_work : StateVector
+            Temporary work vector of State type.
+        obj_scale : float, optional
+            Scaling for the objective function.
+        cnstr_scale : float, optional
+            Scaling for the constraints.
+        """
+        assert isinstance(at_kkt, ReducedKKTVector), \
+            "Invalid KKT vector: must be ReducedKKTVector!"
+        assert isinstance(state_work, StateVector), \
+            "Invalid work vector type: must be StateVector!"
+        at_primal = at_kkt.primal
+        at_dual = at_kkt.dual
+        # get the constraint contribution
+        dCdU(at_primal, at_state).T.product(at_dual, self, state_work)
+        self.times(cnstr_scale)
+        # get objective partial
+        state_work.equals_objective_partial(at_primal, at_state)
+        state_work.times(obj_scale)
+        # form the adjoint RHS
+        self.plus(state_work)
+        self.times(-1.)
+
     def equals_objective_adjoint(self, at_primal, at_state, state_work,
                                  scale=1.0):
         """
@@ -507,8 +732,7 @@ class StateVector(KonaVector):
         """
         assert isinstance(state_work, StateVector), \
             "Invalid work vector type: must be StateVector!"
-        state_work.equals_objective_partial(at_primal, at_state)
-        state_work.times(-scale) # RHS = (-scale * dF/dU)
+        state_work.equals_objective_adjoint_rhs(at_primal, at_state, scale)
         dRdU(at_primal, at_state).T.solve(state_work, self, rel_tol=1e-6)
 
     def equals_constraint_adjoint(self, at_primal, at_state, at_dual,
@@ -530,8 +754,8 @@ class StateVector(KonaVector):
         """
         assert isinstance(state_work, StateVector), \
             "Invalid work vector type: must be StateVector!"
-        dCdU(at_primal, at_state).T.product(at_dual, state_work, self)
-        state_work.times(-scale) # RHS = (-scale * dual^T * dC/dU)
+        state_work.equals_constraint_adjoint_rhs(
+            at_primal, at_state, at_dual, self, scale)
         dRdU(at_primal, at_state).T.solve(state_work, self, rel_tol=1e-6)
 
     def equals_lagrangian_adjoint(self, at_kkt, at_state, state_work,
@@ -546,8 +770,6 @@ class StateVector(KonaVector):
             Current KKT point.
         at_state : StateVector
             Current state point.
-        adj_work : StateVector
-            Temporary work vector of State type.
         state_work : StateVector
             Temporary work vector of State type.
         obj_scale : float, optional
@@ -556,21 +778,10 @@ class StateVector(KonaVector):
             Scaling for the constraints.
         """
         # assemble the right hand side for the Lagrangian adjoint solve
-        assert isinstance(at_kkt, ReducedKKTVector), \
-            "Invalid KKT vector: must be ReducedKKTVector!"
-        at_primal = at_kkt.primal
-        at_dual = at_kkt.dual
-        # get the constraint contribution
-        dCdU(at_primal, at_state).T.product(at_dual, self, state_work)
-        self.times(cnstr_scale)
-        # get objective partial
-        state_work.equals_objective_partial(at_primal, at_state)
-        state_work.times(obj_scale)
-        # form the adjoint RHS
-        state_work.plus(self)
-        state_work.times(-1.)
+        state_work.equals_lagrangian_adjoint_rhs(
+            at_kkt, at_state, self, obj_scale, cnstr_scale)
         # solve the adjoint system
-        dRdU(at_primal, at_state).T.solve(state_work, self, rel_tol=1e-6)
+        dRdU(at_kkt.primal, at_state).T.solve(state_work, self, rel_tol=1e-6)
 
 class DualVector(KonaVector):
     pass
@@ -585,6 +796,7 @@ class DualVectorEQ(DualVector):
         """
         if self._memory.num_real_ceq is not None:
             self.base.data[self._memory.num_real_ceq:] = 0.
+            self.touch()
 
     def restrict_to_idf(self):
         """
@@ -596,6 +808,7 @@ class DualVectorEQ(DualVector):
             self.base.data[:self._memory.num_real_ceq] = 0.
         else:
             self.base.data[:] = 0.
+        self.touch()
 
     def convert_to_design(self, primal_vector):
         """
@@ -619,6 +832,7 @@ class DualVectorEQ(DualVector):
             design_vector.base.data[:self._memory.num_real_design] = 0.
             design_vector.base.data[self._memory.num_real_design:] = \
                 self.base.data[self._memory.num_real_ceq:]
+            design_vector.touch()
 
     def equals_constraints(self, at_primal, at_state, scale=1.0):
         """
@@ -646,8 +860,13 @@ class DualVectorEQ(DualVector):
         assert isinstance(at_state, StateVector), \
             "Invalid state vector type: must be StateVector!"
 
-        self.base.data[:] = self._memory.solver.eval_eq_cnstr(
-            at_design.base.data, at_state.base)
+        key, cnstr = self._memory.get_eval(
+            'eval_eq_cnstr', at_design, at_state)
+        if cnstr is None:
+            cnstr = np.array(self._memory.solver.eval_eq_cnstr(
+                at_design.base.data, at_state.base), dtype=float)
+            self._memory.store_eval(key, cnstr)
+        self.base.data[:] = cnstr
         self.times(scale)
 
 class DualVectorINEQ(DualVector):
@@ -678,13 +897,19 @@ class DualVectorINEQ(DualVector):
         assert isinstance(at_state, StateVector), \
             "Invalid state vector type: must be StateVector!"
 
-        self.base.data[:] = self._memory.solver.eval_ineq_cnstr(
-            at_design.base.data, at_state.base)
+        key, cnstr = self._memory.get_eval(
+            'eval_ineq_cnstr', at_design, at_state)
+        if cnstr is None:
+            cnstr = np.array(self._memory.solver.eval_ineq_cnstr(
+                at_design.base.data, at_state.base), dtype=float)
+            self._memory.store_eval(key, cnstr)
+        self.base.data[:] = cnstr
         self.times(scale)
 
 
 # package imports at the bottom to prevent import errors
 import numpy as np
+from kona.user import BaseVector
 from kona.linalg.vectors.composite import ReducedKKTVector
 from kona.linalg.vectors.composite import CompositePrimalVector
 from kona.linalg.matrices.common import *
\ No newline at end of file
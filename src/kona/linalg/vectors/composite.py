@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 class CompositeFactory(object):
     """
     A factory-like object that generates composite vectors.
@@ -96,6 +98,24 @@ class CompositeFactory(object):
             dual = self._factories[1].generate()
             return ReducedKKTVector(primal, dual)
 
+    @contextmanager
+    def borrow(self, count):
+        """
+        Context manager that generates the given number of composite vectors
+        and releases them back to memory when the block exits.
+
+        Parameters
+        ----------
+        count : int
+            Number of vectors to generate.
+        """
+        vectors = [self.generate() for i in xrange(count)]
+        try:
+            yield vectors
+        finally:
+            for vector in vectors:
+                vector.release()
+
 class CompositeVector(object):
     """
     Base class shell for all composite vectors.
@@ -104,6 +124,14 @@ class CompositeVector(object):
         self._vectors = vectors
         self._memory = self._vectors[0]._memory
 
+    def release(self):
+        """
+        Return the data of all the component vectors to the Kona memory stack
+        immediately. The vector must not be used after it is released.
+        """
+        for vector in self._vectors:
+            vector.release()
+
     def _check_type(self, vec):
         if not isinstance(vec, type(self)):
             raise TypeError('CompositeVector() >> ' +
@@ -238,6 +266,68 @@ class CompositeVector(object):
             total_prod += self._vectors[i].inner(vector._vectors[i])
         return total_prod
 
+    def multi_inner(self, vectors):
+        """
+        Computes inner products with each vector in a list.
+
+        Parameters
+        ----------
+        vectors : list of CompositeVector
+            Vectors for the operation.
+
+        Returns
+        -------
+        numpy.ndarray : Inner products, one per vector.
+        """
+        for vector in vectors:
+            self._check_type(vector)
+        total_prod = np.zeros(len(vectors))
+        for i in xrange(len(self._vectors)):
+            total_prod += self._vectors[i].multi_inner(
+                [vector._vectors[i] for vector in vectors])
+        return total_prod
+
+    def fused_inner(self, pairs):
+        """
+        Computes the inner products of several pairs of vectors, with one
+        reduction per component.
+
+        Parameters
+        ----------
+        pairs : list of tuple of CompositeVector
+            Pairs of vectors for the operation.
+
+        Returns
+        -------
+        numpy.ndarray : Inner products, one per pair.
+        """
+        for x, y in pairs:
+            self._check_type(x)
+            self._check_type(y)
+        total_prod = np.zeros(len(pairs))
+        for i in xrange(len(self._vectors)):
+            total_prod += self._vectors[i].fused_inner(
+                [(x._vectors[i], y._vectors[i]) for x, y in pairs])
+        return total_prod
+
+    def multi_axpy(self, coeffs, vectors):
+        """
+        Adds a linear combination of the vectors in a list to this vector in
+        place.
+
+        Parameters
+        ----------
+        coeffs : array-like
+            Scalar coefficients of the vectors.
+        vectors : list of CompositeVector
+            Vectors for the operation.
+        """
+        for vector in vectors:
+            self._check_type(vector)
+        for i in xrange(len(self._vectors)):
+            self._vectors[i].multi_axpy(
+                coeffs, [vector._vectors[i] for vector in vectors])
+
     def exp(self, vector):
         """
         Computes the element-wise exponential of the given vector and stores it
@@ -420,6 +510,7 @@ class PrimalDualVector(CompositeVector):
             dLdx.base.data[:] -= dLdx._memory.solver.multiply_dCINdX_T(
                 design.base.data, state.base, x.ineq.base.data) * \
                 cnstr_scale
+        dLdx.touch()
         # include constraint terms
         if ceq is not None:
             ceq.equals_constraints(design, state, cnstr_scale)
@@ -577,12 +668,15 @@ class PrimalDualVector(CompositeVector):
         """
         ptr = 0
         self.primal.base.data[:] = A[ptr:ptr+self.primal._memory.ndv]
+        self.primal.touch()
         ptr += self.primal._memory.ndv
         if self.eq is not None:
             self.eq.base.data[:] = A[ptr:ptr+self.eq._memory.neq]
+            self.eq.touch()
             ptr += self.eq._memory.neq
         if self.ineq is not None:
             self.ineq.base.data[:] = A[ptr:ptr+self.ineq._memory.nineq]
+            self.ineq.touch()
 
 class ReducedKKTVector(CompositeVector):
     """
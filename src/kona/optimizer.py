@@ -20,7 +20,16 @@ class Optimizer(object):
     def __init__(self, solver, algorithm, optns=None):
 
         # initialize optimization memory
-        self._memory = KonaMemory(solver)
+        slab_alloc = False
+        eval_cache = 0
+        file_mode = 'unbuffered'
+        if isinstance(optns, dict):
+            slab_alloc = get_opt(optns, False, 'slab_alloc')
+            eval_cache = get_opt(optns, 0, 'eval_cache')
+            file_mode = get_opt(optns, 'unbuffered', 'file_mode')
+        self._memory = KonaMemory(
+            solver, slab_alloc=slab_alloc, eval_cache_size=eval_cache,
+            file_mode=file_mode)
 
         # set default file handles
         self._optns = {
@@ -110,13 +119,26 @@ class Optimizer(object):
             self._optns['info_file'].write('===========================================\n')
             print_dict(self._optns, out_file=self._optns['info_file'])
             self._optns['info_file'].write('\n')
-        # allocate memory and run the optimization
-        self._memory.allocate_memory()
-        self._algorithm.solve()
+        # allocate memory on the first call and run the optimization
+        if not self._memory.allocated:
+            self._memory.allocate_memory()
+        try:
+            self._algorithm.solve()
+        finally:
+            # write out any buffered output, but keep the files open for
+            # further calls to solve()
+            self._memory.flush_files()
+
+    def close(self):
+        """
+        Flush and close the output files. Call this once the optimizer is no
+        longer needed; any further output is discarded.
+        """
+        self._memory.close_files()
 
 # package imports at the bottom to prevent circular import errors
 import collections
 import numpy as np
-from kona.options import print_dict
+from kona.options import print_dict, get_opt
 from kona.user import UserSolver
 from kona.linalg.memory import KonaMemory
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark for the dense reduced-space kernels of the Krylov solvers.
+
+Compares the scalar loops that used to triangularize the Hessenberg matrix
+and transform the FLECS reduced problem against their vectorized versions,
+at the subspace sizes used with cheap preconditioners. Run it with
+
+    python bench_krylov_kernels.py
+"""
+import timeit
+
+import numpy as np
+
+from kona.linalg.solvers.util import \
+    apply_givens, generate_givens, givens_update, solve_tri
+
+def givens_loop(H, g):
+    m = H.shape[1]
+    sn = np.zeros(m)
+    cn = np.zeros(m)
+    y = np.zeros(m+1)
+    for i in xrange(m):
+        for k in xrange(i):
+            H[k, i], H[k+1, i] = apply_givens(sn[k], cn[k], H[k, i], H[k+1, i])
+        H[i, i], H[i+1, i], sn[i], cn[i] = generate_givens(H[i, i], H[i+1, i])
+        y[i] = g[i]
+        g[i], g[i+1] = apply_givens(sn[i], cn[i], g[i], g[i+1])
+        # check_LSgrad back-rotation
+        y[:i] = 0.
+        for k in xrange(i-1, -1, -1):
+            y[k], y[k+1] = apply_givens(-sn[k], cn[k], y[k], y[k+1])
+
+def givens_vectorized(H, g):
+    m = H.shape[1]
+    Q = np.eye(m+1)
+    y = np.zeros(m+1)
+    for i in xrange(m):
+        y[:i+1] = g[i]*Q[i, :i+1]
+        givens_update(Q, H, g, i)
+
+def cholesky_loop(L, Hess, rhs):
+    n = Hess.shape[0]
+    rhs = solve_tri(L, rhs, lower=True)
+    for j in xrange(n):
+        Hess[:, j] = solve_tri(L, Hess[:, j].copy(), lower=True)
+    for j in xrange(n):
+        Hess[j, :] = solve_tri(L, Hess[j, :].copy(), lower=True)
+
+def cholesky_vectorized(L, Hess, rhs):
+    rhs = solve_tri(L, rhs, lower=True)
+    Hess = solve_tri(L, Hess, lower=True)
+    Hess = solve_tri(L, Hess.T, lower=True).T
+
+def rhs_loop(g0, mu, VtZ, VtVH):
+    rhs = np.zeros(VtZ.shape[1])
+    for k in xrange(VtZ.shape[1]):
+        rhs[k] = -g0*(VtZ[0, k] + mu*VtVH[0, k])
+
+def rhs_vectorized(g0, mu, VtZ, VtVH):
+    rhs = -g0*(VtZ[0, :] + mu*VtVH[0, :])
+
+def run(name, func, make_args, number=20):
+    time = min(timeit.repeat(
+        lambda: func(*make_args()), repeat=3, number=number))/number
+    print '  %-24s %10.3f ms'%(name, 1e3*time)
+
+if __name__ == '__main__':
+    for m in [25, 50, 100]:
+        print 'subspace size %i'%m
+        H = np.triu(np.random.random_sample((m+1, m)), -1)
+        g = np.zeros(m+1)
+        g[0] = 1.
+        args = lambda: (H.copy(), g.copy())
+        run('givens (loop)', givens_loop, args)
+        run('givens (vectorized)', givens_vectorized, args)
+
+        Z = np.random.random_sample((2*m, m))
+        L = np.linalg.cholesky(Z.T.dot(Z))
+        Hess = np.random.random_sample((m, m))
+        rhs = np.random.random_sample(m)
+        args = lambda: (L, Hess.copy(), rhs)
+        run('cholesky (loop)', cholesky_loop, args)
+        run('cholesky (vectorized)', cholesky_vectorized, args)
+
+        VtZ = np.random.random_sample((m+1, m))
+        VtVH = np.random.random_sample((m+1, m))
+        args = lambda: (1., 0.1, VtZ, VtVH)
+        run('rhs_aug (loop)', rhs_loop, args)
+        run('rhs_aug (vectorized)', rhs_vectorized, args)
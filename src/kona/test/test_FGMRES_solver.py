@@ -2,10 +2,11 @@ import unittest
 
 import numpy
 
-from kona.linalg.solvers.krylov import FGMRES
+from kona.linalg.solvers.krylov import FGMRES, BlockFGMRES
 from kona.linalg.matrices.common import IdentityMatrix
 from kona.user import UserSolver
 from kona.linalg.memory import KonaMemory
+from kona.linalg.vectors.common import DesignVector
 
 class FLECSSolverTestCase(unittest.TestCase):
 
@@ -50,6 +51,223 @@ class FLECSSolverTestCase(unittest.TestCase):
         diff = max(diff)
         self.assertTrue(diff < 1.e-6)
 
+    def test_stats(self):
+        '''FGMRES solve statistics'''
+        self.x.equals(0)
+        iters, beta = self.krylov.solve(
+            self.mat_vec, self.b, self.x, self.precond.product)
+        stats = self.krylov.stats
+        self.assertEqual(stats.solver, 'FGMRES')
+        self.assertEqual(stats.iters, iters)
+        # one product per iteration, plus the initial and the true residuals
+        self.assertEqual(stats.num_matvec, iters + 2)
+        self.assertEqual(stats.num_precond, iters)
+        self.assertEqual(stats.res_true, beta)
+        self.assertTrue(stats.res_est < 1e-10*self.b.norm2)
+        self.assertTrue(stats.time_total >= stats.time_matvec)
+        self.assertTrue(stats.time_other >= 0.)
+        # the statistics accumulate on the memory manager
+        self.krylov.solve(self.mat_vec, self.b, self.x, self.precond.product)
+        total = self.km.krylov_stats['FGMRES']
+        self.assertEqual(total.num_solves, 2)
+        self.assertTrue(total.num_matvec > stats.num_matvec)
+
+    def test_product_tol(self):
+        '''FGMRES relaxes the product tolerance as the residual drops'''
+        class RecordingMatrix(object):
+            def __init__(self, mat_vec):
+                self.mat_vec = mat_vec
+                self.tols = []
+            def set_product_tol(self, tol):
+                self.tols.append(tol)
+            def product(self, in_vec, out_vec):
+                self.mat_vec(in_vec, out_vec)
+
+        matrix = RecordingMatrix(self.mat_vec)
+        self.x.equals(0)
+        self.krylov.solve(matrix.product, self.b, self.x, self.precond.product)
+        tols = matrix.tols[:-1]
+        self.assertTrue(len(tols) > 1)
+        self.assertAlmostEqual(tols[0], 1e-10/30)
+        self.assertTrue(numpy.all(numpy.diff(tols) >= 0.))
+        self.assertTrue(matrix.tols[-1] is None)
+
+    def test_workspace_reuse(self):
+        '''FGMRES workspace reuse across solves'''
+        stack = self.km.vector_stack[DesignVector]
+        num_free = len(stack)
+        self.x.equals(0)
+        self.krylov.solve(self.mat_vec, self.b, self.x, self.precond.product)
+        W = list(self.krylov._W)
+        self.assertEqual(
+            len(stack), num_free - len(W) - len(self.krylov._Z) - 1)
+        # a second solve must reuse the same vectors and give the same answer
+        x_first = self.x.base.data.copy()
+        self.x.equals(0)
+        self.krylov.solve(self.mat_vec, self.b, self.x, self.precond.product)
+        for old_vec, new_vec in zip(W, self.krylov._W):
+            self.assertTrue(old_vec is new_vec)
+        self.assertTrue(max(abs(self.x.base.data - x_first)) < 1.e-12)
+        # releasing hands all vectors back to the pool
+        self.krylov.release_workspace()
+        self.assertEqual(len(stack), num_free)
+        self.krylov.release_workspace()
+        self.assertEqual(len(stack), num_free)
+
+    def test_restart_and_deflation(self):
+        '''FGMRES(m) restarts with and without deflation'''
+        N = 100
+        numpy.random.seed(0)
+        A = numpy.diag(numpy.linspace(0.01, 10., N)) + \
+            0.1*numpy.random.rand(N, N)
+        def mat_vec(in_vec, out_vec):
+            out_vec.base.data[:] = A.dot(in_vec.base.data)
+        iters = []
+        for deflation in [0, 4]:
+            km = KonaMemory(UserSolver(N))
+            pf = km.primal_factory
+            pf.request_num_vectors(2)
+            optns = {
+                'subspace_size' : 10,
+                'max_outer' : 30,
+                'deflation' : deflation,
+                'rel_tol' : 1e-8,
+                'krylov_file' : None,
+            }
+            krylov = FGMRES(pf, optns)
+            km.allocate_memory()
+            x = pf.generate()
+            b = pf.generate()
+            x.equals(0.)
+            b.equals(1.)
+            num_iter, beta = krylov.solve(
+                mat_vec, b, x, self.precond.product)
+            res = numpy.linalg.norm(A.dot(x.base.data) - b.base.data)
+            self.assertTrue(res < 1e-8*b.norm2)
+            self.assertTrue(abs(res - beta) < 1e-10)
+            iters.append(num_iter)
+        # a single cycle would stop at 10 iterations
+        self.assertTrue(iters[0] > 10)
+        self.assertTrue(iters[1] < iters[0])
+
+    def test_block_solve(self):
+        '''Block FGMRES with multiple right-hand sides'''
+        class BlockMatrix(object):
+            def __init__(self, A):
+                self.A = A
+                self.num_block = 0
+            def product(self, in_vec, out_vec):
+                out_vec.base.data[:] = self.A.dot(in_vec.base.data)
+            def product_block(self, in_vecs, out_vecs):
+                self.num_block += 1
+                for in_vec, out_vec in zip(in_vecs, out_vecs):
+                    self.product(in_vec, out_vec)
+
+        km = KonaMemory(UserSolver(4))
+        pf = km.primal_factory
+        pf.request_num_vectors(6)
+        optns = {
+            'subspace_size' : 4,
+            'block_size' : 2,
+            'rel_tol' : 1e-10,
+            'krylov_file' : None,
+        }
+        krylov = BlockFGMRES(pf, optns)
+        km.allocate_memory()
+
+        b_vecs = [pf.generate() for k in xrange(3)]
+        x_vecs = [pf.generate() for k in xrange(3)]
+        for k in xrange(3):
+            b_vecs[k].base.data[:] = self.A[:, k] + 1.
+            x_vecs[k].equals(0.)
+        matrix = BlockMatrix(self.A)
+        out = krylov.solve_multi(
+            matrix.product, b_vecs, x_vecs, self.precond.product)
+        self.assertEqual(len(out), 3)
+        self.assertTrue(matrix.num_block > 0)
+        for b, x, (iters, beta) in zip(b_vecs, x_vecs, out):
+            expected = numpy.linalg.solve(self.A, b.base.data)
+            self.assertTrue(max(abs(x.base.data - expected)) < 1.e-6)
+            self.assertTrue(beta < 1.e-8*b.norm2)
+
+    def test_single_precision_basis(self):
+        '''FGMRES with a single precision basis'''
+        km = KonaMemory(UserSolver(4))
+        pf = km.primal_factory
+        pf.request_num_vectors(2)
+        optns = {
+            'subspace_size' : 10,
+            'rel_tol' : 1e-5,
+            'basis_precision' : 'single',
+            'krylov_file' : None,
+        }
+        krylov = FGMRES(pf, optns)
+        km.allocate_memory()
+        # the whole basis comes out of the single precision pool
+        self.assertEqual(len(km.single_stack[DesignVector]), 21)
+
+        x = pf.generate()
+        b = pf.generate()
+        x.equals(0.)
+        b.base.data[:] = self.b.base.data
+        count = [0]
+        def mat_vec(in_vec, out_vec):
+            count[0] += 1
+            self.mat_vec(in_vec, out_vec)
+        iters, beta = krylov.solve(mat_vec, b, x, self.precond.product)
+        for vector in krylov._W + krylov._Z:
+            self.assertEqual(vector.base.data.dtype, numpy.float32)
+        # check_res reuses the true residual of the last cycle
+        self.assertEqual(count[0], iters + 2)
+        expected = numpy.linalg.solve(self.A, b.base.data)
+        self.assertTrue(max(abs(x.base.data - expected)) < 1.e-4)
+        self.assertTrue(beta < 1.e-5*b.norm2)
+
+    def test_single_precision_refinement(self):
+        '''FGMRES and Block FGMRES single precision true residuals'''
+        N = 30
+        numpy.random.seed(0)
+        A = numpy.diag(numpy.linspace(1., 10., N)) + \
+            0.1*numpy.random.rand(N, N)
+        def mat_vec(in_vec, out_vec):
+            out_vec.base.data[:] = A.dot(in_vec.base.data)
+        km = KonaMemory(UserSolver(N))
+        pf = km.primal_factory
+        pf.request_num_vectors(6)
+        optns = {
+            'subspace_size' : 10,
+            'max_outer' : 10,
+            'rel_tol' : 1e-12,
+            'basis_precision' : 'single',
+            'krylov_file' : None,
+        }
+        krylov = FGMRES(pf, optns)
+        block_krylov = BlockFGMRES(pf, dict(optns, block_size=2))
+        km.allocate_memory()
+
+        # restarts from the double precision residual get below the accuracy
+        # of the basis, and beta is the float64 residual norm
+        x = pf.generate()
+        b = pf.generate()
+        x.equals(0.)
+        b.equals(1.)
+        iters, beta = krylov.solve(mat_vec, b, x, self.precond.product)
+        res = numpy.linalg.norm(b.base.data - A.dot(x.base.data))
+        self.assertTrue(res < 1e-12*b.norm2)
+        self.assertTrue(abs(beta - res) < 1e-2*1e-12*b.norm2)
+
+        # the block solver reports the float64 residuals too
+        x_vecs = [pf.generate() for k in xrange(2)]
+        b_vecs = [pf.generate() for k in xrange(2)]
+        for k in xrange(2):
+            x_vecs[k].equals(0.)
+            b_vecs[k].base.data[:] = A[:, k] + 1.
+        out = block_krylov.solve_multi(
+            mat_vec, b_vecs, x_vecs, self.precond.product)
+        for b, x, (iters, beta) in zip(b_vecs, x_vecs, out):
+            res = numpy.linalg.norm(b.base.data - A.dot(x.base.data))
+            self.assertTrue(abs(beta - res) < 1e-14*b.norm2)
+
     def test_solve_underdetermined(self):
         '''FMGRES underdetermined system test'''
         # try solving a consistent underdetermined problem
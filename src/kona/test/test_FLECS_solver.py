@@ -116,6 +116,58 @@ class FLECSSolverTestCase(unittest.TestCase):
         self.assertTrue(
             (exp_norm - actual_norm) <= 1e-1 and self.krylov.trust_active)
 
+class FLECSRecycleTestCase(unittest.TestCase):
+
+    def test_recycle(self):
+        '''FLECS subspace recycling across solves'''
+        N, M = 40, 5
+        numpy.random.seed(1)
+        J = numpy.random.rand(M, N)
+        A = numpy.zeros((N+M, N+M))
+        A[:N, :N] = numpy.diag(numpy.logspace(-1, 1, N))
+        A[:N, N:] = J.T
+        A[N:, :N] = J
+        def mat_vec(in_vec, out_vec):
+            out_data = A.dot(numpy.hstack(
+                [in_vec.primal.base.data, in_vec.dual.base.data]))
+            out_vec.primal.base.data[:] = out_data[:N]
+            out_vec.dual.base.data[:] = out_data[N:]
+        precond = IdentityMatrix()
+
+        iters = {}
+        for max_recycle in [0, 5]:
+            km = KonaMemory(UserSolver(N, 0, M))
+            pf = km.primal_factory
+            ef = km.eq_factory
+            pf.request_num_vectors(2)
+            ef.request_num_vectors(2)
+            optns = {
+                'subspace_size' : 40,
+                'rel_tol' : 1e-3,
+                'max_recycle' : max_recycle,
+                'krylov_file' : None,
+            }
+            krylov = FLECS([pf, ef], optns)
+            km.allocate_memory()
+            krylov.radius = 1e6
+            krylov.mu = 1e3
+            x = ReducedKKTVector(pf.generate(), ef.generate())
+            b = ReducedKKTVector(pf.generate(), ef.generate())
+            iters[max_recycle] = []
+            for i in xrange(3):
+                x.equals(0.)
+                b.equals(1.)
+                krylov.solve(mat_vec, b, x, precond.product)
+                iters[max_recycle].append(krylov.iters)
+            self.assertEqual(krylov.num_recycled, max_recycle)
+            krylov.release_workspace()
+            self.assertEqual(len(krylov.U), 0)
+
+        # the first solve is identical, later ones need fewer products
+        self.assertEqual(iters[0][0], iters[5][0])
+        for i in xrange(1, 3):
+            self.assertTrue(iters[5][i] < iters[0][i])
+
 if __name__ == "__main__":
 
     unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy
+
+from kona.linalg.solvers.krylov import GLTR
+from kona.linalg.solvers.util import solve_trust_reduced
+from kona.linalg.matrices.common import IdentityMatrix
+from kona.user import UserSolver
+from kona.linalg.memory import KonaMemory
+
+class GLTRSolverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        solver = UserSolver(4,0,0,0)
+        self.km = KonaMemory(solver)
+        self.pf = self.km.primal_factory
+        self.pf.request_num_vectors(2)
+        optns = {
+            'max_iter' : 30,
+            'rel_tol' : 1e-8,
+        }
+        self.krylov = GLTR(self.pf, optns)
+        self.km.allocate_memory()
+
+        self.x = self.pf.generate()
+        self.b = self.pf.generate()
+        self.b.equals(1)
+        self.A = numpy.array([[4, 3, 2, 1],
+                              [3, 4, 3, 2],
+                              [2, 3, 4, 3],
+                              [1, 2, 3, 4]])
+
+        self.precond = IdentityMatrix()
+
+    def mat_vec(self, in_vec, out_vec):
+        in_data = in_vec.base.data.copy()
+        out_data = self.A.dot(in_data)
+        out_vec.base.data[:] = out_data[:]
+
+    def diag_precond(self, in_vec, out_vec):
+        out_vec.base.data[:] = in_vec.base.data/abs(numpy.diag(self.A))
+
+    def test_bad_radius(self):
+        '''GLTR error test for bad trust radius'''
+        self.krylov.radius = -1.
+        try:
+            self.krylov.solve(
+                self.mat_vec, self.b, self.x, self.precond.product)
+        except ValueError as err:
+            self.assertEqual(str(err), 'radius must be postive')
+
+    def test_radius_inactive(self):
+        '''GLTR solution test with inactive trust radius'''
+        self.krylov.radius = 1.0
+        pred, active = self.krylov.solve(self.mat_vec, self.b, self.x,
+                                         self.precond.product)
+        expected = numpy.array([.2, 0, 0, .2])
+        diff = max(abs(self.x.base.data - expected))
+        self.assertTrue(diff < 1.e-6)
+        self.assertFalse(active)
+        self.assertTrue(abs(pred - 0.2) <= 1e-10)
+
+    def test_radius_active(self):
+        '''GLTR matches the dense trust-region solution on the boundary'''
+        # STCG stops on the boundary with pred = 0.145; GLTR keeps going
+        b = numpy.ones(4)
+        y, lam, pred_dense = solve_trust_reduced(self.A, -b, 0.1)
+        for precond in [self.precond.product, self.diag_precond]:
+            self.krylov.radius = 0.1
+            pred, active = self.krylov.solve(
+                self.mat_vec, self.b, self.x, precond)
+            self.assertTrue(active)
+            self.assertTrue(abs(self.x.norm2 - 0.1) <= 1e-8)
+            self.assertTrue(pred >= 0.145)
+            self.assertAlmostEqual(pred, pred_dense, places=8)
+            diff = max(abs(self.x.base.data - y))
+            self.assertTrue(diff < 1e-6)
+
+    def test_indefinite(self):
+        '''GLTR solution test with an indefinite matrix'''
+        self.A = numpy.array([[2., 1., 0., 0.],
+                              [1., -1., 1., 0.],
+                              [0., 1., 3., 1.],
+                              [0., 0., 1., -2.]])
+        self.b.base.data[:] = [1., 0.5, -1., 0.2]
+        y, lam, pred_dense = solve_trust_reduced(
+            self.A, -self.b.base.data.copy(), 2.0)
+        self.krylov.radius = 2.0
+        pred, active = self.krylov.solve(self.mat_vec, self.b, self.x,
+                                         self.precond.product)
+        self.assertTrue(active)
+        self.assertTrue(abs(self.x.norm2 - 2.0) <= 1e-8)
+        self.assertAlmostEqual(pred, pred_dense, places=8)
+        diff = max(abs(self.x.base.data - y))
+        self.assertTrue(diff < 1e-6)
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -80,6 +80,32 @@ class STCGSolverTestCase(unittest.TestCase):
         self.assertTrue(active)
         self.assertTrue(abs(prec - 0.145) <= 1e-12)
 
+    def test_pipelined(self):
+        '''STCG pipelined variant matches the standard one'''
+        km = KonaMemory(UserSolver(4,0,0,0))
+        pf = km.primal_factory
+        pf.request_num_vectors(2)
+        krylov = STCG(pf, {'rel_tol' : 1e-3, 'pipelined' : True})
+        km.allocate_memory()
+        x = pf.generate()
+        b = pf.generate()
+        b.equals(1)
+
+        def precond(in_vec, out_vec):
+            out_vec.base.data[:] = in_vec.base.data/numpy.diag(self.A)
+
+        for radius, prec in [(1.0, self.precond.product), (1.0, precond),
+                             (0.1, self.precond.product), (0.1, precond)]:
+            self.krylov.radius = radius
+            pred, active = self.krylov.solve(
+                self.mat_vec, self.b, self.x, prec)
+            krylov.radius = radius
+            pred_pipe, active_pipe = krylov.solve(self.mat_vec, b, x, prec)
+            self.assertEqual(active_pipe, active)
+            self.assertAlmostEqual(pred_pipe, pred, places=10)
+            diff = max(abs(x.base.data - self.x.base.data))
+            self.assertTrue(diff < 1e-10)
+
 if __name__ == "__main__":
 
     unittest.main()
@@ -65,5 +65,61 @@ class AbsVectorTestCase(unittest.TestCase):
                 str(err),
                 'size given as 10, but length of value 12')
 
+    def test_in_place_operations(self):
+        '''BaseVector operations preserve external views on data'''
+        view = self.x_vec.data
+        self.x_vec.plus(self.y_vec)
+        self.x_vec.times_scalar(2.)
+        self.x_vec.times_vector(self.y_vec)
+        self.x_vec.pow(0.5)
+        self.x_vec.log(self.x_vec)
+        self.x_vec.exp(self.x_vec)
+        self.x_vec.equals_ax_p_by(2., self.y_vec, 3., self.z_vec)
+        self.assertTrue(self.x_vec.data is view)
+
+    def test_aliased_ax_p_by(self):
+        '''BaseVector aliasing-safe scaled summation'''
+        z_data = np.linspace(0, 10, 10)
+        # x is self
+        self.x_vec.equals_ax_p_by(2., self.x_vec, 3., self.z_vec)
+        self.assertTrue(np.allclose(self.x_vec.data, 2. + 3.*z_data))
+        # y is self
+        self.y_vec.equals_ax_p_by(-1., self.z_vec, 0.5, self.y_vec)
+        self.assertTrue(np.allclose(self.y_vec.data, 1. - z_data))
+        # both are self
+        self.z_vec.equals_ax_p_by(1., self.z_vec, 2., self.z_vec)
+        self.assertTrue(np.allclose(self.z_vec.data, 3.*z_data))
+
+    def test_multi_inner_axpy(self):
+        '''BaseVector fused multi-vector operations'''
+        z_data = np.linspace(0, 10, 10)
+        prods = self.x_vec.multi_inner([self.y_vec, self.z_vec])
+        self.assertTrue(np.allclose(prods, [20., np.sum(z_data)]))
+        self.x_vec.multi_axpy([2., -1.], [self.y_vec, self.z_vec])
+        self.assertTrue(np.allclose(self.x_vec.data, 5. - z_data))
+
+        # rows of a single array are treated as one block
+        slab = np.random.random_sample((4, 10))
+        rows = []
+        for i in [3, 2, 1, 0]:
+            rows.append(BaseVector(0))
+            rows[-1].data = slab[i]
+        self.assertTrue(self.z_vec._get_block(rows) is not None)
+        self.assertTrue(self.z_vec._get_block(rows[::2]) is not None)
+        self.assertTrue(self.z_vec._get_block([rows[0], self.y_vec]) is None)
+        prods = self.z_vec.multi_inner(rows)
+        self.assertTrue(np.allclose(prods, slab[::-1].dot(z_data)))
+        coeffs = np.array([1., 2., 3., 4.])
+        self.y_vec.multi_axpy(coeffs, rows)
+        self.assertTrue(
+            np.allclose(self.y_vec.data, 2. + coeffs.dot(slab[::-1])))
+
+    def test_fused_inner(self):
+        '''BaseVector fused inner products of vector pairs'''
+        z_data = np.linspace(0, 10, 10)
+        prods = self.x_vec.fused_inner(
+            [(self.x_vec, self.y_vec), (self.z_vec, self.z_vec)])
+        self.assertTrue(np.allclose(prods, [20., z_data.dot(z_data)]))
+
 if __name__ == "__main__":
     unittest.main()
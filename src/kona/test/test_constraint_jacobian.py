@@ -1,5 +1,7 @@
 import unittest
 
+import numpy
+
 from kona.examples import Sellar
 from kona.linalg.memory import KonaMemory
 from kona.linalg.matrices.common import dCdU, dRdU
@@ -94,6 +96,45 @@ class TotalConstraintJacobianTestCase(unittest.TestCase):
         diff_norm = dLdX.dual.norm2
 
         self.assertTrue(diff_norm <= 1e-3)
+    def test_explicit(self):
+        '''TotalConstraintJacobian explicit dense assembly'''
+        solver = Sellar()
+        km = KonaMemory(solver)
+        pf = km.primal_factory
+        sf = km.state_factory
+        df = km.ineq_factory
+        pf.request_num_vectors(4)
+        sf.request_num_vectors(1)
+        df.request_num_vectors(3)
+        A = TotalConstraintJacobian([pf, sf, df])
+        A_dense = TotalConstraintJacobian([pf, sf, df], {'explicit' : True})
+        km.allocate_memory()
+
+        design = pf.generate()
+        state = sf.generate()
+        design.equals_init_design()
+        state.equals_primal_solution(design)
+        A.linearize(design, state)
+        A_dense.linearize(design, state)
+        self.assertEqual(A_dense.dense.shape, (df.generate().base.data.size,
+                                               design.base.data.size))
+
+        # forward and transposed products agree with the matrix-free ones
+        design_in = pf.generate()
+        design_in.base.data[:] = numpy.arange(1., design_in.base.data.size+1)
+        expected = df.generate()
+        out = df.generate()
+        A.product(design_in, expected)
+        A_dense.product(design_in, out)
+        self.assertTrue(
+            numpy.linalg.norm(out.base.data - expected.base.data) < 1e-6)
+
+        dual_in = df.generate()
+        dual_in.base.data[:] = numpy.arange(1., dual_in.base.data.size+1)
+        A.T.product(dual_in, design_in)
+        A_dense.T.product(dual_in, design)
+        self.assertTrue(
+            numpy.linalg.norm(design.base.data - design_in.base.data) < 1e-6)
 
 if __name__ == "__main__":
     unittest.main()
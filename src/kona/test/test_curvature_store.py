@@ -0,0 +1,189 @@
+import unittest
+
+import numpy as np
+
+from kona.linalg.memory import KonaMemory
+from kona.user import UserSolver
+from kona.examples import Simple2x2, Constrained2x2
+from kona.linalg.matrices.hessian import \
+    CurvatureStore, LimitedMemoryBFGS, ReducedHessian, ReducedKKTMatrix
+from kona.linalg.vectors.composite import ReducedKKTVector
+
+class StateConstrained2x2(Constrained2x2):
+    # equality constraint that also depends on the first state
+
+    def eval_eq_cnstr(self, at_design, at_state):
+        return super(StateConstrained2x2, self).eval_eq_cnstr(
+            at_design, at_state) + at_state.data[0]
+
+    def multiply_dCEQdU(self, at_design, at_state, in_vec):
+        return np.array([in_vec.data[0]])
+
+    def multiply_dCEQdU_T(self, at_design, at_state, in_vec, out_vec):
+        out_vec.data[:] = [in_vec[0], 0.]
+
+class CurvatureStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.n = 4
+        km = KonaMemory(UserSolver(self.n))
+        self.pf = km.primal_factory
+        self.store = CurvatureStore(
+            self.pf, {'max_stored' : 3, 'max_distance' : 0.5})
+        self.lbfgs = LimitedMemoryBFGS(self.pf, {'max_stored' : 3})
+        self.pf.request_num_vectors(4)
+        km.allocate_memory()
+
+        self.A = np.diag(np.arange(1., self.n + 1))
+        self.x = self.pf.generate()
+        self.in_vec = self.pf.generate()
+        self.out_vec = self.pf.generate()
+        self.work = self.pf.generate()
+
+    def add_product(self, data):
+        self.in_vec.base.data[:] = data
+        self.out_vec.base.data[:] = self.A.dot(data)
+        self.store.add(self.in_vec, self.out_vec)
+
+    def test_ring_buffer(self):
+        '''CurvatureStore keeps the newest pairs'''
+        self.x.equals(0.0)
+        self.store.set_point(self.x)
+        for k in xrange(self.n):
+            self.add_product(np.eye(self.n)[k])
+        self.assertEqual(self.store.num_stored, 3)
+        for k, (in_vec, out_vec, distance) in enumerate(self.store.pairs()):
+            self.assertEqual(np.argmax(in_vec.base.data), k + 1)
+            self.assertEqual(distance, 0.0)
+
+    def test_staleness(self):
+        '''CurvatureStore drops pairs far from the linearization point'''
+        self.x.equals(0.0)
+        self.store.set_point(self.x)
+        self.add_product(np.ones(self.n))
+        self.x.base.data[0] = 0.3
+        self.store.set_point(self.x)
+        self.add_product(np.arange(1., self.n + 1))
+        distances = [d for _, _, d in self.store.pairs()]
+        self.assertAlmostEqual(distances[0], 0.3)
+        self.assertEqual(distances[1], 0.0)
+
+        # the path length bounds the distance of the first pair by 0.6
+        self.x.base.data[0] = 0.0
+        self.store.set_point(self.x)
+        self.assertEqual(self.store.num_stored, 1)
+        self.assertAlmostEqual(self.store.pairs()[0][2], 0.3)
+
+        # a step in the multipliers alone also ages the pairs
+        self.store.set_point(self.x, 0.1)
+        self.assertAlmostEqual(self.store.pairs()[0][2], 0.4)
+        self.store.set_point(self.x, 0.2)
+        self.assertEqual(self.store.num_stored, 0)
+
+    def test_initial_guess_and_seed(self):
+        '''CurvatureStore initial guess and quasi-Newton seeding'''
+        self.x.equals(0.0)
+        self.store.set_point(self.x)
+        self.work.equals(1.0)
+        self.store.initial_guess(self.work, self.x)
+        self.assertEqual(self.x.norm2, 0.0)
+
+        # a right-hand side in the span of the products is solved exactly
+        self.add_product(np.array([1., 0., 0., 1.]))
+        self.add_product(np.array([0., 1., 1., 0.]))
+        self.work.base.data[:] = self.A.dot([2., 1., 1., 2.])
+        self.store.initial_guess(self.work, self.x)
+        self.assertTrue(
+            np.linalg.norm(self.x.base.data - [2., 1., 1., 2.]) < 1e-12)
+
+        self.store.seed(self.lbfgs)
+        self.assertEqual(self.lbfgs.num_stored, 2)
+        self.lbfgs.product(self.in_vec, self.out_vec)
+        self.assertTrue(np.linalg.norm(
+            self.out_vec.base.data - self.A.dot(self.in_vec.base.data)) < 1e-12)
+
+    def test_reduced_hessian(self):
+        '''CurvatureStore records ReducedHessian products'''
+        km = KonaMemory(Simple2x2())
+        pf = km.primal_factory
+        sf = km.state_factory
+        store = CurvatureStore(pf, {'max_stored' : 2})
+        hessian = ReducedHessian([pf, sf])
+        hessian.set_curvature_store(store)
+        pf.request_num_vectors(3)
+        sf.request_num_vectors(3)
+        km.allocate_memory()
+        self.assertRaises(TypeError, hessian.set_curvature_store, None)
+
+        x = pf.generate()
+        state = sf.generate()
+        adjoint = sf.generate()
+        x.equals(1.0)
+        state.equals_primal_solution(x)
+        adjoint.equals_objective_adjoint(x, state, sf.generate())
+        hessian.linearize(x, state, adjoint)
+
+        v = pf.generate()
+        out = pf.generate()
+        v.equals(2.0)
+        hessian.product(v, out)
+        in_vec, out_vec, distance = store.pairs()[0]
+        self.assertEqual(store.num_stored, 1)
+        self.assertTrue(np.allclose(in_vec.base.data, v.base.data))
+        self.assertTrue(np.allclose(out_vec.base.data, out.base.data))
+
+    def test_reduced_kkt(self):
+        '''CurvatureStore records design-only ReducedKKTMatrix products'''
+        km = KonaMemory(StateConstrained2x2())
+        pf = km.primal_factory
+        sf = km.state_factory
+        df = km.eq_factory
+        store = CurvatureStore(pf, {'max_stored' : 2, 'max_distance' : 0.5})
+        kkt = ReducedKKTMatrix([pf, sf, df])
+        kkt.set_curvature_store(store)
+        plain = ReducedKKTMatrix([pf, sf, df])
+        pf.request_num_vectors(4)
+        sf.request_num_vectors(3)
+        df.request_num_vectors(4)
+        km.allocate_memory()
+
+        X = ReducedKKTVector(pf.generate(), df.generate())
+        state = sf.generate()
+        adjoint = sf.generate()
+        X.primal.equals(1.0)
+        X.dual.equals(1.0)
+        state.equals_primal_solution(X.primal)
+        adjoint.equals_objective_adjoint(X.primal, state, sf.generate())
+        kkt.linearize(X, state, adjoint)
+        plain.linearize(X, state, adjoint)
+
+        in_vec = ReducedKKTVector(pf.generate(), df.generate())
+        out_vec = ReducedKKTVector(pf.generate(), df.generate())
+        expected = ReducedKKTVector(pf.generate(), df.generate())
+        in_vec.primal.equals(1.0)
+        in_vec.dual.equals(1.0)
+        kkt.product(in_vec, out_vec)
+
+        # the separate dual adjoint leaves the full product unchanged
+        plain.product(in_vec, expected)
+        self.assertTrue(np.allclose(
+            out_vec.primal.base.data, expected.primal.base.data, atol=1e-6))
+        self.assertTrue(np.allclose(
+            out_vec.dual.base.data, expected.dual.base.data, atol=1e-6))
+
+        # the stored pair is the product with a zero dual
+        in_vec.dual.equals(0.0)
+        plain.product(in_vec, expected)
+        self.assertEqual(store.num_stored, 1)
+        in_stored, out_stored, distance = store.pairs()[0]
+        self.assertTrue(np.allclose(in_stored.base.data, [1., 1.]))
+        self.assertTrue(np.allclose(
+            out_stored.base.data, expected.primal.base.data, atol=1e-6))
+
+        # moving the multipliers ages the stored pair
+        X.dual.equals(1.2)
+        kkt.linearize(X, state, adjoint)
+        self.assertAlmostEqual(store.pairs()[0][2], 0.2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@ import unittest
 from kona import Optimizer
 from kona.algorithms import CompositeStepRSNK
 from kona.examples import SphereConstrained
+from kona.options import BadKonaOption
+from kona.linalg.solvers.krylov import FGMRES, STCG
 
 class EqualityCompositeStepTestCase(unittest.TestCase):
 
@@ -64,5 +66,35 @@ class EqualityCompositeStepTestCase(unittest.TestCase):
         diff = abs(solver.curr_design - expected)
         self.assertTrue(max(diff) < 1e-4)
 
+    def test_krylov_solver_option(self):
+        '''CompositeStepRSNK Krylov solver selection by name'''
+        optns = {
+            'info_file' : 'kona_info.dat',
+            'globalization' : 'linesearch',
+            'composite-step' : {
+                'normal-step' : {
+                    'krylov_solver' : 'fgmres',
+                    'out_file'      : 'kona_normal_krylov.dat',
+                },
+                'tangent-step' : {
+                    'out_file'      : 'kona_tangent_krylov.dat',
+                },
+            },
+        }
+        solver = SphereConstrained(ineq=False)
+        optimizer = Optimizer(solver, CompositeStepRSNK, optns)
+        algorithm = optimizer._algorithm
+        self.assertTrue(isinstance(algorithm.normal_KKT.krylov, FGMRES))
+        self.assertFalse(algorithm.normal_KKT.use_gcrot)
+        self.assertTrue(isinstance(algorithm.tangent_KKT.krylov, STCG))
+        self.assertFalse(
+            'krylov_solver' in optns['composite-step']['tangent-step'])
+
+        # GLTR has no null-space projection for the tangent step
+        optns['composite-step']['tangent-step']['krylov_solver'] = 'gltr'
+        self.assertRaises(
+            BadKonaOption, Optimizer, SphereConstrained(ineq=False),
+            CompositeStepRSNK, optns)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,10 +1,41 @@
 import gc
+import os
+import shutil
+import tempfile
 import unittest
 
-from kona.linalg.memory import KonaMemory
-from kona.linalg.vectors.common import DesignVector
+import numpy as np
+
+from kona.linalg.memory import KonaMemory, KonaFile
+from kona.linalg.common import objective_value
+from kona.linalg.vectors.common import DesignVector, StateVector
+from kona.linalg.matrices.common import dRdU
 from kona.user.user_solver import UserSolver
 
+class LinearizationSolver(UserSolver):
+
+    def __init__(self, *args, **kwargs):
+        super(LinearizationSolver, self).__init__(*args, **kwargs)
+        self.lin_calls = []
+
+    def linearization_changed(self, at_design, at_state, lin_key, cached):
+        self.lin_calls.append((lin_key, cached))
+
+class CountingSolver(UserSolver):
+
+    def __init__(self, *args, **kwargs):
+        super(CountingSolver, self).__init__(*args, **kwargs)
+        self.num_obj = 0
+        self.num_grad = 0
+
+    def eval_obj(self, at_design, at_state):
+        self.num_obj += 1
+        return (float(sum(at_design**2)), 1)
+
+    def eval_dFdX(self, at_design, at_state):
+        self.num_grad += 1
+        return 2.*at_design
+
 class VectorFactoryTestCase(unittest.TestCase):
 
     def test_generate(self):
@@ -30,6 +61,197 @@ class VectorFactoryTestCase(unittest.TestCase):
         gc.collect()
         self.assertEqual(len(km.vector_stack[DesignVector]), 12)
 
+    def test_release_and_borrow(self):
+        '''VectorFactory explicit release and scoped borrowing'''
+        ndv = 2
+        solver = UserSolver(ndv)
+        km = KonaMemory(solver)
+        vf = km.primal_factory
+
+        vf.request_num_vectors(4)
+        km.allocate_memory()
+
+        vec0 = vf.generate()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 3)
+        vec0.release()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 4)
+        self.assertTrue(vec0.base is None)
+        # releasing twice must not push the data again
+        vec0.release()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 4)
+
+        with vf.borrow(3) as vecs:
+            self.assertEqual(len(vecs), 3)
+            self.assertEqual(len(km.vector_stack[DesignVector]), 1)
+        self.assertEqual(len(km.vector_stack[DesignVector]), 4)
+
+    def test_usage_counters(self):
+        '''KonaMemory vector pool usage counters'''
+        ndv = 2
+        solver = UserSolver(ndv)
+        km = KonaMemory(solver)
+        vf = km.primal_factory
+
+        vf.request_num_vectors(5)
+        km.allocate_memory()
+        self.assertEqual(km.num_allocated[DesignVector], 5)
+        self.assertEqual(km.num_in_use[DesignVector], 0)
+
+        vec0 = vf.generate()
+        vec1 = vf.generate()
+        vec2 = vf.generate()
+        self.assertEqual(km.num_in_use[DesignVector], 3)
+        self.assertEqual(km.max_in_use[DesignVector], 3)
+
+        # pushing the same data twice must not duplicate it on the stack
+        km.push_vector(DesignVector, vec2.base)
+        km.push_vector(DesignVector, vec2.base)
+        self.assertEqual(len(km.vector_stack[DesignVector]), 3)
+        vec2.base = km.pop_vector(DesignVector)
+
+        del vec0, vec1
+        gc.collect()
+        self.assertEqual(km.num_in_use[DesignVector], 1)
+        self.assertEqual(km.max_in_use[DesignVector], 3)
+        self.assertEqual(len(km.stack_keys[DesignVector]), 4)
+
+    def test_single_precision(self):
+        '''KonaMemory single precision vector pool'''
+        km = KonaMemory(UserSolver(3, num_state=3))
+        vf = km.primal_factory
+        vf.request_num_vectors(2)
+        vf.request_num_vectors(3, precision='single')
+        # state vectors belong to the user, so they stay in double
+        km.state_factory.request_num_vectors(1, precision='single')
+        self.assertRaises(
+            ValueError, vf.request_num_vectors, 1, precision='half')
+        km.allocate_memory()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 2)
+        self.assertEqual(len(km.single_stack[DesignVector]), 3)
+        self.assertEqual(km.num_allocated[DesignVector], 5)
+        self.assertEqual(len(km.vector_stack[StateVector]), 1)
+
+        single = vf.generate('single')
+        double = vf.generate()
+        self.assertEqual(single.base.data.dtype, np.float32)
+        self.assertEqual(double.base.data.dtype, np.float64)
+        self.assertEqual(km.num_in_use[DesignVector], 2)
+
+        # mixed operations store in the target precision, and inner products
+        # are accumulated in double
+        double.equals(1.0 + 1e-10)
+        single.equals(double)
+        self.assertEqual(single.base.data[0], np.float32(1.0 + 1e-10))
+        self.assertEqual(type(single.inner(single)), np.float64)
+
+        # released vectors go back to their own pool
+        single.release()
+        double.release()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 2)
+        self.assertEqual(len(km.single_stack[DesignVector]), 3)
+        self.assertEqual(km.num_in_use[DesignVector], 0)
+
+    def test_linearization_cache(self):
+        '''KonaMemory linearization point tracking'''
+        solver = LinearizationSolver(2, num_state=2)
+        km = KonaMemory(solver)
+        km.primal_factory.request_num_vectors(2)
+        km.state_factory.request_num_vectors(4)
+        km.allocate_memory()
+
+        design = km.primal_factory.generate()
+        design2 = km.primal_factory.generate()
+        state = km.state_factory.generate()
+        in_vec = km.state_factory.generate()
+        out_vec = km.state_factory.generate()
+        in_vec.equals(1.0)
+
+        jac = dRdU(design, state)
+        key = jac.lin_key
+        jac.product(in_vec, out_vec)
+        jac.T.product(in_vec, out_vec)
+        jac.precond(in_vec, out_vec)
+        # repeated products at the same point notify the solver only once
+        self.assertEqual(solver.lin_calls, [(key, False)])
+        self.assertTrue(jac.T is jac.T)
+        self.assertEqual(jac.T.lin_key, key)
+
+        # mutating the design changes the key
+        design.equals(2.0)
+        self.assertNotEqual(jac.lin_key, key)
+        jac.product(in_vec, out_vec)
+        self.assertEqual(solver.lin_calls[-1], (jac.lin_key, False))
+        new_key = jac.lin_key
+
+        # flipping between two points revisits the cached one
+        jac.linearize(design2, state)
+        jac.product(in_vec, out_vec)
+        jac.linearize(design, state)
+        jac.product(in_vec, out_vec)
+        self.assertEqual(solver.lin_calls[-1], (new_key, True))
+        self.assertEqual(len(solver.lin_calls), 4)
+
+        # the cache only keeps the most recent points
+        for i in xrange(km.lin_cache_size + 1):
+            design2.equals(float(i))
+            jac.linearize(design2, state)
+            jac.product(in_vec, out_vec)
+        self.assertEqual(len(km.lin_cache), km.lin_cache_size)
+        jac.linearize(design, state)
+        jac.product(in_vec, out_vec)
+        self.assertEqual(solver.lin_calls[-1], (new_key, False))
+
+    def test_eval_cache(self):
+        '''KonaMemory memoized user function evaluations'''
+        solver = CountingSolver(2)
+        km = KonaMemory(solver, eval_cache_size=2)
+        km.primal_factory.request_num_vectors(3)
+        km.state_factory.request_num_vectors(1)
+        km.allocate_memory()
+
+        design = km.primal_factory.generate()
+        other = km.primal_factory.generate()
+        grad = km.primal_factory.generate()
+        state = km.state_factory.generate()
+        design.equals(1.0)
+        other.equals(2.0)
+
+        self.assertEqual(objective_value(design, state), 2.)
+        self.assertEqual(objective_value(design, state), 2.)
+        self.assertEqual(solver.num_obj, 1)
+        self.assertEqual(km.cost, 1)
+        grad.equals_objective_partial(design, state, scale=0.5)
+        grad.equals_objective_partial(design, state)
+        self.assertEqual(solver.num_grad, 1)
+        self.assertTrue(all(grad.base.data == 2.))
+        self.assertEqual(km.eval_hits, 2)
+
+        # any in-place change of the point invalidates the results
+        design.times(2.0)
+        self.assertEqual(objective_value(design, state), 8.)
+        self.assertEqual(solver.num_obj, 2)
+
+        # least recently used results are evicted first
+        objective_value(other, state)
+        grad.equals_objective_partial(other, state)
+        self.assertEqual(len(km.eval_cache), 2)
+        objective_value(design, state)
+        self.assertEqual(solver.num_obj, 4)
+
+        # the cache is off by default
+        solver = CountingSolver(2)
+        km = KonaMemory(solver)
+        km.primal_factory.request_num_vectors(1)
+        km.state_factory.request_num_vectors(1)
+        km.allocate_memory()
+        design = km.primal_factory.generate()
+        state = km.state_factory.generate()
+        design.equals(1.0)
+        objective_value(design, state)
+        objective_value(design, state)
+        self.assertEqual(solver.num_obj, 2)
+        self.assertEqual(len(km.eval_cache), 0)
+
     def test_error_generate(self):
         '''VectorFactory error for memory allocation'''
         ndv = 2
@@ -82,6 +304,71 @@ class VectorFactoryTestCase(unittest.TestCase):
         else:
             self.fail('MemoryError expected')
 
+    def test_slab_generate(self):
+        '''VectorFactory generation from slab memory'''
+        ndv = 3
+        solver = UserSolver(ndv)
+        km = KonaMemory(solver, slab_alloc=True)
+        vf = km.primal_factory
+
+        vf.request_num_vectors(4)
+        km.allocate_memory()
+        self.assertEqual(km.slab[DesignVector].shape, (4, ndv))
+        self.assertEqual(len(km.vector_stack[DesignVector]), 4)
+
+        vec0 = vf.generate()
+        vec1 = vf.generate()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 2)
+
+        # vector data must be a live view into the slab
+        vec0.equals(2.0)
+        vec1.equals(1.0)
+        vec0.plus(vec1)
+        vec0.times(2.0)
+        row = vec0.base.slab_row
+        self.assertTrue(all(km.slab[DesignVector][row] == 6.0))
+
+        del vec0, vec1
+        gc.collect()
+        self.assertEqual(len(km.vector_stack[DesignVector]), 4)
+        self.assertEqual(km.stack_keys[DesignVector], set(range(4)))
+
+class KonaFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_file_modes(self):
+        '''KonaFile buffered and background writer modes'''
+        for mode in ['unbuffered', 'buffered', 'async']:
+            km = KonaMemory(UserSolver(2), file_mode=mode)
+            filename = os.path.join(self.tmp_dir, mode + '.dat')
+            out_file = km.open_file(filename)
+            self.assertTrue(km.open_file(filename) is out_file)
+            for i in xrange(100):
+                out_file.write('%i\n' % i)
+            out_file.flush()
+            with open(filename) as in_file:
+                self.assertEqual(len(in_file.readlines()), 100)
+            km.close_files()
+            self.assertTrue(out_file.file is None)
+            with open(filename) as in_file:
+                lines = in_file.readlines()
+            self.assertEqual(lines, ['%i\n' % i for i in xrange(100)])
+
+    def test_non_root_and_disabled(self):
+        '''KonaFile discards output off the root rank or without a file'''
+        filename = os.path.join(self.tmp_dir, 'rank1.dat')
+        out_file = KonaFile(filename, 1, mode='async')
+        out_file.write('test')
+        out_file.close()
+        self.assertFalse(os.path.exists(filename))
+        out_file = KonaFile(None, 0)
+        out_file.write('test')
+        out_file.flush()
 
 if __name__ == "__main__":
     unittest.main()
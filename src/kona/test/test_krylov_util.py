@@ -6,8 +6,10 @@ import kona
 
 from kona.linalg.solvers.util import eigen_decomp, abs_sign, calc_epsilon
 from kona.linalg.solvers.util import apply_givens, generate_givens, solve_tri
+from kona.linalg.solvers.util import givens_update
 from kona.linalg.solvers.util import secular_function, solve_trust_reduced, EPS
 from kona.linalg.solvers.util import lanczos_bidiag
+from kona.linalg.solvers.util import mod_GS_normalize, mod_gram_schmidt
 from kona.user import UserSolver
 from kona.linalg.memory import KonaMemory
 
@@ -98,6 +100,39 @@ class KrylovUtilTestCase(unittest.TestCase):
         self.assertEqual(s, 0.0)
         self.assertEqual(c, 1.0)
 
+    def test_givens_update(self):
+        '''Krylov utilities givens_update()'''
+        m = 6
+        H = np.triu(np.random.random_sample((m+1, m)), -1)
+        g = np.zeros(m+1)
+        g[0] = 2.0
+
+        # reference: rotate each new column with the scalar rotations
+        H_ref = H.copy()
+        g_ref = g.copy()
+        sn = np.zeros(m)
+        cn = np.zeros(m)
+        for i in xrange(m):
+            for k in xrange(i):
+                H_ref[k, i], H_ref[k+1, i] = apply_givens(
+                    sn[k], cn[k], H_ref[k, i], H_ref[k+1, i])
+            H_ref[i, i], H_ref[i+1, i], sn[i], cn[i] = generate_givens(
+                H_ref[i, i], H_ref[i+1, i])
+            g_ref[i], g_ref[i+1] = apply_givens(
+                sn[i], cn[i], g_ref[i], g_ref[i+1])
+
+        Q = np.eye(m+1)
+        H_tri = H.copy()
+        for i in xrange(m):
+            s, c = givens_update(Q, H_tri, g, i)
+            self.assertAlmostEqual(s, sn[i], places=12)
+            self.assertAlmostEqual(c, cn[i], places=12)
+        self.assertTrue(np.allclose(H_tri, H_ref, atol=1e-12))
+        self.assertTrue(np.allclose(g, g_ref, atol=1e-12))
+        # Q holds the accumulated rotations
+        self.assertTrue(np.allclose(Q.dot(H), H_tri, atol=1e-12))
+        self.assertTrue(np.allclose(Q.dot(Q.T), np.eye(m+1), atol=1e-12))
+
     def test_solve_tri(self):
         '''Krylov utilities solve_tri()'''
         A = np.matrix([[1, 1],[0, 1]])
@@ -166,6 +201,41 @@ class KrylovUtilTestCase(unittest.TestCase):
 
         self.assertTrue(rel_error <= 0.1)
 
+    def test_gram_schmidt(self):
+        '''Krylov utilities mod_GS_normalize() and mod_gram_schmidt()'''
+        num_design = 20
+        num_vecs = 6
+        solver = UserSolver(num_design)
+        km = KonaMemory(solver)
+        pf = km.primal_factory
+        pf.request_num_vectors(num_vecs + 1)
+        km.allocate_memory()
+
+        # build a nearly linearly dependent set of vectors
+        W = [pf.generate() for i in xrange(num_vecs)]
+        W[0].base.data[:] = np.random.random_sample(num_design)
+        W[0].divide_by(W[0].norm2)
+        H = np.zeros((num_vecs, num_vecs - 1))
+        for i in xrange(num_vecs - 1):
+            W[i+1].equals(W[i])
+            W[i+1].base.data[i] += 1e-6
+            orig = np.copy(W[i+1].base.data)
+            mod_GS_normalize(i, H, W)
+            # check the coefficients reproduce the original vector
+            recon = np.zeros(num_design)
+            for k in xrange(i+2):
+                recon += H[k, i]*W[k].base.data
+            self.assertTrue(np.allclose(recon, orig))
+        Q = np.array([w.base.data for w in W])
+        self.assertTrue(np.allclose(Q.dot(Q.T), np.eye(num_vecs)))
+
+        # orthogonalize a new vector against the basis without normalizing
+        w = pf.generate()
+        w.base.data[:] = np.random.random_sample(num_design)
+        B = np.zeros((num_vecs, 1))
+        mod_gram_schmidt(0, B, W, w)
+        self.assertTrue(np.allclose(Q.dot(w.base.data), 0.))
+
     def test_secular_function(self):
         '''Krylov utilities secular_function()'''
         # The eigenvalues of the following matrix are (1e-5, 0.01, 1)
@@ -24,11 +24,13 @@ class LagrangianHessianTestCase(unittest.TestCase):
         self.sf = km.state_factory
         self.df = km.eq_factory
 
-        self.pf.request_num_vectors(6)
+        self.pf.request_num_vectors(7)
         self.sf.request_num_vectors(3)
         self.df.request_num_vectors(11)
 
         self.W = LagrangianHessian([self.pf, self.sf])
+        self.W_central = LagrangianHessian(
+            [self.pf, self.sf], {'fd_scheme' : 'central'})
 
         km.allocate_memory()
 
@@ -92,5 +94,11 @@ class LagrangianHessianTestCase(unittest.TestCase):
 
         self.assertTrue(diff_norm <= 1e-3)
 
+        # central differences agree with the forward-difference product
+        self.W_central.linearize(X, state, adjoint)
+        self.W_central.multiply_W(in_vec.primal, design_work)
+        dLdX.primal.equals_ax_p_by(1.0, design_work, -1.0, out_vec.primal)
+        self.assertTrue(dLdX.primal.norm2 <= 1e-5*out_vec.primal.norm2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 import numpy
 
@@ -20,5 +23,33 @@ class OptimizerTestCase(unittest.TestCase):
         diff = max(abs(solver.curr_design - expected))
         self.assertTrue(diff < 1.e-5)
 
+    def test_repeated_solve(self):
+        '''Optimizer output files across repeated solves'''
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        info_file = os.path.join(tmp_dir, 'kona_info.dat')
+        hist_file = os.path.join(tmp_dir, 'kona_hist.dat')
+        solver = kona.examples.Rosenbrock(2)
+        optns = {
+            'info_file' : info_file,
+            'hist_file' : hist_file,
+            'file_mode' : 'async',
+            'max_iter' : 2,
+        }
+        algorithm = kona.algorithms.ReducedSpaceQuasiNewton
+        optimizer = kona.Optimizer(solver, algorithm, optns)
+
+        # output is written out after each solve, and later solves append
+        optimizer.solve()
+        with open(hist_file) as in_file:
+            num_lines = len(in_file.readlines())
+        self.assertTrue(num_lines > 0)
+        optimizer.solve()
+        with open(hist_file) as in_file:
+            self.assertTrue(len(in_file.readlines()) > num_lines)
+
+        optimizer.close()
+        self.assertTrue(optimizer._optns['info_file'].file is None)
+
 if __name__ == "__main__":
     unittest.main()
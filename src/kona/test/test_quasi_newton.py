@@ -66,6 +66,58 @@ class QuasiNewtonApproxTestCase(unittest.TestCase):
         self.assertRelError(y_new.base.data,
                             np.array([0.,0.,1.]), atol=1e-15)
 
+    def test_LimitedMemoryBFGS_compact(self):
+        '''LimitedMemoryBFGS product and solve against dense BFGS updates'''
+        n = 5
+        max_stored = 3
+        km = KonaMemory(UserSolver(n))
+        vf = km.primal_factory
+        lbfgs = LimitedMemoryBFGS(vf, {'max_stored': max_stored})
+        vf.request_num_vectors(4)
+        km.allocate_memory()
+
+        s_new = vf.generate()
+        y_new = vf.generate()
+        u = vf.generate()
+        v = vf.generate()
+        A = np.diag(np.arange(1., n + 1)) + 0.1*np.ones((n, n))
+        np.random.seed(0)
+        steps = [np.random.random_sample(n) - 0.5 for k in xrange(5)]
+        diag = np.arange(2., n + 2)
+
+        for k, step in enumerate(steps):
+            s_new.base.data[:] = step
+            y_new.base.data[:] = A.dot(step)
+            lbfgs.add_correction(s_new, y_new)
+
+            # the ring buffer keeps the newest max_stored corrections
+            stored = steps[max(0, k + 1 - max_stored):k + 1]
+            self.assertEqual(lbfgs.num_stored, len(stored))
+            for init in [None, diag]:
+                if init is None:
+                    lbfgs.init_hessian = None
+                    y = A.dot(stored[-1])
+                    B = np.eye(n)*y.dot(y)/y.dot(stored[-1])
+                else:
+                    lbfgs.init_hessian = u
+                    u.base.data[:] = init
+                    u.touch()
+                    B = np.diag(init)
+                for s in stored:
+                    y = A.dot(s)
+                    Bs = B.dot(s)
+                    B += np.outer(y, y)/y.dot(s) - np.outer(Bs, Bs)/s.dot(Bs)
+
+                s_new.base.data[:] = np.arange(1., n + 1)
+                lbfgs.product(s_new, v)
+                self.assertRelError(v.base.data, B.dot(s_new.base.data),
+                                    atol=1e-10)
+                lbfgs.solve(s_new, v)
+                self.assertRelError(
+                    v.base.data, np.linalg.solve(B, s_new.base.data),
+                    atol=1e-10)
+            lbfgs.init_hessian = None
+
     def test_LimitedMemorySR1(self):
         '''LimitedMemorySR1 tests'''
         # Hessian matrix is [1 0 0; 0 100 0; 0 0 -10]
@@ -120,5 +172,65 @@ class QuasiNewtonApproxTestCase(unittest.TestCase):
         self.assertRelError(y_new.base.data,
                             np.array([0.,0.,1.]), atol=1e-15)
 
+    def test_LimitedMemorySR1_compact(self):
+        '''LimitedMemorySR1 product and solve against dense SR1 updates'''
+        n = 5
+        max_stored = 3
+        km = KonaMemory(UserSolver(n))
+        vf = km.primal_factory
+        lsr1 = LimitedMemorySR1(vf, {'max_stored': max_stored})
+        vf.request_num_vectors(4)
+        km.allocate_memory()
+
+        s_new = vf.generate()
+        y_new = vf.generate()
+        u = vf.generate()
+        v = vf.generate()
+        A = np.diag([1., -2., 3., 4., -5.]) + 0.1*np.ones((n, n))
+        np.random.seed(1)
+        steps = [np.random.random_sample(n) - 0.5 for k in xrange(5)]
+        diag = np.arange(2., n + 2)
+
+        for init in [None, diag]:
+            if init is None:
+                lsr1.init_hessian = None
+            else:
+                lsr1.init_hessian = u
+                u.base.data[:] = init
+                u.touch()
+            pairs = []
+            for step in steps:
+                s_new.base.data[:] = step
+                y_new.base.data[:] = A.dot(step)
+                lsr1.add_correction(s_new, y_new)
+                pairs = (pairs + [step])[-max_stored:]
+
+                # dense SR1 updates with the stored corrections
+                B = np.eye(n) if init is None else np.diag(init)
+                for s in pairs:
+                    r = A.dot(s) - B.dot(s)
+                    B += np.outer(r, r)/r.dot(s)
+
+                s_new.base.data[:] = np.arange(1., n + 1)
+                lsr1.product(s_new, v)
+                self.assertRelError(v.base.data, B.dot(s_new.base.data),
+                                    atol=1e-10)
+                lsr1.solve(s_new, v)
+                self.assertRelError(
+                    v.base.data, np.linalg.solve(B, s_new.base.data),
+                    atol=1e-8)
+            self.assertEqual(lsr1.num_stored, max_stored)
+
+            # a correction with y - Bs orthogonal to s is skipped
+            s_new.base.data[:] = steps[0]
+            lsr1.product(s_new, y_new)
+            r = np.ones(n) - steps[0]*steps[0].sum()/steps[0].dot(steps[0])
+            y_new.base.data[:] += r
+            num_updates = lsr1._num_updates
+            lsr1.add_correction(s_new, y_new)
+            self.assertEqual(lsr1._num_updates, num_updates)
+
+            lsr1 = LimitedMemorySR1(vf, {'max_stored': max_stored})
+
 if __name__ == "__main__":
     unittest.main()
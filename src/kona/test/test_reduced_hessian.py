@@ -24,6 +24,23 @@ class ReducedHessianTestCase(unittest.TestCase):
     def assertRelError(self, vec1, vec2, atol=1e-15):
         self.assertTrue(np.linalg.norm(vec1 - vec2) < atol)
 
+    def test_dynamic_tol(self):
+        '''ReducedHessian inexact product tolerances'''
+        # requests are ignored by default
+        self.hessian.set_product_tol(1e-2)
+        self.assertEqual(self.hessian._solve_tol(1e-6), 1e-6)
+
+        km = KonaMemory(Simple2x2())
+        hessian = ReducedHessian(
+            [km.primal_factory, km.state_factory],
+            {'dynamic_tol' : True, 'nu' : 0.5})
+        self.assertEqual(hessian._solve_tol(1e-6), 1e-6)
+        hessian.set_product_tol(1e-2)
+        self.assertEqual(hessian._solve_tol(1e-6), 0.5e-2)
+        self.assertEqual(hessian._solve_tol(1e-1), 1e-1)
+        hessian.set_product_tol(None)
+        self.assertEqual(hessian._solve_tol(1e-6), 1e-6)
+
     def test_product(self):
         '''ReducedHessian forward product'''
         # get memory
@@ -69,6 +86,136 @@ class ReducedHessianTestCase(unittest.TestCase):
 
         self.assertTrue(diff_norm <= 1e-5*dJdX.norm2)
 
+    def test_fd_scheme(self):
+        '''ReducedHessian finite-difference schemes'''
+        self.assertRaises(
+            ValueError, ReducedHessian, [self.pf, self.sf],
+            {'fd_scheme' : 'complex'})
+
+        km = KonaMemory(Simple2x2())
+        pf = km.primal_factory
+        sf = km.state_factory
+        pf.request_num_vectors(6)
+        sf.request_num_vectors(3)
+        forward = ReducedHessian([pf, sf])
+        central = ReducedHessian([pf, sf], {'fd_scheme' : 'central'})
+        block = ReducedHessian(
+            [pf, sf], {'fd_scheme' : 'central', 'block_size' : 2})
+        km.allocate_memory()
+
+        x = pf.generate()
+        state = sf.generate()
+        adjoint = sf.generate()
+        x.equals(1.0)
+        state.equals_primal_solution(x)
+        adjoint.equals_objective_adjoint(x, state, sf.generate())
+        for hessian in [forward, central, block]:
+            hessian.linearize(x, state, adjoint)
+
+        v = pf.generate()
+        v.base.data[:] = [1.0, -2.0]
+        out_forward = pf.generate()
+        out_central = pf.generate()
+        forward.product(v, out_forward)
+        central.product(v, out_central)
+        self.assertRelError(
+            out_forward.base.data, out_central.base.data,
+            1e-6*out_central.norm2)
+
+        # block products use the same differences
+        outs = [pf.generate() for k in xrange(2)]
+        block.product_block([v, x], outs)
+        self.assertRelError(outs[0].base.data, out_central.base.data, 1e-12)
+
+    def test_product_block(self):
+        '''ReducedHessian block product'''
+        km = KonaMemory(Simple2x2())
+        pf = km.primal_factory
+        sf = km.state_factory
+        pf.request_num_vectors(8)
+        sf.request_num_vectors(3)
+        hessian = ReducedHessian([pf, sf], {'block_size' : 2})
+        km.allocate_memory()
+
+        x = pf.generate()
+        state = sf.generate()
+        adjoint = sf.generate()
+        x.equals(1.0)
+        state.equals_primal_solution(x)
+        adjoint.equals_objective_adjoint(x, state, sf.generate())
+        hessian.linearize(x, state, adjoint)
+
+        # three products exercise a full and a partial block
+        in_vecs = [pf.generate() for k in xrange(3)]
+        out_vecs = [pf.generate() for k in xrange(3)]
+        for k, vec in enumerate(in_vecs):
+            vec.equals(k + 1.0)
+        hessian.product_block(in_vecs, out_vecs)
+        expected = pf.generate()
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            hessian.product(in_vec, expected)
+            self.assertRelError(out_vec.base.data, expected.base.data, 1e-10)
+
+    def test_explicit(self):
+        '''ReducedHessian explicit dense assembly'''
+        km = KonaMemory(Simple2x2())
+        pf = km.primal_factory
+        sf = km.state_factory
+        pf.request_num_vectors(4)
+        sf.request_num_vectors(3)
+        hessian = ReducedHessian([pf, sf])
+        dense = ReducedHessian([pf, sf], {'explicit' : True})
+        auto = ReducedHessian([pf, sf], {'explicit' : 'auto'})
+        km.allocate_memory()
+
+        x = pf.generate()
+        state = sf.generate()
+        adjoint = sf.generate()
+        x.equals(1.0)
+        state.equals_primal_solution(x)
+        adjoint.equals_objective_adjoint(x, state, sf.generate())
+        hessian.linearize(x, state, adjoint)
+        dense.linearize(x, state, adjoint)
+        self.assertEqual(dense.dense.shape, (2, 2))
+        self.assertRelError(dense.dense, dense.dense.T)
+
+        v = pf.generate()
+        v.base.data[:] = [1.0, -2.0]
+        expected = pf.generate()
+        out = pf.generate()
+        hessian.product(v, expected)
+        dense.product(v, out)
+        self.assertRelError(out.base.data, expected.base.data, 1e-6)
+        self.assertEqual(dense.num_products, 1)
+
+        # dense products give the result a new version stamp
+        version = out.version
+        dense.product(v, out)
+        self.assertNotEqual(out.version, version)
+
+        # auto mode assembles only once products outnumber the design
+        auto.linearize(x, state, adjoint)
+        self.assertTrue(auto.dense is None)
+        for k in xrange(3):
+            auto.product(v, out)
+        self.assertEqual(auto.num_products, 3)
+        # dense products keep the demand up on consecutive linearizations
+        for k in xrange(3):
+            auto.linearize(x, state, adjoint)
+            self.assertTrue(auto.dense is not None)
+            for j in xrange(3):
+                auto.product(v, out)
+            self.assertEqual(auto.num_products, 3)
+            self.assertRelError(out.base.data, expected.base.data, 1e-6)
+        # and the assembly stops once the demand drops
+        auto.linearize(x, state, adjoint)
+        self.assertTrue(auto.dense is not None)
+        self.assertEqual(auto.num_products, 0)
+        auto.linearize(x, state, adjoint)
+        self.assertTrue(auto.dense is None)
+
+        self.assertRaises(
+            ValueError, ReducedHessian, [pf, sf], {'explicit' : 'yes'})
 
 if __name__ == "__main__":
     unittest.main()
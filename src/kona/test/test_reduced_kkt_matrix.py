@@ -31,6 +31,8 @@ class ReducedKKTMatrixTestCase(unittest.TestCase):
         self.df.request_num_vectors(15)
 
         self.KKT_matrix = ReducedKKTMatrix([self.pf, self.sf, self.df])
+        central_KKT = ReducedKKTMatrix(
+            [self.pf, self.sf, self.df], {'fd_scheme' : 'central'})
 
         km.allocate_memory()
 
@@ -99,5 +101,11 @@ class ReducedKKTMatrixTestCase(unittest.TestCase):
 
         self.assertTrue(diff_norm <= 1e-3)
 
+        # central differences agree with the forward-difference product
+        central_KKT.linearize(X, state, adjoint)
+        central_KKT.product(in_vec, dLdX_pert)
+        dLdX.equals_ax_p_by(1.0, dLdX_pert, -1.0, out_vec)
+        self.assertTrue(dLdX.norm2 <= 1e-5*out_vec.norm2)
+
 if __name__ == "__main__":
     unittest.main()
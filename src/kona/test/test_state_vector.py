@@ -1,6 +1,7 @@
 import unittest
 
 from kona.linalg.memory import KonaMemory
+from kona.linalg.matrices.common import dRdU
 
 from dummy_solver import DummySolver
 
@@ -11,7 +12,7 @@ class StateVectorTestCase(unittest.TestCase):
         self.km = km = KonaMemory(solver)
 
         km.primal_factory.request_num_vectors(1)
-        km.state_factory.request_num_vectors(3)
+        km.state_factory.request_num_vectors(7)
         km.allocate_memory()
 
         self.pv = km.primal_factory.generate()
@@ -53,5 +54,23 @@ class StateVectorTestCase(unittest.TestCase):
         self.sv.equals_objective_adjoint(at_design, at_state, state_work)
         self.assertEqual(self.sv.inner(self.sv), 10.0)
 
+    def test_multi_adjoint_solution(self):
+        '''StateVector multi-RHS adjoint solution'''
+        at_design = self.pv
+        at_design.equals(1)
+        at_state = self.sv_work
+        at_state.equals(2)
+        rhs1 = self.km.state_factory.generate()
+        rhs2 = self.km.state_factory.generate()
+        adj2 = self.km.state_factory.generate()
+        rhs1.equals_objective_adjoint_rhs(at_design, at_state)
+        rhs2.equals_objective_adjoint_rhs(at_design, at_state, scale=-2.)
+        converged = dRdU(at_design, at_state).T.solve_multi(
+            [rhs1, rhs2], [self.sv, adj2])
+        self.assertTrue(converged)
+        self.assertEqual(self.sv.inner(self.sv), 10.0)
+        self.assertEqual(adj2.inner(adj2), 40.0)
+        self.assertEqual(self.sv.inner(adj2), -20.0)
+
 if __name__ == "__main__":
     unittest.main()
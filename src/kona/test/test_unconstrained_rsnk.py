@@ -5,6 +5,9 @@ import sys
 from kona import Optimizer
 from kona.algorithms import UnconstrainedRSNK, Verifier
 from kona.examples import Rosenbrock, Spiral
+from kona.options import BadKonaOption
+from kona.linalg.solvers.krylov import \
+    STCG, KRYLOV_SOLVERS, register_krylov_solver
 
 class UnconstrainedRSNKTestCase(unittest.TestCase):
 
@@ -50,6 +53,75 @@ class UnconstrainedRSNKTestCase(unittest.TestCase):
         diff = abs(solver.curr_design - numpy.ones(ndv))
         self.assertTrue(max(diff) < 1e-5)
 
+    def test_krylov_solver_option(self):
+        '''UnconstrainedRSNK Krylov solver selection by name'''
+        class CountingSTCG(STCG):
+            pass
+        register_krylov_solver('counting_stcg', CountingSTCG)
+        self.addCleanup(KRYLOV_SOLVERS.pop, 'counting_stcg')
+
+        solver = Rosenbrock(2)
+        optns = {
+            'info_file' : 'kona_info.dat',
+            'max_iter' : 50,
+            'opt_tol' : 1e-8,
+            'rsnk' : {
+                'precond'       : None,
+                'krylov_solver' : 'Counting_STCG',
+                'krylov_file'   : 'kona_krylov.dat',
+                'rel_tol'       : 1e-7,
+            },
+        }
+        optimizer = Optimizer(solver, UnconstrainedRSNK, optns)
+        self.assertTrue(isinstance(optimizer._algorithm.krylov, CountingSTCG))
+        optimizer.solve()
+        stats = optimizer._memory.krylov_stats['CountingSTCG']
+        self.assertTrue(stats.num_solves > 0)
+        self.assertTrue(stats.num_matvec >= stats.iters)
+
+        optns['rsnk']['krylov_solver'] = 'gltr'
+        solver = Rosenbrock(2)
+        optimizer = Optimizer(solver, UnconstrainedRSNK, optns)
+        optimizer.solve()
+        diff = abs(solver.curr_design - numpy.ones(2))
+        self.assertTrue(max(diff) < 1e-5)
+
+        optns['rsnk']['krylov_solver'] = 'unknown'
+        self.assertRaises(
+            BadKonaOption, Optimizer, Rosenbrock(2), UnconstrainedRSNK, optns)
+
+        # solvers that cannot fill the role of the globalization are rejected
+        optns['rsnk']['krylov_solver'] = 'fgmres'
+        self.assertRaises(
+            BadKonaOption, Optimizer, Rosenbrock(2), UnconstrainedRSNK, optns)
+        optns['rsnk']['krylov_solver'] = 'gltr'
+        optns['globalization'] = None
+        self.assertRaises(
+            BadKonaOption, Optimizer, Rosenbrock(2), UnconstrainedRSNK, optns)
+
+    def test_curvature_store_option(self):
+        '''UnconstrainedRSNK with a curvature store'''
+        solver = Rosenbrock(2)
+        optns = {
+            'info_file' : 'kona_info.dat',
+            'max_iter' : 50,
+            'opt_tol' : 1e-8,
+            'globalization' : None,
+            'rsnk' : {
+                'precond'         : None,
+                'krylov_file'     : 'kona_krylov.dat',
+                'rel_tol'         : 1e-7,
+                'curvature_store' : {'max_stored' : 4},
+            },
+        }
+        optimizer = Optimizer(solver, UnconstrainedRSNK, optns)
+        store = optimizer._algorithm.curvature
+        self.assertTrue(optimizer._algorithm.hessian.curvature is store)
+        optimizer.solve()
+        self.assertTrue(store.num_stored > 0)
+        diff = abs(solver.curr_design - numpy.ones(2))
+        self.assertTrue(max(diff) < 1e-5)
+
     def test_RSNK_with_Spiral(self):
         '''UnconstrainedRSNK solution with Spiral problem'''
         solver = Spiral()
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from kona import Optimizer
 from kona.algorithms import Verifier
 from kona.examples import Sellar
@@ -31,5 +32,45 @@ class VerifierTestCase(unittest.TestCase):
 
         self.failUnless('Output inspected by hand...')
 
+    def test_block_jac(self):
+        '''Verifier test on user-defined block jacobian products'''
+
+        class BlockSellar(Sellar):
+
+            def multiply_dRdX_block(self, at_design, at_state,
+                                    in_vecs, out_vecs):
+                x1 = at_design[0]
+                dRdX = np.array(
+                    [[-2.*x1, -1., -1.],
+                     [-1., -1., 0.]])
+                prods = np.dot(dRdX, np.array(in_vecs).T)
+                for k, out_vec in enumerate(out_vecs):
+                    out_vec.data[:] = prods[:, k]
+
+            def multiply_dCINdX_T_block(self, at_design, at_state, in_vecs):
+                # deliberately wrong
+                return [np.ones(self.num_design) for in_vec in in_vecs]
+
+        solver = BlockSellar()
+        optns = {
+            'verify' : {
+                'primal_vec'     : False,
+                'state_vec'      : False,
+                'gradients'      : False,
+                'pde_jac'        : False,
+                'red_grad'       : False,
+                'lin_solve'      : False,
+                'block_jac'      : True,
+                'out_file'       : 'kona_verify.dat',
+            },
+        }
+        optimizer = Optimizer(solver, Verifier, optns)
+        optimizer.solve()
+
+        failures = optimizer._algorithm.failures['block_jac']
+        self.assertFalse(failures['multiply_dRdX_block'])
+        self.assertTrue(failures['multiply_dCINdX_T_block'])
+        self.assertTrue(failures['multiply_dRdU_block'] is None)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,9 @@
 import numpy as np
 
+def _inner(x, y):
+    # inner product accumulated in double precision, whatever the storage
+    return np.inner(x.astype(float, copy=False), y.astype(float, copy=False))
+
 class BaseVector(object):
     """
     Kona's default data container, implemented on top of NumPy arrays.
@@ -18,28 +22,54 @@ class BaseVector(object):
         Size of the 1-D numpy vector contained in this object.
     val : float or array-like, optional
         Data value for vector initialization.
+    dtype : numpy.dtype, optional
+        Storage precision of the data. Reductions (inner products and linear
+        combinations) are always accumulated in double precision.
 
     Attributes
     ----------
     data : numpy.array
         Numpy vector containing numerical data.
+
+    Notes
+    -----
+    All operations are performed in-place on ``data`` using ufunc ``out=``
+    arguments, so external views on ``data`` remain valid. Intermediate
+    results are stored in a scratch array shared by all vectors of the same
+    size.
+
+    Kona tracks changes to the vector data with the version stamps of the
+    ``KonaVector`` wrappers, which are not updated when ``data`` is written
+    directly. The linearization keys passed to
+    ``UserSolver.linearization_changed()`` and the optional ``eval_cache``
+    rely on these stamps, so any such write must be followed by ``touch()``
+    on the wrapping ``KonaVector``.
     """
-    def __init__(self, size, val=0):
+
+    _scratch = {}
+
+    def __init__(self, size, val=0, dtype=float):
         if np.isscalar(val):
             if val == 0:
-                self.data = np.zeros(size, dtype=float)
+                self.data = np.zeros(size, dtype=dtype)
             elif isinstance(val, (np.float, np.int)):
-                self.data = np.ones(size, dtype=float)*val
+                self.data = np.ones(size, dtype=dtype)*val
         elif isinstance(val, (np.ndarray, list, tuple)):
             if size != len(val):
                 raise ValueError(
                     'size given as %d, but length of value %d'%(size, len(val)))
-            self.data = np.array(val)
+            self.data = np.array(val, dtype=dtype)
         else:
             raise ValueError(
                 'val must be a scalar or array like, ' +
                 'but was given as type %s'%(type(val)))
 
+    def _get_scratch(self):
+        size = len(self.data)
+        if size not in BaseVector._scratch:
+            BaseVector._scratch[size] = np.empty(size, dtype=float)
+        return BaseVector._scratch[size]
+
     def plus(self, vector):
         """
         Add the given vector to this vector.
@@ -49,7 +79,7 @@ class BaseVector(object):
         vector : BaseVector
             Incoming vector for in-place operation.
         """
-        self.data = self.data + vector.data
+        np.add(self.data, vector.data, out=self.data)
 
     def times_scalar(self, value):
         """
@@ -59,7 +89,7 @@ class BaseVector(object):
         ----------
         value: float
         """
-        self.data = value*self.data
+        np.multiply(self.data, value, out=self.data)
 
     def times_vector(self, vector):
         """
@@ -70,7 +100,7 @@ class BaseVector(object):
         vector : BaseVector
             Incoming vector for in-place operation.
         """
-        self.data = self.data*vector.data
+        np.multiply(self.data, vector.data, out=self.data)
 
     def equals_value(self, value):
         """
@@ -112,7 +142,20 @@ class BaseVector(object):
         y : BaseVector
             Vector to be operated on.
         """
-        self.data = a*x.data + b*y.data
+        if y.data is self.data and x.data is not self.data:
+            # swap the terms so that the aliased vector is always x
+            a, x, b, y = b, y, a, x
+        if x.data is self.data:
+            if y.data is self.data:
+                np.multiply(self.data, a + b, out=self.data)
+                return
+            if a != 1.0:
+                np.multiply(self.data, a, out=self.data)
+        else:
+            np.multiply(x.data, a, out=self.data)
+        scratch = self._get_scratch()
+        np.multiply(y.data, b, out=scratch)
+        np.add(self.data, scratch, out=self.data)
 
     def inner(self, vector):
         """
@@ -131,7 +174,112 @@ class BaseVector(object):
         if len(self.data) == 0:
             return 0.
         else:
-            return np.inner(self.data, vector.data)
+            return _inner(self.data, vector.data)
+
+    def _get_block(self, vectors):
+        """
+        Return a 2-D view on the data of the given vectors if they are equally
+        spaced rows of the same array (e.g.: a slab allocated by KonaMemory),
+        otherwise return None.
+        """
+        if len(vectors) < 2:
+            return None
+        first = vectors[0].data
+        if first.base is None or first.strides != (first.itemsize,):
+            return None
+        start = first.__array_interface__['data'][0]
+        step = vectors[1].data.__array_interface__['data'][0] - start
+        if abs(step) < first.nbytes:
+            return None
+        for k, vector in enumerate(vectors):
+            data = vector.data
+            if data.base is not first.base or data.shape != first.shape or \
+                    data.strides != first.strides or \
+                    data.__array_interface__['data'][0] != start + k*step:
+                return None
+        return np.lib.stride_tricks.as_strided(
+            first, shape=(len(vectors), len(first)),
+            strides=(step, first.itemsize))
+
+    def multi_inner(self, vectors):
+        """
+        Perform inner products between this vector and each of the given
+        vectors.
+
+        This method is optional for user data containers. If the vectors are
+        rows of a single contiguous slab, all products are computed with one
+        matrix-vector product.
+
+        Parameters
+        ----------
+        vectors : list of BaseVector
+            Incoming vectors.
+
+        Returns
+        -------
+        numpy.ndarray
+            Inner products, one per incoming vector.
+        """
+        if len(self.data) == 0:
+            return np.zeros(len(vectors))
+        block = self._get_block(vectors)
+        if block is not None:
+            return block.dot(self.data)
+        else:
+            return np.array(
+                [_inner(self.data, vector.data) for vector in vectors])
+
+    def fused_inner(self, pairs):
+        """
+        Perform the inner products of several pairs of vectors at once.
+
+        This method is optional for user data containers. Distributed
+        containers should implement it with a single global reduction of the
+        local products, which is what pipelined Krylov solvers rely on to cut
+        synchronization.
+
+        Parameters
+        ----------
+        pairs : list of tuple of BaseVector
+            Pairs of vectors to be multiplied.
+
+        Returns
+        -------
+        numpy.ndarray
+            Inner products, one per pair.
+        """
+        if len(self.data) == 0:
+            return np.zeros(len(pairs))
+        return np.array([_inner(x.data, y.data) for x, y in pairs])
+
+    def multi_axpy(self, coeffs, vectors):
+        """
+        Add a linear combination of the given vectors to this vector.
+
+        .. math:: \\mathbf{v} = \\mathbf{v} + \\sum_k c_k \\mathbf{x}_k
+
+        This method is optional for user data containers. If the vectors are
+        rows of a single contiguous slab, the combination is computed with
+        one matrix-vector product.
+
+        Parameters
+        ----------
+        coeffs : array-like
+            Scalar coefficients of the incoming vectors.
+        vectors : list of BaseVector
+            Incoming vectors.
+        """
+        if len(coeffs) != len(vectors):
+            raise ValueError('number of coefficients and vectors do not match')
+        scratch = self._get_scratch()
+        block = self._get_block(vectors)
+        if block is not None:
+            np.dot(np.asarray(coeffs, dtype=float), block, out=scratch)
+            np.add(self.data, scratch, out=self.data)
+        else:
+            for coeff, vector in zip(coeffs, vectors):
+                np.multiply(vector.data, coeff, out=scratch)
+                np.add(self.data, scratch, out=self.data)
 
     @property
     def infty(self):
@@ -157,7 +305,7 @@ class BaseVector(object):
         vector : BaseVector
             Incoming vector for in-place operation.
         """
-        self.data = np.exp(vector.data)
+        np.exp(vector.data, out=self.data)
 
     def log(self, vector):
         """
@@ -171,7 +319,7 @@ class BaseVector(object):
         vector : BaseVector
             Incoming vector for in-place operation.
         """
-        self.data = np.log(vector.data)
+        np.log(vector.data, out=self.data)
 
     def pow(self, power):
         """
@@ -184,4 +332,4 @@ class BaseVector(object):
         ----------
         power : float
         """
-        self.data = self.data**power
+        np.power(self.data, power, out=self.data)
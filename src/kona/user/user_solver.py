@@ -16,6 +16,12 @@ class UserSolver(object):
     implementation details are left up to the user entirely. Below is just an
     example used by Kona's own test problems.
 
+    With the ``eval_cache`` option, Kona memoizes the results of the
+    evaluation methods at recent (design, state) points, identified by the
+    version stamps of the vectors. Solvers that modify the data of the
+    design or state vectors themselves must not enable it, or must call
+    ``touch()`` on the corresponding ``KonaVector`` afterwards.
+
     Parameters
     ----------
     num_design : int
@@ -315,6 +321,32 @@ class UserSolver(object):
         """
         pass
 
+    def linearization_changed(self, at_design, at_state, lin_key, cached):
+        """
+        OPTIONAL: Notification that the jacobian products, preconditioner
+        applications and linear solves that follow are evaluated at a new
+        (design, state) point.
+
+        ``lin_key`` is a hashable identifier of the point: it is the same only
+        if neither the design nor the state vector changed in between. Kona
+        keeps track of the last few points it has used, and sets ``cached`` to
+        ``True`` when the point is one of them. Solvers that assemble or factor
+        jacobians can keep them in a small cache indexed by ``lin_key`` and
+        skip re-assembly when they are notified of a point already seen.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Design vector of the new linearization point.
+        at_state : BaseVector
+            State vector of the new linearization point.
+        lin_key : tuple
+            Identifier of the linearization point.
+        cached : bool
+            ``True`` if the point is among the most recently used ones.
+        """
+        pass
+
     def apply_precond(self, at_design, at_state, in_vec, out_vec):
         """
         Apply the preconditioner to the vector at ``in_vec`` and
@@ -647,6 +679,254 @@ class UserSolver(object):
         assert len(in_vec) == self.num_ineq, "Incorrect vector size!"
         out_vec.data[:] = 0.0
 
+    def multiply_dRdX_block(self, at_design, at_state, in_vecs, out_vecs):
+        """
+        OPTIONAL: Evaluate the design-jacobian product of the PDE residual for
+        a block of multiplying vectors at once. The result for ``in_vecs[k]``
+        should be stored in ``out_vecs[k]``.
+
+        The default implementation loops over ``multiply_dRdX()``. Solvers
+        that can apply the jacobian to several vectors at nearly the cost of
+        one (e.g.: memory-bandwidth bound solvers) should override this and
+        the other ``multiply_*_block()`` methods below.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+        out_vecs : list of BaseVector
+            Locations where user should store the results.
+        """
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.multiply_dRdX(at_design, at_state, in_vec, out_vec)
+
+    def multiply_dRdU_block(self, at_design, at_state, in_vecs, out_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dRdU()``. The result for
+        ``in_vecs[k]`` should be stored in ``out_vecs[k]``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of BaseVector
+            Vectors to be operated on.
+        out_vecs : list of BaseVector
+            Locations where user should store the results.
+        """
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.multiply_dRdU(at_design, at_state, in_vec, out_vec)
+
+    def multiply_dRdX_T_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dRdX_T()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of BaseVector
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dRdX_T(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dRdU_T_block(self, at_design, at_state, in_vecs, out_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dRdU_T()``. The result for
+        ``in_vecs[k]`` should be stored in ``out_vecs[k]``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of BaseVector
+            Vectors to be operated on.
+        out_vecs : list of BaseVector
+            Locations where user should store the results.
+        """
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.multiply_dRdU_T(at_design, at_state, in_vec, out_vec)
+
+    def multiply_dCEQdX_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCEQdX()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCEQdX(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCEQdU_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCEQdU()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of BaseVector
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCEQdU(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCEQdX_T_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCEQdX_T()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCEQdX_T(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCEQdU_T_block(self, at_design, at_state, in_vecs, out_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCEQdU_T()``. The result for
+        ``in_vecs[k]`` should be stored in ``out_vecs[k]``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+        out_vecs : list of BaseVector
+            Locations where user should store the results.
+        """
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.multiply_dCEQdU_T(at_design, at_state, in_vec, out_vec)
+
+    def multiply_dCINdX_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCINdX()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCINdX(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCINdU_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCINdU()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of BaseVector
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCINdU(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCINdX_T_block(self, at_design, at_state, in_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCINdX_T()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Results of the products, one per multiplying vector.
+        """
+        return [self.multiply_dCINdX_T(at_design, at_state, in_vec)
+                for in_vec in in_vecs]
+
+    def multiply_dCINdU_T_block(self, at_design, at_state, in_vecs, out_vecs):
+        """
+        OPTIONAL: Block version of ``multiply_dCINdU_T()``. The result for
+        ``in_vecs[k]`` should be stored in ``out_vecs[k]``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector
+            Current state vector.
+        in_vecs : list of numpy.ndarray
+            Vectors to be operated on.
+        out_vecs : list of BaseVector
+            Locations where user should store the results.
+        """
+        for in_vec, out_vec in zip(in_vecs, out_vecs):
+            self.multiply_dCINdU_T(at_design, at_state, in_vec, out_vec)
+
     def eval_dFdX(self, at_design, at_state):
         """
         Evaluate the partial of the objective w.r.t. design variables at the
@@ -848,6 +1128,87 @@ class UserSolver(object):
             result.data[:] = 0.
         return 0
 
+    def solve_linear_multi(self, at_design, at_state, rhs_vecs, rel_tol,
+                           results):
+        """
+        OPTIONAL: Solve the linear system defined by the state-jacobian of the
+        PDE residual for several right hand sides at once. The solution for
+        ``rhs_vecs[k]`` should be stored in ``results[k]``.
+
+        The default implementation loops over ``solve_linear()``. Solvers with
+        a factored jacobian (see ``factor_linear_system()``) can override this
+        to perform a single multi-RHS back-substitution.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector-line
+            Current state vector.
+        rhs_vecs : list of BaseVector
+            Right hand side vectors.
+        rel_tol : float
+            Tolerance that the linear systems should be solved to.
+        results : list of BaseVector
+            Locations where user should store the results.
+
+        Returns
+        -------
+        int
+            Number of preconditioner calls required for all the solutions.
+            Must be negative if any of the solutions failed.
+        """
+        total_cost = 0
+        failed = False
+        for rhs_vec, result in zip(rhs_vecs, results):
+            cost = self.solve_linear(at_design, at_state, rhs_vec, rel_tol,
+                                     result)
+            total_cost += abs(cost)
+            failed = failed or cost < 0
+        if failed:
+            return -total_cost
+        return total_cost
+
+    def solve_adjoint_multi(self, at_design, at_state, rhs_vecs, rel_tol,
+                            results):
+        """
+        OPTIONAL: Solve the linear system defined by the transposed
+        state-jacobian of the PDE residual for several right hand sides at
+        once. The solution for ``rhs_vecs[k]`` should be stored in
+        ``results[k]``.
+
+        The default implementation loops over ``solve_adjoint()``.
+
+        Parameters
+        ----------
+        at_design : numpy.ndarray
+            Current design vector.
+        at_state : BaseVector-line
+            Current state vector.
+        rhs_vecs : list of BaseVector
+            Right hand side vectors.
+        rel_tol : float
+            Tolerance that the linear systems should be solved to.
+        results : list of BaseVector
+            Locations where user should store the results.
+
+        Returns
+        -------
+        int
+            Number of preconditioner calls required for all the solutions.
+            Must be negative if any of the solutions failed.
+        """
+        total_cost = 0
+        failed = False
+        for rhs_vec, result in zip(rhs_vecs, results):
+            cost = self.solve_adjoint(at_design, at_state, rhs_vec, rel_tol,
+                                      result)
+            total_cost += abs(cost)
+            failed = failed or cost < 0
+        if failed:
+            return -total_cost
+        return total_cost
+
     def current_solution(self, num_iter, curr_design, curr_state, curr_adj,
                          curr_eq, curr_ineq, curr_slack):
         """